@@ -3,6 +3,7 @@
 Launcher único e simplificado com arquitetura MVC
 """
 
+import argparse
 import sys
 import os
 from pathlib import Path
@@ -12,6 +13,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 def main():
     """Função principal da aplicação"""
+    parser = argparse.ArgumentParser(description="YOLO Detection Studio")
+    parser.add_argument('--server', action='store_true', help="API HTTP local de inferência (sem interface)")
+    parser.add_argument('--host', default=None, help="Endereço do servidor (padrão: server.host)")
+    parser.add_argument('--port', type=int, default=None, help="Porta do servidor (padrão: server.port)")
+    parser.add_argument('--calibrate', action='store_true',
+                        help="Com --server: calibra threads e tamanho de lote antes de atender")
+    args = parser.parse_args()
+    
     try:
         # Verificar dependências
         print("🔍 Verificando dependências...")
@@ -22,6 +31,12 @@ def main():
             os.makedirs(modelo_dir, exist_ok=True)
             print(f"📁 Pasta criada automaticamente: {modelo_dir}")
         
+        # Modo servidor: sem Tk, apenas a API de inferência
+        if args.server:
+            from controllers.server_controller import ServerController
+            ServerController(host=args.host, port=args.port, calibrate=args.calibrate).run()
+            return
+        
         # Importar e executar controlador principal
         from controllers.main_controller import MainController
         
@@ -0,0 +1,105 @@
+"""
+📊 Benchmark - Cascata
+Latência e recall: estágio único (frame inteiro) vs cascata
+(propostas baratas + segmentação só nos recortes)
+
+Uso: python benchmarks/benchmark_cascade.py --images pasta/ [--labels pasta/]
+       [--proposal modelo_det.pt] [--proposal-sizes 256,320] [--crop-sizes 320,480]
+Rótulos no formato YOLO (classe cx cy w h normalizados), um .txt por imagem.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmark_tiling import carregar_rotulos, contar_acertos
+from models.config_manager import ConfigManager
+from models.detection_model import DetectionModel
+
+
+def medir(model, frames, repeats):
+    """Latências por frame (ms), resultados da última rodada e recortes médios por frame"""
+    model.inferir(frames[0])  # aquecimento
+    latencias = []
+    resultados = []
+    recortes = 0
+    for _ in range(repeats):
+        resultados = []
+        for frame in frames:
+            start = time.perf_counter()
+            resultados.append(model.inferir(frame))
+            latencias.append((time.perf_counter() - start) * 1000)
+            recortes += model.ultimas_regioes
+    return np.array(latencias), resultados, recortes / (repeats * len(frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da cascata de detecção")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--images', required=True, help="Pasta com imagens")
+    parser.add_argument('--labels', default=None, help="Pasta com rótulos YOLO (.txt)")
+    parser.add_argument('--proposal', default=None, help="Modelo de propostas (padrão: o próprio modelo)")
+    parser.add_argument('--proposal-sizes', default='256,320')
+    parser.add_argument('--crop-sizes', default='320')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+                   for p in glob.glob(os.path.join(args.images, ext)))
+    if not paths:
+        print(f"❌ Nenhuma imagem em {args.images}")
+        return
+
+    config = ConfigManager(args.config)
+    config.set('tiling.enabled', False)
+    config.set('cache.enabled', False)
+    if args.proposal:
+        config.set('cascade.proposal_path', args.proposal)
+    model = DetectionModel(config)
+    if model.model is None:
+        print("❌ Modelo não carregado")
+        return
+
+    frames = [cv2.imread(p) for p in paths]
+    rotulos = []
+    for path, frame in zip(paths, frames):
+        label_path = None
+        if args.labels:
+            label_path = os.path.join(args.labels, os.path.splitext(os.path.basename(path))[0] + '.txt')
+        rotulos.append(carregar_rotulos(label_path, frame.shape))
+    total_gt = sum(len(r) for r in rotulos)
+
+    cenarios = [('único', None, None)]
+    for proposal_size in (int(v) for v in args.proposal_sizes.split(',')):
+        for crop_size in (int(v) for v in args.crop_sizes.split(',')):
+            cenarios.append((f"{proposal_size}/{crop_size}", proposal_size, crop_size))
+
+    print(f"🖼️ {len(frames)} imagens, {total_gt} objetos rotulados")
+    print(f"{'modo':>10} {'recortes':>9} {'p50 ms':>8} {'p95 ms':>8} {'FPS':>7} {'detecções':>10} {'recall':>7}")
+
+    for nome, proposal_size, crop_size in cenarios:
+        config.set('cascade.enabled', proposal_size is not None)
+        if proposal_size is not None:
+            config.set('cascade.proposal_size', proposal_size)
+            config.set('cascade.crop_size', crop_size)
+        model.ultimas_regioes = 1
+
+        latencias, resultados, recortes = medir(model, frames, args.repeats)
+        acertos = sum(contar_acertos(d, gt) for d, gt in zip(resultados, rotulos))
+        recall = acertos / total_gt if total_gt else None
+        recall_txt = f"{recall:.1%}" if recall is not None else "-"
+        print(f"{nome:>10} {recortes:>9.1f} {np.percentile(latencias, 50):>8.1f} "
+              f"{np.percentile(latencias, 95):>8.1f} {1000 / latencias.mean():>7.1f} "
+              f"{sum(len(d) for d in resultados):>10} {recall_txt:>7}")
+    print("💡 'recortes' = imagens no lote de segmentação por frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+📊 Benchmark - Supressão de Duplicatas
+Custo da supressão pós-NMS em função do número de detecções:
+laço Python par a par vs IoU em matriz (boxes e máscaras compactas)
+
+Uso: python benchmarks/benchmark_duplicates.py [--counts 10,50,100,200,400,800] [--repeats 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.box_ops import box_iou_matrix, suprimir
+from models.mask_codec import CompactMask, mask_iou_matrix
+
+
+def gerar_deteccoes(n, rng, frame_w=1920, frame_h=1080):
+    """Boxes aleatórias com ~30% de duplicatas deslocadas e máscaras elípticas"""
+    base = max(int(n * 0.7), 1)
+    x1 = rng.uniform(0, frame_w - 120, base)
+    y1 = rng.uniform(0, frame_h - 120, base)
+    w = rng.uniform(30, 120, base)
+    h = rng.uniform(30, 120, base)
+    boxes = np.stack([x1, y1, x1 + w, y1 + h], axis=1)
+
+    extras = boxes[rng.integers(0, base, n - base)] + rng.uniform(-8, 8, (n - base, 4))
+    boxes = np.concatenate([boxes, extras]).astype(np.float32)
+    scores = rng.uniform(0.2, 0.95, n).astype(np.float32)
+
+    masks = []
+    for x1, y1, x2, y2 in boxes.astype(int):
+        mh, mw = max((y2 - y1) // 4, 1), max((x2 - x1) // 4, 1)
+        yy, xx = np.ogrid[:mh, :mw]
+        crop = ((yy - mh / 2) / (mh / 2)) ** 2 + ((xx - mw / 2) / (mw / 2)) ** 2 <= 1.0
+        masks.append(CompactMask.from_crop(crop, (x1, y1, x2, y2)))
+    return boxes, scores, masks
+
+
+def iou_par(a, b):
+    """IoU de duas boxes (referência escalar)"""
+    iw = max(min(a[2], b[2]) - max(a[0], b[0]), 0)
+    ih = max(min(a[3], b[3]) - max(a[1], b[1]), 0)
+    inter = iw * ih
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def laco_python(boxes, scores, threshold):
+    """Caminho ingênuo: O(N²) comparações em Python"""
+    order = np.argsort(-scores).tolist()
+    keep = []
+    for i in order:
+        if all(iou_par(boxes[i], boxes[j]) <= threshold for j in keep):
+            keep.append(i)
+    return keep
+
+
+def vetorizado(boxes, scores, threshold, masks=None, method='greedy'):
+    """IoU em matriz + supressão (mesma lógica do DetectionModel)"""
+    order = np.argsort(-scores, kind='stable')
+    overlap = box_iou_matrix(boxes[order], boxes[order])
+    if masks is not None:
+        np.fill_diagonal(overlap, 0.0)
+        vizinhos = np.flatnonzero(overlap.max(axis=1) > 0)
+        if len(vizinhos) > 1:
+            overlap[np.ix_(vizinhos, vizinhos)] = mask_iou_matrix([masks[order[i]] for i in vizinhos])
+    return order[suprimir(overlap, threshold, method=method)]
+
+
+def medir(func, repeats):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da supressão de duplicatas")
+    parser.add_argument('--counts', default='10,50,100,200,400,800')
+    parser.add_argument('--threshold', type=float, default=0.3)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'N':>5} {'python ms':>10} {'matriz ms':>10} {'fast ms':>8} {'máscara ms':>11} {'mantidas':>14}")
+    for n in (int(v) for v in args.counts.split(',')):
+        boxes, scores, masks = gerar_deteccoes(n, rng)
+        t_py, k_py = medir(lambda: laco_python(boxes, scores, args.threshold), max(args.repeats // 5, 1))
+        t_vec, k_vec = medir(lambda: vetorizado(boxes, scores, args.threshold), args.repeats)
+        t_fast, _ = medir(lambda: vetorizado(boxes, scores, args.threshold, method='fast'), args.repeats)
+        t_mask, k_mask = medir(lambda: vetorizado(boxes, scores, args.threshold, masks), args.repeats)
+        print(f"{n:>5} {t_py:>10.2f} {t_vec:>10.2f} {t_fast:>8.2f} {t_mask:>11.2f} {f'{k_py}/{k_vec}/{k_mask}':>14}")
+
+
+if __name__ == "__main__":
+    main()
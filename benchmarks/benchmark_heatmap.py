@@ -0,0 +1,86 @@
+"""
+📊 Benchmark - Heatmap de Ocupação
+Custo por frame de atualizar() (centros e máscaras) e de renderizar() ao
+longo de horas simuladas: deve ficar constante, sem crescer com o tempo
+
+Uso: python benchmarks/benchmark_heatmap.py [--detections 5,20,50] [--hours 8] [--fps 30]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.config_manager import ConfigManager
+from models.heatmap import OccupancyHeatmap
+from models.mask_codec import CompactMask
+
+
+def deteccoes_sinteticas(rng, quantidade, shape):
+    """Detecções com bbox, centro e máscara elíptica compacta"""
+    h, w = shape
+    detections = []
+    for _ in range(quantidade):
+        bw, bh = rng.integers(40, 160, 2)
+        x1, y1 = int(rng.integers(0, w - bw)), int(rng.integers(0, h - bh))
+        yy, xx = np.ogrid[:bh, :bw]
+        crop = ((xx - bw / 2) / (bw / 2)) ** 2 + ((yy - bh / 2) / (bh / 2)) ** 2 <= 1.0
+        bbox = (x1, y1, x1 + int(bw), y1 + int(bh))
+        detections.append({
+            'bbox': bbox,
+            'center': (x1 + bw // 2, y1 + bh // 2),
+            'mask': CompactMask.from_crop(crop, bbox),
+        })
+    return detections
+
+
+def medir(heatmap, lotes, shape, fps, inicio, frames):
+    """Tempo médio (µs) de atualizar() em 'frames' frames a partir de 'inicio' s"""
+    start = time.perf_counter()
+    for i in range(frames):
+        heatmap.atualizar(lotes[i % len(lotes)], shape, timestamp=inicio + i / fps)
+    return (time.perf_counter() - start) / frames * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do heatmap de ocupação")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--detections', default='5,20,50')
+    parser.add_argument('--hours', type=float, default=8.0, help="Tempo de execução simulado")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--frames', type=int, default=2000, help="Frames medidos em cada ponto")
+    args = parser.parse_args()
+
+    shape = (720, 1280)
+    rng = np.random.default_rng(0)
+    config = ConfigManager(args.config)
+    display = np.full((540, 960, 3), 80, dtype=np.uint8)
+
+    print(f"{'fonte':>7} {'detec.':>7} {'início µs':>10} {'após {:.0f} h µs'.format(args.hours):>14} "
+          f"{'render µs':>10} {'pico s':>8}")
+    for fonte in ('center', 'mask'):
+        config.set('heatmap.source', fonte)
+        for quantidade in (int(v) for v in args.detections.split(',')):
+            lotes = [deteccoes_sinteticas(rng, quantidade, shape) for _ in range(16)]
+            heatmap = OccupancyHeatmap(config)
+            inicial = medir(heatmap, lotes, shape, args.fps, 0.0, args.frames)
+
+            # Pular para o fim do período: o estado não depende de quantos frames passaram
+            final = medir(heatmap, lotes, shape, args.fps, args.hours * 3600, args.frames)
+
+            heatmap.renderizar(display)
+            start = time.perf_counter()
+            for _ in range(200):
+                heatmap.renderizar(display)
+            render = (time.perf_counter() - start) / 200 * 1e6
+
+            print(f"{fonte:>7} {quantidade:>7} {inicial:>10.1f} {final:>14.1f} {render:>10.1f} "
+                  f"{heatmap.get_stats()['peak_seconds']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
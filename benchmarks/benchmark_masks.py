@@ -0,0 +1,110 @@
+"""
+📊 Benchmark - Máscaras
+Compara memória e tempo da máscara densa float32 com a CompactMask
+
+Uso: python benchmarks/benchmark_masks.py [--detections 20] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.mask_codec import CompactMask, aplicar_mascara
+
+
+def gerar_deteccoes(num, frame_shape, mask_shape, seed=0):
+    """Gera bboxes e máscaras nativas sintéticas (elipses)"""
+    rng = np.random.default_rng(seed)
+    frame_h, frame_w = frame_shape
+    mask_h, mask_w = mask_shape
+    deteccoes = []
+    for _ in range(num):
+        w = int(rng.integers(80, 300))
+        h = int(rng.integers(80, 300))
+        x1 = int(rng.integers(0, frame_w - w))
+        y1 = int(rng.integers(0, frame_h - h))
+        bbox = [x1, y1, x1 + w, y1 + h]
+
+        mask = np.zeros(mask_shape, dtype=np.float32)
+        cx = int((x1 + w / 2) * mask_w / frame_w)
+        cy = int((y1 + h / 2) * mask_h / frame_h)
+        axes = (max(int(w / 2 * mask_w / frame_w), 1), max(int(h / 2 * mask_h / frame_h), 1))
+        cv2.ellipse(mask, (cx, cy), axes, 0, 0, 360, 1.0, -1)
+        deteccoes.append((bbox, mask))
+    return deteccoes
+
+
+def overlay_denso(frame, mask, color):
+    """Caminho original: resize para o frame inteiro + addWeighted global"""
+    if mask.shape != frame.shape[:2]:
+        mask = cv2.resize(mask, (frame.shape[1], frame.shape[0]))
+    colored_mask = np.zeros_like(frame)
+    colored_mask[:, :] = color
+    mask_area = mask > 0.5
+    frame[mask_area] = cv2.addWeighted(frame, 0.7, colored_mask, 0.3, 0)[mask_area]
+    return frame
+
+
+def desenhar_todas(overlay, mascaras, frame, color):
+    """Aplica todas as máscaras sobre uma única cópia do frame"""
+    saida = frame.copy()
+    for mask in mascaras:
+        overlay(saida, mask, color)
+    return saida
+
+
+def medir(func, repeat):
+    """Tempo médio em milissegundos"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de representação de máscaras")
+    parser.add_argument('--detections', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    args = parser.parse_args()
+
+    frame_shape = (args.height, args.width)
+    mask_shape = (384, 640)
+    deteccoes = gerar_deteccoes(args.detections, frame_shape, mask_shape)
+    frame = np.full((args.height, args.width, 3), 127, dtype=np.uint8)
+    color = (0, 255, 0)
+
+    # Memória
+    densas = [mask for _, mask in deteccoes]
+    compactas = [CompactMask.from_dense(mask, bbox, frame_shape) for bbox, mask in deteccoes]
+    mem_densa = sum(m.nbytes for m in densas)
+    mem_densa_frame = args.detections * args.height * args.width * 4
+    mem_compacta = sum(m.nbytes for m in compactas)
+    mem_rle = sum(len(m.to_rle()) * 4 for m in compactas)
+
+    # Tempo
+    t_conversao = medir(lambda: [CompactMask.from_dense(m, b, frame_shape) for b, m in deteccoes], args.repeat)
+    t_overlay_denso = medir(lambda: desenhar_todas(overlay_denso, densas, frame, color), max(args.repeat // 4, 1))
+    t_overlay_compacto = medir(lambda: desenhar_todas(aplicar_mascara, compactas, frame, color), args.repeat)
+    t_area = medir(lambda: [m.area for m in compactas], args.repeat)
+
+    print(f"📐 Frame {args.width}x{args.height} | máscara nativa {mask_shape[1]}x{mask_shape[0]} | {args.detections} detecções")
+    print(f"💾 Densa float32 (nativa):      {mem_densa / 1e6:8.2f} MB")
+    print(f"💾 Densa float32 (frame):       {mem_densa_frame / 1e6:8.2f} MB")
+    print(f"💾 Compacta (bits na bbox):     {mem_compacta / 1e6:8.3f} MB")
+    print(f"💾 Compacta RLE (int32):        {mem_rle / 1e6:8.3f} MB")
+    print(f"⏱️ Conversão densa→compacta:    {t_conversao:8.2f} ms/frame")
+    print(f"⏱️ Overlay denso (original):    {t_overlay_denso:8.2f} ms/frame")
+    print(f"⏱️ Overlay compacto:            {t_overlay_compacto:8.2f} ms/frame")
+    print(f"⏱️ Área (popcount compacto):    {t_area:8.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+📊 Benchmark - Decodificação MJPEG
+Throughput de decodificação de um stream MJPEG gravado (sem câmera):
+thread única (como dentro do cap.read) vs pool de threads vs redução DCT
+
+Uso: python benchmarks/benchmark_mjpeg.py --input stream.mjpeg [--threads 1,2,4] [--reduce 1,2,4]
+     python benchmarks/benchmark_mjpeg.py --generate stream.mjpeg [--frames 300]
+
+Entradas aceitas: .mjpeg (JPEGs concatenados, ex.: ffmpeg -c:v copy -f mjpeg),
+.avi/.mkv com codec MJPG (lido sem decodificar) ou uma pasta de .jpg.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.mjpeg_decoder import MjpegDecoder, decodificar_jpeg
+
+
+def ler_mjpeg(path):
+    """Lista de frames JPEG (bytes) do arquivo/pasta"""
+    if os.path.isdir(path):
+        frames = []
+        for arquivo in sorted(glob.glob(os.path.join(path, '*.jpg'))):
+            with open(arquivo, 'rb') as f:
+                frames.append(f.read())
+        return frames
+
+    if os.path.splitext(path)[1].lower() in ('.avi', '.mkv', '.mov'):
+        # Pacotes comprimidos sem decodificar
+        cap = cv2.VideoCapture(path)
+        cap.set(cv2.CAP_PROP_FORMAT, -1)
+        frames = []
+        while True:
+            ret, packet = cap.read()
+            if not ret:
+                break
+            frames.append(packet.tobytes())
+        cap.release()
+        return frames
+
+    # JPEGs concatenados: separar por marcadores SOI/EOI
+    with open(path, 'rb') as f:
+        data = f.read()
+    frames = []
+    start = data.find(b'\xff\xd8')
+    while start >= 0:
+        end = data.find(b'\xff\xd9', start)
+        if end < 0:
+            break
+        frames.append(data[start:end + 2])
+        start = data.find(b'\xff\xd8', end + 2)
+    return frames
+
+
+def gerar_stream(path, frames, width, height, quality):
+    """Gera um stream sintético com textura e movimento (compressão realista)"""
+    rng = np.random.default_rng(0)
+    fundo = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    with open(path, 'wb') as f:
+        for i in range(frames):
+            frame = np.roll(fundo, i * 8, axis=1)
+            cv2.circle(frame, (width // 2, height // 2), 100 + (i % 50), (0, 0, 255), -1)
+            ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            f.write(jpeg.tobytes())
+    print(f"💾 {frames} frames {width}x{height} gravados em {path}")
+
+
+def medir(frames, threads, reduce, repeats):
+    """Frames por segundo decodificados e shape de saída"""
+    if threads == 0:
+        # Referência: decodificação sequencial na thread de captura
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for data in frames:
+                frame = decodificar_jpeg(data, reduce)
+        return len(frames) * repeats / (time.perf_counter() - start), frame.shape
+
+    decoder = MjpegDecoder(threads=threads, reduce=reduce)
+    try:
+        start = time.perf_counter()
+        ultimo = None
+        for _ in range(repeats):
+            for data in frames:
+                prontos = decoder.enviar(data)
+                ultimo = prontos[-1] if prontos else ultimo
+            prontos = decoder.drenar()
+            ultimo = prontos[-1] if prontos else ultimo
+        return len(frames) * repeats / (time.perf_counter() - start), ultimo.shape
+    finally:
+        decoder.encerrar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de decodificação MJPEG")
+    parser.add_argument('--input', help="Stream MJPEG gravado")
+    parser.add_argument('--generate', help="Gerar stream sintético neste caminho")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--quality', type=int, default=85)
+    parser.add_argument('--threads', default='1,2,4', help="Tamanhos de pool (0 = sequencial)")
+    parser.add_argument('--reduce', default='1,2,4')
+    parser.add_argument('--repeats', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.generate:
+        gerar_stream(args.generate, args.frames, args.width, args.height, args.quality)
+        if not args.input:
+            args.input = args.generate
+    if not args.input:
+        parser.error("informe --input ou --generate")
+
+    frames = ler_mjpeg(args.input)
+    if not frames:
+        print(f"❌ Nenhum frame JPEG em {args.input}")
+        return
+    tamanho_medio = sum(len(f) for f in frames) / len(frames) / 1024
+    print(f"🎞️ {len(frames)} frames, {tamanho_medio:.0f} KB/frame em média")
+
+    cv2.setNumThreads(1)
+    print(f"{'threads':>8} {'redução':>8} {'saída':>11} {'FPS':>8} {'speedup':>8}")
+    base = None
+    for reduce in (int(v) for v in args.reduce.split(',')):
+        for threads in [0] + [int(v) for v in args.threads.split(',')]:
+            fps, shape = medir(frames, threads, reduce, args.repeats)
+            base = base or fps
+            nome = 'seq' if threads == 0 else str(threads)
+            print(f"{nome:>8} {'1/' + str(reduce):>8} {f'{shape[1]}x{shape[0]}':>11} {fps:>8.1f} {fps / base:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+📊 Benchmark - API de Inferência
+Clientes concorrentes com conexões keep-alive contra o servidor local:
+latência, vazão e tamanho médio dos lotes formados pelo agendador
+
+Uso: python benchmarks/benchmark_server.py [--clients 1,4,8] [--requests 50] [--image foto.jpg]
+     python benchmarks/benchmark_server.py --url http://127.0.0.1:8765   (servidor já em execução)
+Sem --url, um servidor é iniciado neste processo em uma porta livre.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.config_manager import ConfigManager
+
+
+def cliente(host, port, corpo, headers, quantidade, latencias, tempos, erros):
+    """Uma conexão keep-alive enviando requisições em sequência"""
+    conexao = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        for _ in range(quantidade):
+            start = time.perf_counter()
+            conexao.request('POST', '/detect?format=json', body=corpo, headers=headers)
+            resposta = conexao.getresponse()
+            resposta.read()
+            latencias.append((time.perf_counter() - start) * 1000)
+            if resposta.status != 200:
+                erros.append(resposta.status)
+                continue
+            tempos.append((float(resposta.getheader('X-Queue-Ms', 0)),
+                           float(resposta.getheader('X-Inference-Ms', 0)),
+                           int(resposta.getheader('X-Batch-Size', 1))))
+    finally:
+        conexao.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da API HTTP de inferência")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--url', default=None, help="Servidor existente (padrão: iniciar um local)")
+    parser.add_argument('--image', default=None, help="Imagem enviada (padrão: sintética)")
+    parser.add_argument('--clients', default='1,4,8')
+    parser.add_argument('--requests', type=int, default=50, help="Requisições por cliente")
+    parser.add_argument('--raw', action='store_true', help="Enviar array bruto em vez de JPEG")
+    args = parser.parse_args()
+
+    servidor = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        from models.detection_model import DetectionModel
+        from models.inference_server import InferenceServer
+
+        config = ConfigManager(args.config)
+        detection_model = DetectionModel(config)
+        if detection_model.model is None:
+            print("❌ Modelo não carregado")
+            return
+        servidor = InferenceServer(detection_model, config, host='127.0.0.1', port=0)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        host, port = servidor.server_address[:2]
+        print(f"🌐 Servidor local em http://{host}:{port} (lote máx. {servidor.scheduler.max_batch}, "
+              f"janela {servidor.scheduler.max_latency * 1000:.0f} ms)")
+
+    frame = cv2.imread(args.image) if args.image else None
+    if frame is None:
+        frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    if args.raw:
+        corpo = frame.tobytes()
+        headers = {'Content-Type': 'application/octet-stream', 'X-Shape': ','.join(map(str, frame.shape))}
+    else:
+        corpo = cv2.imencode('.jpg', frame)[1].tobytes()
+        headers = {'Content-Type': 'image/jpeg'}
+
+    conexao = http.client.HTTPConnection(host, port, timeout=30)
+    conexao.request('GET', '/health')
+    print(f"🩺 {json.loads(conexao.getresponse().read())}")
+    conexao.close()
+
+    print(f"{'clientes':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'fila ms':>8} {'infer ms':>9} {'lote':>6} {'erros':>6}")
+    try:
+        for clientes in (int(v) for v in args.clients.split(',')):
+            latencias, tempos, erros = [], [], []
+            threads = [threading.Thread(target=cliente, args=(host, port, corpo, headers, args.requests,
+                                                              latencias, tempos, erros))
+                       for _ in range(clientes)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+            lat = np.array(latencias)
+            t = np.array(tempos) if tempos else np.zeros((1, 3))
+            print(f"{clientes:>8} {len(lat) / elapsed:>8.1f} {np.percentile(lat, 50):>8.1f} "
+                  f"{np.percentile(lat, 95):>8.1f} {t[:, 0].mean():>8.1f} {t[:, 1].mean():>9.1f} "
+                  f"{t[:, 2].mean():>6.2f} {len(erros):>6}")
+    finally:
+        if servidor is not None:
+            servidor.shutdown()
+            servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+📊 Benchmark - Stream Anotado
+Custo de CPU e frames entregues com N espectadores (MJPEG e WebSocket),
+incluindo clientes lentos: a codificação deve ficar constante
+
+Uso: python benchmarks/benchmark_stream.py [--viewers 0,1,4,16] [--slow 1] [--seconds 5]
+"""
+
+import argparse
+import base64
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.config_manager import ConfigManager
+from models.stream_server import StreamServer
+
+
+def espectador_mjpeg(host, port, stop, contagem, atraso):
+    """Lê o multipart e conta os JPEGs; 'atraso' simula cliente lento"""
+    with socket.create_connection((host, port)) as sock:
+        sock.sendall(b"GET /stream.mjpeg HTTP/1.1\r\nHost: local\r\n\r\n")
+        arquivo = sock.makefile('rb')
+        while not stop.is_set():
+            linha = arquivo.readline()
+            if not linha:
+                break
+            if linha.lower().startswith(b'content-length:'):
+                tamanho = int(linha.split(b':')[1])
+                arquivo.readline()
+                arquivo.read(tamanho)
+                contagem.append(1)
+                if atraso:
+                    time.sleep(atraso)
+
+
+def espectador_ws(host, port, stop, contagem, atraso):
+    """Handshake WebSocket mínimo e leitura de frames binários"""
+    with socket.create_connection((host, port)) as sock:
+        chave = base64.b64encode(os.urandom(16)).decode('ascii')
+        sock.sendall((f"GET /ws HTTP/1.1\r\nHost: local\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {chave}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode('ascii'))
+        arquivo = sock.makefile('rb')
+        while arquivo.readline() not in (b'\r\n', b''):
+            pass
+        while not stop.is_set():
+            header = arquivo.read(2)
+            if len(header) < 2:
+                break
+            tamanho = header[1] & 0x7F
+            if tamanho == 126:
+                tamanho = struct.unpack('!H', arquivo.read(2))[0]
+            elif tamanho == 127:
+                tamanho = struct.unpack('!Q', arquivo.read(8))[0]
+            arquivo.read(tamanho)
+            contagem.append(1)
+            if atraso:
+                time.sleep(atraso)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do stream anotado")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--viewers', default='0,1,4,16')
+    parser.add_argument('--slow', type=int, default=1, help="Espectadores lentos (0.5 s por frame) em cada rodada")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--fps', type=float, default=30.0, help="Taxa de publicação do pipeline")
+    args = parser.parse_args()
+
+    config = ConfigManager(args.config)
+    config.set('stream.host', '127.0.0.1')
+    config.set('stream.port', 0)
+    servidor = StreamServer(config)
+    servidor.iniciar()
+    host, port = servidor.server_address[:2]
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    frames = [np.roll(base, i * 16, axis=1) for i in range(8)]
+
+    print(f"{'espect.':>8} {'lentos':>7} {'codificados/s':>14} {'CPU %':>7} {'fps normal':>11} {'fps lento':>10}")
+    try:
+        for total in (int(v) for v in args.viewers.split(',')):
+            stop = threading.Event()
+            lentos = min(args.slow, total)
+            contagens = []
+            threads = []
+            for i in range(total):
+                contagem = []
+                contagens.append((contagem, i < lentos))
+                alvo = espectador_ws if i % 2 else espectador_mjpeg
+                threads.append(threading.Thread(target=alvo, args=(host, port, stop, contagem, 0.5 if i < lentos else 0),
+                                                daemon=True))
+            for thread in threads:
+                thread.start()
+            time.sleep(0.5)
+
+            codificados = servidor.broadcaster.codificados
+            for contagem, _ in contagens:
+                contagem.clear()
+            cpu = time.process_time()
+            start = time.perf_counter()
+            i = 0
+            while time.perf_counter() - start < args.seconds:
+                servidor.publicar(frames[i % len(frames)])
+                i += 1
+                time.sleep(1.0 / args.fps)
+            elapsed = time.perf_counter() - start
+            cpu = (time.process_time() - cpu) / elapsed * 100
+
+            taxa = (servidor.broadcaster.codificados - codificados) / elapsed
+            normais = [len(c) / elapsed for c, lento in contagens if not lento]
+            lentas = [len(c) / elapsed for c, lento in contagens if lento]
+            print(f"{total:>8} {lentos:>7} {taxa:>14.1f} {cpu:>7.1f} "
+                  f"{(np.mean(normais) if normais else 0):>11.1f} {(np.mean(lentas) if lentas else 0):>10.1f}")
+            stop.set()
+            for thread in threads:
+                thread.join(timeout=2.0)
+    finally:
+        servidor.encerrar()
+
+
+if __name__ == "__main__":
+    main()
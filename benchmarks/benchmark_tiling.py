@@ -0,0 +1,101 @@
+"""
+📊 Benchmark - Tiling
+Troca entre throughput e recall: inferência no frame inteiro vs em tiles
+
+Uso: python benchmarks/benchmark_tiling.py --images pasta/ [--labels pasta/] [--grids 1x1,2x2,2x3,3x4]
+Rótulos no formato YOLO (classe cx cy w h normalizados), um .txt por imagem.
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.box_ops import box_iou_matrix
+from models.config_manager import ConfigManager
+from models.detection_model import DetectionModel
+
+
+def carregar_rotulos(label_path, frame_shape):
+    """Boxes xyxy em pixels a partir de um .txt no formato YOLO"""
+    if not label_path or not os.path.exists(label_path):
+        return np.zeros((0, 4), dtype=np.float32)
+    dados = np.loadtxt(label_path, dtype=np.float32, ndmin=2)
+    if dados.size == 0:
+        return np.zeros((0, 4), dtype=np.float32)
+    h, w = frame_shape[:2]
+    cx, cy, bw, bh = dados[:, 1] * w, dados[:, 2] * h, dados[:, 3] * w, dados[:, 4] * h
+    return np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+
+
+def contar_acertos(detections, gt_boxes, iou_threshold=0.5):
+    """Quantidade de boxes de referência encontradas (IoU >= limite)"""
+    if len(gt_boxes) == 0 or not detections:
+        return 0
+    pred = np.array([d['bbox'] for d in detections], dtype=np.float32)
+    return int((box_iou_matrix(gt_boxes, pred).max(axis=1) >= iou_threshold).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inferência em tiles")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--images', required=True, help="Pasta com imagens")
+    parser.add_argument('--labels', default=None, help="Pasta com rótulos YOLO (.txt)")
+    parser.add_argument('--grids', default='1x1,2x2,2x3,3x4', help="Grades linhas x colunas")
+    parser.add_argument('--overlap', type=float, default=0.2)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+                   for p in glob.glob(os.path.join(args.images, ext)))
+    if not paths:
+        print(f"❌ Nenhuma imagem em {args.images}")
+        return
+
+    config = ConfigManager(args.config)
+    model = DetectionModel(config)
+    if model.model is None:
+        print("❌ Modelo não carregado")
+        return
+
+    frames = [cv2.imread(p) for p in paths]
+    rotulos = []
+    for path, frame in zip(paths, frames):
+        label_path = None
+        if args.labels:
+            label_path = os.path.join(args.labels, os.path.splitext(os.path.basename(path))[0] + '.txt')
+        rotulos.append(carregar_rotulos(label_path, frame.shape))
+    total_gt = sum(len(r) for r in rotulos)
+
+    print(f"🖼️ {len(frames)} imagens, {total_gt} objetos rotulados")
+    print(f"{'grade':>8} {'tiles':>6} {'ms/frame':>9} {'FPS':>7} {'detecções':>10} {'recall':>7}")
+
+    for grid in args.grids.split(','):
+        rows, cols = (int(v) for v in grid.lower().split('x'))
+        tiled = rows * cols > 1
+        config.set('tiling.enabled', tiled)
+        config.set('tiling.rows', rows)
+        config.set('tiling.cols', cols)
+        config.set('tiling.overlap', args.overlap)
+
+        model.inferir(frames[0])  # aquecimento
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            resultados = [model.inferir(frame) for frame in frames]
+        elapsed = (time.perf_counter() - start) / (args.repeats * len(frames))
+
+        detectados = sum(len(d) for d in resultados)
+        acertos = sum(contar_acertos(d, gt) for d, gt in zip(resultados, rotulos))
+        recall = f"{acertos / total_gt:.1%}" if total_gt else "-"
+        num_tiles = rows * cols + (1 if tiled and config.get('tiling.include_full_frame', True) else 0)
+        print(f"{grid:>8} {num_tiles:>6} {elapsed * 1000:>9.1f} {1 / elapsed:>7.1f} {detectados:>10} {recall:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+📊 Benchmark - Workers de Inferência
+Curva de throughput do InferencePool em função do número de processos
+
+Uso: python benchmarks/benchmark_workers.py [--max-workers 8] [--frames 120]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.config_manager import ConfigManager
+from models.inference_workers import InferencePool
+
+
+def medir_pool(config, num_workers, threads, frames, width, height):
+    """Frames por segundo sustentados com num_workers processos"""
+    pool = InferencePool(config, num_workers=num_workers, threads_per_worker=threads, slots_per_worker=2)
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    pool.start(frame.nbytes)
+    try:
+        if not pool.aguardar_prontos():
+            print(f"⚠️ Workers não ficaram prontos ({num_workers})")
+            return 0.0
+
+        # Aquecimento
+        concluidos = 0
+        enviados = 0
+        while concluidos < num_workers * 2:
+            if pool.submit(frame) is not None:
+                enviados += 1
+            concluidos += len(pool.coletar(timeout=0.01))
+
+        start = time.perf_counter()
+        concluidos = 0
+        while concluidos < frames:
+            pool.submit(frame)
+            concluidos += len(pool.coletar(timeout=0.001))
+        return frames / (time.perf_counter() - start)
+    finally:
+        pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de escalabilidade dos workers")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=1, help="Threads por worker")
+    parser.add_argument('--frames', type=int, default=120)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    args = parser.parse_args()
+
+    config = ConfigManager(args.config)
+    print(f"📐 {args.width}x{args.height}, {args.threads} thread(s) por worker, {args.frames} frames")
+    print(f"{'workers':>8} {'FPS':>8} {'speedup':>8} {'eficiência':>11}")
+
+    base = None
+    for num_workers in range(1, args.max_workers + 1):
+        fps = medir_pool(config, num_workers, args.threads, args.frames, args.width, args.height)
+        base = base or fps
+        speedup = fps / base if base else 0.0
+        print(f"{num_workers:>8} {fps:>8.1f} {speedup:>8.2f} {speedup / num_workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+📊 Simulação - Governador de Qualidade com Stride
+Conduz o governador por uma escada só de stride (pipeline.inference_stride),
+em tempo simulado, do mesmo jeito que o loop de atualização: frames
+reaproveitados não são medições, e o governador recebe só as latências dos
+frames inferidos. Verifica que o nível assenta e não volta ao anterior.
+
+Uso: python benchmarks/simulate_governor.py [--inference-ms 50,90,150,250] [--minutes 10]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.config_manager import ConfigManager
+from models.quality_governor import QualityGovernor
+from models.streaming_stats import StreamingStats
+
+
+def simular(config, inferencia_ms, anotacao_ms, camera_fps, minutos):
+    """Retorna (trocas [(instante, nível, mensagem)], nível final, descrição)"""
+    governor = QualityGovernor(config)
+    stats = StreamingStats(config)
+    ultima_medicao = 0
+    stride_index = 0
+    agora = 0.0
+
+    while agora < minutos * 60:
+        # _reaproveitar_deteccoes() do controller
+        stride = max(int(config.get('pipeline.inference_stride', 1)), 1)
+        stride_index = (stride_index + 1) % stride if stride > 1 else 0
+        if stride_index != 0:
+            agora += max(1.0 / camera_fps, anotacao_ms / 1000)
+            stats.registrar_exibicao(timestamp=agora)
+        else:
+            latencia = inferencia_ms + anotacao_ms
+            agora += max(1.0 / camera_fps, latencia / 1000)
+            stats.registrar([], latencia, timestamp=agora)
+
+        # _governar() do controller
+        latencia = None
+        if stats.medicoes != ultima_medicao:
+            ultima_medicao = stats.medicoes
+            latencia = stats.latencia_ms
+        mensagem = governor.observar(latencia, timestamp=agora)
+        if mensagem:
+            governor.mudancas[-1] = (agora, governor.nivel, mensagem)
+
+    governor.config.sobrepor('pipeline.inference_stride', None)
+    return list(governor.mudancas), governor.nivel, governor.descrever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulação do governador com escada de stride")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--inference-ms', default='50,90,150,250', help="Custo de inferência por frame (ms)")
+    parser.add_argument('--annotation-ms', type=float, default=4.0)
+    parser.add_argument('--camera-fps', type=float, default=30.0)
+    parser.add_argument('--target-fps', type=float, default=15.0)
+    parser.add_argument('--minutes', type=float, default=10.0, help="Tempo simulado por cenário")
+    args = parser.parse_args()
+
+    config = ConfigManager(args.config)
+    config.set('governor.enabled', True)
+    config.set('governor.target_fps', args.target_fps)
+    config.set('governor.inference_sizes', [])
+    config.set('governor.display_widths', [])
+    config.set('display.show_masks', False)
+    config.set('pipeline.inference_stride', 1)
+    config.set('pipeline.annotation_width', 0)
+
+    alvo = 1000.0 / args.target_fps
+    print(f"🎯 Alvo {alvo:.0f} ms/frame, escada: stride {config.get('governor.strides', [2, 3])}")
+    print(f"{'infer. ms':>10} {'trocas':>7} {'retornos':>9} {'nível':>6}  configuração final")
+    falhas = 0
+    for inferencia_ms in (float(v) for v in args.inference_ms.split(',')):
+        trocas, nivel, descricao = simular(config, inferencia_ms, args.annotation_ms,
+                                           args.camera_fps, args.minutes)
+        # Retorno: um nível abandonado e depois reaplicado (oscilação)
+        niveis = [0] + [n for _, n, _ in trocas]
+        retornos = sum(1 for i in range(2, len(niveis)) if niveis[i] == niveis[i - 2])
+        falhas += retornos
+        print(f"{inferencia_ms:>10.0f} {len(trocas):>7} {retornos:>9} {nivel:>6}  {descricao}")
+        for instante, _, mensagem in trocas:
+            print(f"{'':>12}{instante:7.1f} s  {mensagem}")
+
+    print(f"{'✅' if falhas == 0 else '❌'} Retornos a um nível abandonado: {falhas}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
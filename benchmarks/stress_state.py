@@ -0,0 +1,166 @@
+"""
+📊 Stress - Estado Compartilhado
+Alterna ajustes, resolução, thresholds e estado de execução em alta frequência
+enquanto frames fluem, e verifica que nenhum frame sai com ajustes misturados.
+
+Uso: python benchmarks/stress_state.py [--seconds 10] [--rate 2000] [--with-model]
+
+Os ajustes publicados são sempre (brilho=-k, contraste=1+k/50): a metade
+esquerda do frame sintético (valor 50) continua 50 em qualquer versão
+consistente; se brilho e contraste vierem de versões diferentes, não.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.app_state import AtomicState, LifecycleEvents, RuntimeState
+from models.camera_model import CameraModel
+from models.config_manager import ConfigManager
+
+RESOLUCOES = [(640, 480), (1280, 720), (1920, 1080)]
+
+
+class CapturaSintetica:
+    """Substitui cv2.VideoCapture: frames metade 50 / metade 150, resolução ajustável"""
+
+    def __init__(self, width=640, height=480):
+        self.width, self.height = width, height
+        self.opened = True
+        self.frames = {}
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self):
+        key = (self.width, self.height)
+        if key not in self.frames:
+            frame = np.full((self.height, self.width, 3), 150, dtype=np.uint8)
+            frame[:, :self.width // 2] = 50
+            self.frames[key] = frame
+        time.sleep(0.001)
+        return True, self.frames[key].copy()
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        return True
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.width, cv2.CAP_PROP_FRAME_HEIGHT: self.height}.get(prop, 0)
+
+    def release(self):
+        self.opened = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress test do estado compartilhado")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=int, default=2000, help="Alterações por segundo")
+    parser.add_argument('--with-model', action='store_true', help="Incluir inferência e troca de modelo")
+    args = parser.parse_args()
+
+    config = ConfigManager(args.config)
+    config.set('camera.fps_limit', 0)
+    events = LifecycleEvents()
+    state = AtomicState(RuntimeState(camera_running=True), events, 'state_changed')
+    transicoes = []
+    events.on('state_changed', lambda anterior, novo: transicoes.append(novo.version))
+
+    camera = CameraModel(config)
+    camera.cap = CapturaSintetica()
+    camera.is_running = True
+    camera.capture_thread = threading.Thread(target=camera._capture_loop, daemon=True)
+    camera.capture_thread.start()
+
+    detection_model = None
+    if args.with_model:
+        from models.detection_model import DetectionModel
+        detection_model = DetectionModel(config)
+
+    stop = threading.Event()
+    resultados = {'frames': 0, 'misturados': 0, 'formas': set(), 'erros': 0,
+                  'alteracoes': 0, 'trocas_modelo': 0, 'inferencias': 0}
+    formas_validas = {(h, w, 3) for w, h in RESOLUCOES}
+
+    def consumidor():
+        ultimo = None
+        while not stop.is_set():
+            estado = state.get()
+            frame = camera.get_frame()
+            if frame is None or frame is ultimo:
+                continue
+            ultimo = frame
+            try:
+                resultados['frames'] += 1
+                resultados['formas'].add(frame.shape)
+                if frame.shape not in formas_validas:
+                    resultados['erros'] += 1
+                if not np.all(frame[:, :frame.shape[1] // 2] == 50):
+                    resultados['misturados'] += 1
+                if detection_model is not None and estado.detection_running:
+                    detection_model.detectar(frame, output_size=(640, 360))
+                    resultados['inferencias'] += 1
+            except Exception as e:
+                resultados['erros'] += 1
+                print(f"❌ Erro no consumidor: {e}")
+
+    def alterador():
+        rng = random.Random(0)
+        intervalo = 1.0 / args.rate if args.rate > 0 else 0
+        while not stop.is_set():
+            k = rng.randint(0, 50)
+            acao = rng.random()
+            if acao < 0.6:
+                camera.atualizar_ajustes(brightness=-k, contrast=1 + k / 50, sharpness=0)
+            elif acao < 0.8:
+                config.set('model.confidence_threshold', rng.uniform(0.1, 0.9))
+                config.set('display.show_masks', rng.random() < 0.5)
+            elif acao < 0.9:
+                state.update(detection_running=not state.get().detection_running)
+            elif acao < 0.995:
+                camera.solicitar_resolucao(*rng.choice(RESOLUCOES))
+            elif detection_model is not None:
+                if detection_model.reload_model(forcar=True):
+                    resultados['trocas_modelo'] += 1
+            resultados['alteracoes'] += 1
+            if intervalo:
+                time.sleep(intervalo)
+
+    threads = [threading.Thread(target=consumidor, daemon=True),
+               threading.Thread(target=alterador, daemon=True)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=5.0)
+    elapsed = time.perf_counter() - start
+
+    camera.is_running = False
+    camera.capture_thread.join(timeout=2.0)
+
+    print(f"⏱️ {elapsed:.1f} s")
+    print(f"🔁 Alterações: {resultados['alteracoes']} ({resultados['alteracoes'] / elapsed:.0f}/s), "
+          f"transições de estado: {len(transicoes)}, trocas de modelo: {resultados['trocas_modelo']}")
+    print(f"🖼️ Frames: {resultados['frames']} ({resultados['frames'] / elapsed:.0f}/s), "
+          f"inferências: {resultados['inferencias']}, resoluções vistas: {len(resultados['formas'])}")
+    print(f"{'✅' if resultados['misturados'] == 0 else '❌'} Frames com ajustes misturados: {resultados['misturados']}")
+    print(f"{'✅' if resultados['erros'] == 0 else '❌'} Erros: {resultados['erros']}")
+    sys.exit(1 if resultados['misturados'] or resultados['erros'] else 0)
+
+
+if __name__ == "__main__":
+    main()
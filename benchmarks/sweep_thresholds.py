@@ -0,0 +1,240 @@
+"""
+📊 Varredura de Thresholds
+Roda o modelo uma única vez por imagem com confiança mínima, guarda as
+predições brutas (NMS praticamente desligado) em .npz e reaplica qualquer
+grade de confiança / IoU do NMS / área mínima com NMS e pareamento vetorizados.
+
+Uso: python benchmarks/sweep_thresholds.py --images pasta/ --labels pasta/
+       [--conf 0.05:0.95:0.05] [--iou 0.3,0.4,0.5,0.6,0.7] [--areas 0,100,400]
+       [--min-precision 0.9 | --beta 1.0] [--csv saida.csv] [--apply]
+Rótulos no formato YOLO (classe cx cy w h normalizados), um .txt por imagem.
+Com --apply os valores escolhidos são gravados no config via ConfigManager.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.box_ops import box_area, casar_deteccoes, nms
+from models.config_manager import ConfigManager
+from models.detection_model import DetectionModel
+from models.model_store import hash_arquivo
+
+
+def carregar_rotulos(label_path, frame_shape):
+    """(boxes xyxy em pixels, classes) a partir de um .txt no formato YOLO"""
+    vazio = (np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.int64))
+    if not label_path or not os.path.exists(label_path):
+        return vazio
+    dados = np.loadtxt(label_path, dtype=np.float32, ndmin=2)
+    if dados.size == 0:
+        return vazio
+    h, w = frame_shape[:2]
+    cx, cy, bw, bh = dados[:, 1] * w, dados[:, 2] * h, dados[:, 3] * w, dados[:, 4] * h
+    boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+    return boxes, dados[:, 0].astype(np.int64)
+
+
+def faixa(texto):
+    """'0.05:0.95:0.05' (início:fim:passo) ou lista '0.3,0.5'"""
+    if ':' in texto:
+        inicio, fim, passo = (float(v) for v in texto.split(':'))
+        return np.round(np.arange(inicio, fim + passo / 2, passo), 4)
+    return np.array([float(v) for v in texto.split(',')])
+
+
+def inferir_bruto(detection_model, config, paths, min_conf, max_det):
+    """Predições com confiança mínima e NMS em IoU 1.0 (só remove boxes idênticas)"""
+    boxes, scores, classes, offsets = [], [], [], [0]
+    for path in paths:
+        frame = cv2.imread(path)
+        input_frame, escala = detection_model._preparar_entrada(frame)
+        result = detection_model.model(
+            input_frame, conf=min_conf, iou=1.0, max_det=max_det,
+            imgsz=config.get('model.inference_size', 640), verbose=False
+        )[0]
+        quantidade = 0
+        if result.boxes is not None and len(result.boxes):
+            boxes.append(result.boxes.xyxy.cpu().numpy().astype(np.float32) * escala)
+            scores.append(result.boxes.conf.cpu().numpy().astype(np.float32))
+            classes.append(result.boxes.cls.cpu().numpy().astype(np.int16))
+            quantidade = len(scores[-1])
+        offsets.append(offsets[-1] + quantidade)
+    juntar = lambda partes, shape, dtype: np.concatenate(partes) if partes else np.zeros(shape, dtype=dtype)
+    return (juntar(boxes, (0, 4), np.float32), juntar(scores, 0, np.float32),
+            juntar(classes, 0, np.int16), np.asarray(offsets, dtype=np.int64))
+
+
+def carregar_cache(cache_path, meta, names):
+    """Predições em cache se geradas com o mesmo modelo/parâmetros/imagens"""
+    if not os.path.exists(cache_path):
+        return None
+    with np.load(cache_path, allow_pickle=False) as dados:
+        if json.loads(str(dados['meta'])) != meta or list(dados['names']) != names:
+            return None
+        return dados['boxes'], dados['scores'], dados['classes'], dados['offsets']
+
+
+def varrer(predicoes, rotulos, confs, ious, areas, match_iou, agnostic):
+    """Linhas (conf, iou, área, precisão, recall, TP, FP) para toda a grade"""
+    boxes, scores, classes, offsets = predicoes
+    total_gt = sum(len(gt) for gt, _ in rotulos)
+    linhas = []
+    for iou_t in ious:
+        # NMS uma vez por limiar de IoU: filtrar por confiança depois é equivalente
+        mantidos = []
+        for i, (gt_boxes, gt_classes) in enumerate(rotulos):
+            a, b = offsets[i], offsets[i + 1]
+            keep = nms(boxes[a:b], scores[a:b], iou_t, classes=None if agnostic else classes[a:b])
+            mantidos.append((boxes[a:b][keep], scores[a:b][keep], classes[a:b][keep]))
+
+        for min_area in areas:
+            todos_scores, todos_tp = [], []
+            for (p_boxes, p_scores, p_classes), (gt_boxes, gt_classes) in zip(mantidos, rotulos):
+                filtro = box_area(p_boxes) >= min_area
+                p_boxes, p_scores, p_classes = p_boxes[filtro], p_scores[filtro], p_classes[filtro]
+                todos_scores.append(p_scores)
+                todos_tp.append(casar_deteccoes(
+                    p_boxes, p_scores, gt_boxes, match_iou,
+                    None if agnostic else p_classes, None if agnostic else gt_classes
+                ))
+
+            # Curva P/R em prefixo: contagens para todos os limiares de confiança de uma vez
+            s = np.concatenate(todos_scores) if todos_scores else np.zeros(0, dtype=np.float32)
+            tp = np.concatenate(todos_tp) if todos_tp else np.zeros(0, dtype=bool)
+            ordem = np.argsort(-s, kind='stable')
+            s, cum_tp = s[ordem], np.cumsum(tp[ordem])
+            n = np.searchsorted(-s, -confs, side='right')
+            tps = cum_tp[np.maximum(n - 1, 0)] * (n > 0) if len(cum_tp) else np.zeros(len(confs), dtype=np.int64)
+            for conf, n_pred, n_tp in zip(confs, n, tps):
+                precisao = n_tp / n_pred if n_pred else 1.0
+                recall = n_tp / total_gt if total_gt else 0.0
+                linhas.append((float(conf), float(iou_t), float(min_area), precisao, recall, int(n_tp), int(n_pred - n_tp)))
+    return linhas
+
+
+def f_beta(precisao, recall, beta):
+    denom = beta * beta * precisao + recall
+    return (1 + beta * beta) * precisao * recall / denom if denom else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Varredura offline de thresholds")
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--images', required=True, help="Pasta com imagens")
+    parser.add_argument('--labels', required=True, help="Pasta com rótulos YOLO (.txt)")
+    parser.add_argument('--cache', default=None, help="Arquivo .npz de predições (padrão: na pasta de imagens)")
+    parser.add_argument('--min-conf', type=float, default=0.01)
+    parser.add_argument('--max-det', type=int, default=1000)
+    parser.add_argument('--conf', default='0.05:0.95:0.05')
+    parser.add_argument('--iou', default='0.3,0.4,0.5,0.6,0.7')
+    parser.add_argument('--areas', default='0', help="Áreas mínimas (px) da box")
+    parser.add_argument('--match-iou', type=float, default=0.5, help="IoU para contar acerto")
+    parser.add_argument('--agnostic', action='store_true', help="Ignorar classes no NMS e no pareamento")
+    parser.add_argument('--beta', type=float, default=1.0, help="Critério F-beta")
+    parser.add_argument('--min-precision', type=float, default=None, help="Maior recall com precisão >= valor")
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--csv', default=None, help="Salvar a grade completa em CSV")
+    parser.add_argument('--apply', action='store_true', help="Gravar os valores escolhidos no config")
+    args = parser.parse_args()
+
+    paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+                   for p in glob.glob(os.path.join(args.images, ext)))
+    if not paths:
+        print(f"❌ Nenhuma imagem em {args.images}")
+        return
+
+    config = ConfigManager(args.config)
+    names = [os.path.basename(p) for p in paths]
+    model_path = config.get('model.path')
+    meta = {
+        'model_hash': hash_arquivo(model_path) if model_path and os.path.exists(model_path) else None,
+        'imgsz': config.get('model.inference_size', 640),
+        'inference_width': config.get('pipeline.inference_width', 0),
+        'min_conf': args.min_conf,
+        'max_det': args.max_det,
+    }
+    cache_path = args.cache or os.path.join(args.images, '.predicoes_sweep.npz')
+
+    start = time.perf_counter()
+    predicoes = carregar_cache(cache_path, meta, names)
+    if predicoes is None:
+        detection_model = DetectionModel(config)
+        if detection_model.model is None:
+            print("❌ Modelo não carregado")
+            return
+        print(f"🤖 Inferência em {len(paths)} imagens (conf >= {args.min_conf})...")
+        predicoes = inferir_bruto(detection_model, config, paths, args.min_conf, args.max_det)
+        boxes, scores, classes, offsets = predicoes
+        np.savez_compressed(cache_path, boxes=boxes, scores=scores, classes=classes, offsets=offsets,
+                            names=np.array(names), meta=np.array(json.dumps(meta, sort_keys=True)))
+        print(f"💾 {len(scores)} predições em cache: {cache_path} ({time.perf_counter() - start:.1f} s)")
+    else:
+        print(f"📂 {len(predicoes[1])} predições lidas do cache: {cache_path}")
+
+    rotulos = []
+    for path in paths:
+        frame_shape = cv2.imread(path).shape
+        label_path = os.path.join(args.labels, os.path.splitext(os.path.basename(path))[0] + '.txt')
+        rotulos.append(carregar_rotulos(label_path, frame_shape))
+    total_gt = sum(len(gt) for gt, _ in rotulos)
+    if total_gt == 0:
+        print(f"❌ Nenhum objeto rotulado em {args.labels}")
+        return
+
+    confs, ious, areas = faixa(args.conf), faixa(args.iou), faixa(args.areas)
+    start = time.perf_counter()
+    linhas = varrer(predicoes, rotulos, confs, ious, areas, args.match_iou, args.agnostic)
+    print(f"⚡ {len(linhas)} combinações em {time.perf_counter() - start:.2f} s ({total_gt} objetos rotulados)")
+
+    if args.csv:
+        with open(args.csv, 'w', encoding='utf-8') as f:
+            f.write("conf,iou,min_area,precision,recall,tp,fp\n")
+            for linha in linhas:
+                f.write(','.join(f"{v:.4f}" if isinstance(v, float) else str(v) for v in linha) + '\n')
+
+    if args.min_precision is not None:
+        candidatas = [l for l in linhas if l[3] >= args.min_precision]
+        criterio = lambda l: (l[4], l[3])
+        titulo = f"recall (precisão >= {args.min_precision:.2f})"
+    else:
+        candidatas = linhas
+        criterio = lambda l: f_beta(l[3], l[4], args.beta)
+        titulo = f"F{args.beta:g}"
+    if not candidatas:
+        print("❌ Nenhuma combinação atende ao critério")
+        return
+    ranking = sorted(candidatas, key=criterio, reverse=True)
+
+    print(f"\nMelhores por {titulo}:")
+    print(f"{'conf':>6} {'iou':>6} {'área':>7} {'precisão':>9} {'recall':>7} {'F' + format(args.beta, 'g'):>6} {'TP':>6} {'FP':>6}")
+    for conf, iou_t, min_area, precisao, recall, tp, fp in ranking[:args.top]:
+        print(f"{conf:>6.2f} {iou_t:>6.2f} {min_area:>7.0f} {precisao:>9.3f} {recall:>7.3f} "
+              f"{f_beta(precisao, recall, args.beta):>6.3f} {tp:>6} {fp:>6}")
+
+    conf, iou_t, min_area = ranking[0][:3]
+    atual = (config.get('model.confidence_threshold'), config.get('model.iou_threshold'))
+    print(f"\n✅ Escolhido: conf={conf:.2f}, iou={iou_t:.2f}, área mínima={min_area:.0f} "
+          f"(atual: conf={atual[0]:.3f}, iou={atual[1]:.3f})")
+
+    if args.apply:
+        config.set('model.confidence_threshold', round(conf, 3))
+        config.set('model.iou_threshold', round(iou_t, 3))
+        if min_area > 0:
+            config.set('precision.area_filter', True)
+            config.set('precision.area_source', 'bbox')
+            config.set('precision.min_area_pixels', int(min_area))
+        if config.salvar_config():
+            print(f"💾 Valores gravados em {args.config}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Controlador principal da aplicação
 
 import threading
 import time
+import cv2
 from pathlib import Path
 import sys
 import os
@@ -15,21 +16,74 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from models.config_manager import ConfigManager
 from models.detection_model import DetectionModel
 from models.camera_model import CameraModel
+from models.inference_workers import InferencePool
+from models.autotune import calibrar, chave_perfil
+from models.quantization import quantizar_modelo
+from models.log_manager import configurar_logging, encerrar_logging, get_logger
+from models.app_state import AtomicState, LifecycleEvents, RuntimeState
+from models.recorder import ClipRecorder
+from models.stream_server import StreamServer
+from models.heatmap import OccupancyHeatmap
+from models.quality_governor import QualityGovernor
 from views.main_interface import MainInterface
 
+logger = get_logger('controller')
+
 class MainController:
     def __init__(self):
         # Inicializar models
         self.config_manager = ConfigManager()
+        configurar_logging(self.config_manager)
         self.camera_model = CameraModel(self.config_manager)
         self.detection_model = DetectionModel(self.config_manager)
         
-        # Estado da aplicação
-        self.camera_running = False
-        self.detection_running = False
+        # Estado da aplicação: snapshot imutável trocado atomicamente
+        # (a UI publica, o loop de atualização lê sem lock)
+        self.events = LifecycleEvents()
+        self.state = AtomicState(RuntimeState(), self.events, 'state_changed')
+        self.pool_stale = False
+        self.events.on('model_swapped', self._on_model_swapped)
         self.update_thread = None
         self.should_stop = False
         
+        # Último frame em resolução completa (usado apenas para snapshots)
+        self.last_frame = None
+        self.last_detections = []
+        
+        # Workers de inferência em processos separados (opcional)
+        self.inference_pool = None
+        self.pool_frames = {}
+        # Workers esgotaram as reinicializações: inferência no processo principal
+        # até o próximo pool (troca de modelo)
+        self.workers_falharam = False
+        
+        # Gravação de eventos (buffer pré-gatilho, escrita em segundo plano)
+        self.recorder = ClipRecorder(self.config_manager, anotar=self.detection_model.anotar)
+        
+        # Última consulta das estatísticas por janela (aba Estatísticas)
+        self.ultimo_resumo = 0.0
+        
+        # Governador de qualidade (sobreposições temporárias na configuração) e stride de inferência
+        self.governor = QualityGovernor(self.config_manager)
+        self.ultima_medicao = 0
+        self.stride_index = 0
+        
+        # Mapa de ocupação/permanência (memória fixa, atualizado a cada frame)
+        self.heatmap = OccupancyHeatmap(self.config_manager)
+        
+        # Transmissão remota do vídeo anotado (opcional)
+        self.streamer = None
+        if self.config_manager.get('stream.enabled', False):
+            try:
+                self.streamer = StreamServer(self.config_manager)
+                self.streamer.iniciar()
+            except OSError as e:
+                logger.error(f"❌ Stream não iniciado: {e}")
+        
+        # Calibração de desempenho / quantização em andamento
+        self.calibrating = False
+        self.quantizing = False
+        
         # Inicializar interface
         self.view = MainInterface(self)
         
@@ -39,6 +93,25 @@ class MainController:
         # Iniciar thread de atualização da interface
         self.start_update_thread()
         
+        # Calibração automática na primeira execução (máquina/modelo sem perfil)
+        if self.config_manager.get('autotune.run_on_first_start', False):
+            profiles = self.config_manager.get('autotune.profiles', {}) or {}
+            if chave_perfil(self.config_manager.get('model.path')) not in profiles:
+                self.run_calibration()
+        
+    @property
+    def camera_running(self):
+        return self.state.get().camera_running
+    
+    @property
+    def detection_running(self):
+        return self.state.get().detection_running
+    
+    def _on_model_swapped(self, **_):
+        """Workers carregam o modelo na criação: recriar o pool no próximo frame"""
+        self.pool_stale = True
+        self.workers_falharam = False
+    
     def start_update_thread(self):
         """Inicia thread para atualizar interface"""
         self.should_stop = False
@@ -49,53 +122,229 @@ class MainController:
         """Loop principal de atualização"""
         while not self.should_stop:
             try:
+                # Um snapshot do estado por iteração
+                estado = self.state.get()
+                
+                # O pool pertence a esta thread: encerrar aqui, nunca a partir da UI
+                if self.pool_stale:
+                    self.pool_stale = False
+                    self._parar_workers()
+                elif self.inference_pool is not None and not estado.detection_running:
+                    self._parar_workers()
+                
                 # Atualizar vídeo se câmera estiver ativa
-                if self.camera_running:
+                if estado.camera_running:
                     frame = self.camera_model.get_frame()
                     
                     if frame is not None:
                         processed_frame = frame
                         detections = []
                         
-                        # Aplicar detecção se ativa
-                        if self.detection_running:
-                            processed_frame, detections = self.detection_model.detectar(frame)
+                        # Aplicar detecção se ativa (anotação já na resolução de exibição)
+                        if estado.detection_running and not self.calibrating and self._reaproveitar_deteccoes():
+                            detections = self.last_detections
+                            processed_frame = self.detection_model.renderizar(
+                                frame, detections, self._tamanho_anotacao(frame), reaproveitado=True
+                            )
+                        elif estado.detection_running and self._workers_habilitados() and not self.calibrating:
+                            processed_frame, detections, frame = self._detectar_com_workers(frame)
+                        elif estado.detection_running and not self.calibrating:
+                            processed_frame, detections = self.detection_model.detectar(
+                                frame, output_size=self._tamanho_anotacao(frame)
+                            )
+                    
+                    # Workers ainda sem resultado pronto: manter o último frame exibido
+                    if frame is not None and processed_frame is not None:
+                        self.last_frame = frame
+                        self.last_detections = detections
+                        self.recorder.alimentar(frame, detections)
+                        
+                        if estado.detection_running and not self.calibrating:
+                            self._governar()
+                        
+                        if estado.detection_running and self.config_manager.get('heatmap.enabled', True):
+                            self.heatmap.atualizar(detections, frame.shape)
+                            if self.config_manager.get('display.show_heatmap', False):
+                                processed_frame = self.heatmap.renderizar(processed_frame)
                         
                         # Atualizar interface
                         self.view.update_video_display(processed_frame)
+                        if self.streamer is not None:
+                            self.streamer.publicar(processed_frame)
                         
                         # Atualizar estatísticas
                         fps = self.detection_model.get_fps()
                         det_count = len(detections)
                         
-                        self.view.update_status({
+                        status = {
                             'fps': fps,
                             'detections': det_count,
-                            'camera_status': 'Conectada' if self.camera_running else 'Desconectada'
-                        })
+                            'camera_status': 'Conectada' if estado.camera_running else 'Desconectada',
+                            'decode_factor': self.config_manager.get('camera.decode_factor') or 1
+                        }
+                        if detections:
+                            # Área real da máscara quando disponível, senão área da bbox (pixels da captura)
+                            areas = [d.get('mask_area', d['area']) for d in detections]
+                            status['area'] = sum(areas) / len(areas) * self.detection_model.escala_area()
+                        if estado.detection_running and not self._workers_habilitados():
+                            status['cache_hit_rate'] = (self.detection_model.get_cache_stats()['hit_rate']
+                                                        if self.config_manager.get('cache.enabled', False) else None)
+                        if estado.detection_running and self.config_manager.get('heatmap.enabled', True):
+                            status['heatmap'] = self.heatmap.get_stats()
+                        
+                        # Janelas 1 min / 15 min / turno (consulta limitada a stats.ui_refresh_ms)
+                        agora = time.monotonic()
+                        if agora - self.ultimo_resumo >= self.config_manager.get('stats.ui_refresh_ms', 500) / 1000:
+                            self.ultimo_resumo = agora
+                            status['windows'] = self.detection_model.stats.resumo()
+                            status['governor'] = self.governor.get_stats()
+                        
+                        self.view.update_status(status)
                 
                 # Atualizar botões
-                self.view.update_buttons(self.camera_running, self.detection_running)
+                self.view.update_buttons(estado.camera_running, estado.detection_running)
                 
                 time.sleep(0.03)  # ~30 FPS
                 
             except Exception as e:
-                print(f"❌ Erro no loop de atualização: {e}")
+                logger.error(f"❌ Erro no loop de atualização: {e}")
                 time.sleep(0.1)
     
+    def _tamanho_anotacao(self, frame):
+        """Resolução (w, h) em que o frame anotado é desenhado"""
+        annotation_width = self.config_manager.get('pipeline.annotation_width', 0)
+        if annotation_width:
+            h, w = frame.shape[:2]
+            if annotation_width >= w:
+                return None
+            return annotation_width, max(int(round(h * annotation_width / w)), 1)
+        return self.view.get_display_size(frame.shape)
+    
+    def _reaproveitar_deteccoes(self):
+        """
+        pipeline.inference_stride = N: inferir só 1 a cada N frames; nos demais,
+        redesenhar as últimas detecções no frame novo
+        """
+        stride = max(int(self.config_manager.get('pipeline.inference_stride', 1)), 1)
+        if stride == 1:
+            self.stride_index = 0
+            return False
+        self.stride_index = (self.stride_index + 1) % stride
+        return self.stride_index != 0
+    
+    def _governar(self):
+        """
+        Alimenta o governador só com latências novas (frames realmente inferidos,
+        por worker se houver pool); frames reaproveitados pelo stride ou pelo
+        cache não são medições
+        """
+        stats = self.detection_model.stats
+        latencia = None
+        if stats.medicoes != self.ultima_medicao:
+            self.ultima_medicao = stats.medicoes
+            latencia = stats.latencia_ms
+            if latencia is not None and self._workers_habilitados():
+                latencia /= max(self.config_manager.get('workers.count', 1), 1)
+        self.governor.observar(latencia)
+    
+    def toggle_governor(self, enabled):
+        """
+        Liga/desliga o governador de qualidade. Ao desligar, o loop de atualização
+        volta à configuração do usuário no próximo frame (o governador só é
+        alterado por aquela thread).
+        """
+        self.config_manager.set('governor.enabled', bool(enabled))
+        self._autosave()
+        alvo = self.config_manager.get('governor.target_fps', 15)
+        self.view.log_message(f"🎚️ Qualidade automática {'ativada' if enabled else 'desativada'} (alvo {alvo} FPS)")
+    
+    def _workers_habilitados(self):
+        """Verifica se a inferência deve rodar em processos separados"""
+        return self.config_manager.get('workers.count', 0) > 0 and not self.workers_falharam
+    
+    def _obter_pool(self, frame):
+        """Cria (ou recria para frames maiores) o pool de workers"""
+        pool = self.inference_pool
+        if pool is not None and frame.nbytes <= pool.slot_bytes:
+            return pool
+        
+        self._parar_workers()
+        pool = InferencePool(
+            self.config_manager,
+            num_workers=self.config_manager.get('workers.count', 2),
+            threads_per_worker=self.config_manager.get('workers.threads_per_worker', 0) or None,
+            slots_per_worker=self.config_manager.get('workers.slots_per_worker', 2),
+            pin_cpus=self.config_manager.get('workers.pin_cpus', False),
+            max_restarts=self.config_manager.get('workers.max_restarts', 3)
+        )
+        pool.start(frame.nbytes)
+        self.inference_pool = pool
+        self.view.log_message(f"🧵 {pool.num_workers} workers de inferência iniciados")
+        return pool
+    
+    def _parar_workers(self):
+        """Encerra o pool de workers, se ativo"""
+        if self.inference_pool is not None:
+            self.inference_pool.stop()
+            self.inference_pool = None
+        self.pool_frames = {}
+    
+    def _detectar_com_workers(self, frame):
+        """
+        Envia o frame aos workers e renderiza o próximo resultado em ordem.
+        Retorna (frame_anotado, detecções, frame_original) ou (None, [], None)
+        enquanto nenhum resultado estiver pronto.
+        """
+        pool = self._obter_pool(frame)
+        output_size = self._tamanho_anotacao(frame)
+        scale = self.detection_model.escala_saida(frame.shape, output_size)
+        
+        seq = pool.submit(frame, mask_scale=scale)
+        if seq is not None:
+            self.pool_frames[seq] = (frame, output_size)
+        
+        # Resultados chegam reordenados; exibir apenas o mais recente
+        ultimo = None
+        for seq, detections, elapsed in pool.coletar(timeout=0.005):
+            entrada = self.pool_frames.pop(seq, None)
+            if entrada is not None:
+                ultimo = (entrada, detections, elapsed)
+        
+        if ultimo is None and not pool.is_running():
+            # Todos os workers morreram e as reinicializações acabaram
+            self.view.log_message("❌ Workers de inferência encerrados; detecção no processo principal")
+            self.workers_falharam = True
+            self._parar_workers()
+            processed_frame, detections = self.detection_model.detectar(frame, output_size=output_size)
+            return processed_frame, detections, frame
+        
+        # Descartar frames cujo resultado foi perdido
+        for antigo in [s for s in self.pool_frames if s < pool.next_output]:
+            del self.pool_frames[antigo]
+        
+        if ultimo is None:
+            return None, [], None
+        
+        (frame_original, output_size), detections, elapsed = ultimo
+        annotated = self.detection_model.renderizar(frame_original, detections, output_size,
+                                                    latencia_ms=elapsed * 1000)
+        return annotated, detections, frame_original
+    
     # Métodos de controle da câmera
     def toggle_camera(self):
         """Liga/desliga câmera"""
         if not self.camera_running:
             if self.camera_model.start_camera():
-                self.camera_running = True
+                self.state.update(camera_running=True)
+                self.events.emit('camera_started')
                 self.view.log_message("📹 Câmera iniciada com sucesso")
             else:
                 self.view.log_message("❌ Falha ao iniciar câmera")
         else:
+            # Publicar a parada antes de liberar a câmera (o loop deixa de ler frames)
+            self.state.update(camera_running=False, detection_running=False)
             self.camera_model.stop_camera()
-            self.camera_running = False
-            self.detection_running = False
+            self.events.emit('camera_stopped')
             self.view.log_message("📹 Câmera parada")
     
     def change_camera(self, device_id):
@@ -110,74 +359,218 @@ class MainController:
         self.config_manager.set('camera.resolution_width', width)
         self.config_manager.set('camera.resolution_height', height)
         
-        # Reiniciar câmera se estiver ativa
-        if self.camera_running:
+        # Mapeamento das máscaras depende do tamanho do frame
+        self.detection_model.invalidar_cache_mascaras()
+        
+        if not self.camera_running:
+            self.events.emit('resolution_changed', width=width, height=height)
+            self.view.log_message(f"📐 Resolução alterada para {width}x{height}")
+            return
+        
+        # Aplicada pela thread de captura entre dois frames (sem reiniciar a câmera)
+        aplicada = self.camera_model.solicitar_resolucao(width, height)
+        if aplicada != (width, height):
+            # Driver não troca com a captura aberta: reabrir a câmera na resolução nova
             self.camera_model.stop_camera()
-            if self.camera_model.start_camera():
-                self.view.log_message(f"📐 Resolução alterada para {width}x{height}")
-            else:
-                self.view.log_message("❌ Falha ao aplicar nova resolução")
+            if not self.camera_model.start_camera():
+                self.state.update(camera_running=False, detection_running=False)
+                self.events.emit('camera_stopped')
+                self.view.log_message(f"❌ Falha ao reabrir a câmera em {width}x{height}")
+                return
+            info = self.camera_model.get_camera_info()
+            aplicada = (info['width'], info['height'])
+        
+        self.events.emit('resolution_changed', width=aplicada[0], height=aplicada[1])
+        if aplicada == (width, height):
+            self.view.log_message(f"📐 Resolução alterada para {width}x{height}")
+        else:
+            self.view.log_message(f"⚠️ Resolução pedida {width}x{height}; câmera usa {aplicada[0]}x{aplicada[1]}")
     
     # Métodos de controle da detecção
     def toggle_detection(self):
         """Liga/desliga detecção"""
         if not self.detection_running:
             if self.camera_running:
-                self.detection_running = True
+                self.state.update(detection_running=True)
+                self.events.emit('detection_started')
                 self.view.log_message("🎯 Detecção iniciada")
             else:
                 self.view.log_message("❌ Inicie a câmera antes da detecção")
         else:
-            self.detection_running = False
+            self.state.update(detection_running=False)
+            self.events.emit('detection_stopped')
             self.view.log_message("🎯 Detecção parada")
     
     def update_confidence(self, value):
         """Atualiza threshold de confiança"""
         self.config_manager.set('model.confidence_threshold', value)
-        self.view.log_message(f"🎯 Confiança atualizada: {value:.2f}")
+        self._autosave()
+        self.view.log_coalescido('confidence', f"🎯 Confiança atualizada: {value:.2f}")
     
     def update_iou(self, value):
         """Atualiza threshold IoU"""
         self.config_manager.set('model.iou_threshold', value)
-        self.view.log_message(f"📏 IoU atualizado: {value:.2f}")
+        self._autosave()
+        self.view.log_coalescido('iou', f"📏 IoU atualizado: {value:.2f}")
     
     def update_display_options(self, options):
         """Atualiza opções de visualização"""
         for key, value in options.items():
             self.config_manager.set(f'display.{key}', value)
+        self._autosave()
         self.view.log_message("👁️ Opções de visualização atualizadas")
     
     def update_brightness(self, value):
         """Atualiza brilho da imagem"""
         self.camera_model.update_brightness(value)
-        self.view.log_message(f"☀️ Brilho atualizado: {value:.0f}")
+        self._autosave()
+        self.view.log_coalescido('brightness', f"☀️ Brilho atualizado: {value:.0f}")
     
     def update_contrast(self, value):
         """Atualiza contraste da imagem"""
         self.camera_model.update_contrast(value)
-        self.view.log_message(f"🔆 Contraste atualizado: {value:.2f}")
+        self._autosave()
+        self.view.log_coalescido('contrast', f"🔆 Contraste atualizado: {value:.2f}")
     
     def update_sharpness(self, value):
         """Atualiza nitidez da imagem"""
         self.camera_model.update_sharpness(value)
-        self.view.log_message(f"🔍 Nitidez atualizada: {value:.1f}")
+        self._autosave()
+        self.view.log_coalescido('sharpness', f"🔍 Nitidez atualizada: {value:.1f}")
     
     def reset_image_settings(self):
         """Reseta configurações de imagem para valores padrão"""
-        self.camera_model.update_brightness(0)
-        self.camera_model.update_contrast(1.0)
-        self.camera_model.update_sharpness(0)
+        self.camera_model.atualizar_ajustes(brightness=0, contrast=1.0, sharpness=0)
+        self._autosave()
         self.view.log_message("🎨 Configurações de imagem resetadas")
     
+    def _autosave(self):
+        """Agenda a gravação das configurações (agrupada em segundo plano)"""
+        if self.config_manager.get('persistence.autosave', True):
+            self.config_manager.agendar_salvamento()
+    
+    def run_calibration(self):
+        """Calibra threads em segundo plano (detecção pausada enquanto mede)"""
+        if self.calibrating or self.detection_model.model is None:
+            return
+        
+        def _calibrar():
+            self.calibrating = True
+            self.view.log_message("⚙️ Calibração de desempenho iniciada...")
+            try:
+                # Um frame por inferência aqui: lotes só no modo servidor (--calibrate).
+                # Medir no frame atual da câmera: ruído não gera detecções nem máscaras
+                frame = self.last_frame
+                perfil = calibrar(self.detection_model, self.config_manager,
+                                  progress=self.view.log_message, batch_grid=[1],
+                                  frames=[frame] if frame is not None else None)
+                if perfil:
+                    self.view.log_message(
+                        f"⚙️ Melhor configuração: {perfil['threads']} threads "
+                        f"({perfil['latency_ms']:.1f} ms, {perfil['fps']:.1f} FPS)"
+                    )
+            except Exception as e:
+                self.view.log_message(f"❌ Erro na calibração: {e}")
+            finally:
+                self.calibrating = False
+        
+        threading.Thread(target=_calibrar, daemon=True).start()
+    
+    def run_quantization(self):
+        """Gera a variante INT8 em segundo plano e troca o modelo se aprovada na paridade"""
+        if self.quantizing:
+            return
+        
+        def _quantizar():
+            self.quantizing = True
+            try:
+                report = quantizar_modelo(self.config_manager, progress=self.view.log_message)
+                resumo = (f"recall {report['recall']:.3f}, IoU box {report['box_iou'] or 0:.3f}, "
+                          f"deriva conf {report['conf_drift'] or 0:.3f}")
+                if not report['approved']:
+                    self.view.log_message(f"❌ Modelo INT8 recusado ({report['reason']}): {resumo}")
+                    return
+                self.view.log_message(f"✅ Modelo INT8 aprovado em {report['seconds']} s: {resumo}")
+                
+                if self.config_manager.get('quantization.mode', 'off') != report['mode']:
+                    self.view.log_message(f"💡 Defina quantization.mode = \"{report['mode']}\" para usá-lo")
+                elif self.detection_model.reload_model(forcar=True):
+                    self.events.emit('model_swapped', model_version=self.detection_model.model_version)
+            except Exception as e:
+                self.view.log_message(f"❌ Erro na quantização: {e}")
+            finally:
+                self.quantizing = False
+        
+        threading.Thread(target=_quantizar, daemon=True).start()
+    
     def reload_model(self):
         """Recarrega o modelo"""
-        if self.detection_model.reload_model():
+        resultado = self.detection_model.reload_model()
+        if resultado:
+            self.events.emit('model_swapped', model_version=self.detection_model.model_version)
             model_path = self.config_manager.get('model.path', 'N/A')
             self.view.model_path_label.config(text=f"Modelo: {model_path}")
             self.view.log_message("🤖 Modelo recarregado com sucesso")
+        elif resultado is None:
+            self.view.log_message("ℹ️ Modelo inalterado (mesmo arquivo e opções); recarga ignorada")
         else:
             self.view.log_message("❌ Falha ao recarregar modelo")
     
+    def save_snapshot(self):
+        """Salva o último frame em resolução completa com as anotações"""
+        frame = self.last_frame
+        if frame is None:
+            self.view.log_message("❌ Nenhum frame disponível para snapshot")
+            return
+        
+        try:
+            snapshot_dir = self.config_manager.get('pipeline.snapshot_dir', './snapshots')
+            os.makedirs(snapshot_dir, exist_ok=True)
+            
+            annotated = self.detection_model.anotar(frame.copy(), self.last_detections)
+            filename = os.path.join(snapshot_dir, f"snapshot_{time.strftime('%Y%m%d_%H%M%S')}.jpg")
+            if cv2.imwrite(filename, annotated):
+                self.view.log_message(f"📸 Snapshot salvo: {filename}")
+            else:
+                self.view.log_message("❌ Falha ao salvar snapshot")
+        except Exception as e:
+            self.view.log_message(f"❌ Erro ao salvar snapshot: {e}")
+    
+    def trigger_recording(self):
+        """Dispara manualmente a gravação de um evento"""
+        if not self.config_manager.get('recorder.enabled', False):
+            self.view.log_message("❌ Gravação desativada (recorder.enabled)")
+            return
+        self.recorder.disparar('manual')
+        self.view.log_message("🎬 Gravação manual disparada")
+    
+    def export_heatmap(self):
+        """Exporta o mapa de ocupação como PNG sobre o último frame"""
+        try:
+            caminho = self.heatmap.exportar(fundo=self.last_frame)
+            if caminho:
+                self.view.log_message(f"🔥 Heatmap exportado: {caminho}")
+            else:
+                self.view.log_message("❌ Heatmap vazio (inicie a detecção) ou falha ao gravar")
+        except Exception as e:
+            self.view.log_message(f"❌ Erro ao exportar heatmap: {e}")
+    
+    def export_stats(self):
+        """Exporta as estatísticas por janela (1 min / 15 min / turno) em JSON"""
+        try:
+            pasta = self.config_manager.get('stats.export_dir', './stats')
+            os.makedirs(pasta, exist_ok=True)
+            caminho = os.path.join(pasta, f"stats_{time.strftime('%Y%m%d_%H%M%S')}.json")
+            self.detection_model.stats.exportar(caminho)
+            self.view.log_message(f"📈 Estatísticas exportadas: {caminho}")
+        except Exception as e:
+            self.view.log_message(f"❌ Erro ao exportar estatísticas: {e}")
+    
+    def reset_heatmap(self):
+        """Zera o mapa de ocupação"""
+        self.heatmap.resetar()
+        self.view.log_message("🔥 Heatmap zerado")
+    
     # Métodos de configuração
     def save_config(self):
         """Salva configurações"""
@@ -198,14 +591,22 @@ class MainController:
     def cleanup(self):
         """Limpa recursos antes de fechar"""
         self.should_stop = True
+        self.state.update(camera_running=False, detection_running=False)
         
-        if self.camera_running:
-            self.camera_model.stop_camera()
+        # Aguardar o loop de atualização antes de liberar câmera e workers
+        if self.update_thread and self.update_thread.is_alive() and self.update_thread is not threading.current_thread():
+            self.update_thread.join(timeout=2.0)
+        
+        self.camera_model.stop_camera()
+        self._parar_workers()
+        self.recorder.encerrar()
+        if self.streamer is not None:
+            self.streamer.encerrar()
         
-        # Salvar configurações automaticamente
-        self.config_manager.salvar_config()
+        # Gravação final, depois de qualquer gravação em segundo plano em andamento
+        self.config_manager.parar()
         
-        print("🧹 Recursos limpos com sucesso")
+        logger.info("🧹 Recursos limpos com sucesso")
     
     def run(self):
         """Executa a aplicação"""
@@ -217,9 +618,10 @@ class MainController:
         except KeyboardInterrupt:
             print("\n⏹️ Interrompido pelo usuário")
         except Exception as e:
-            print(f"❌ Erro na execução: {e}")
+            logger.error(f"❌ Erro na execução: {e}")
         finally:
             self.cleanup()
+            encerrar_logging()
 
 def main():
     """Função principal"""
@@ -0,0 +1,46 @@
+"""
+🌐 Server Controller - CONTROLLER
+Modo servidor: API HTTP local de inferência, sem interface gráfica
+"""
+
+import sys
+import os
+
+# Adicionar diretórios aos paths
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from models.autotune import calibrar
+from models.config_manager import ConfigManager
+from models.detection_model import DetectionModel
+from models.inference_server import InferenceServer
+from models.log_manager import configurar_logging, encerrar_logging, get_logger
+
+logger = get_logger('server')
+
+
+class ServerController:
+    def __init__(self, host=None, port=None, config_path="config.json", calibrate=False):
+        self.config_manager = ConfigManager(config_path)
+        configurar_logging(self.config_manager)
+        self.detection_model = DetectionModel(self.config_manager)
+        if calibrate and self.detection_model.model is not None:
+            # Threads x lote (autotune.batch_grid): o lote calibrado vira o server.max_batch padrão
+            calibrar(self.detection_model, self.config_manager, goal='throughput', progress=logger.info)
+        self.server = InferenceServer(self.detection_model, self.config_manager, host=host, port=port)
+
+    def run(self):
+        """Atende requisições até Ctrl+C"""
+        host, port = self.server.server_address[:2]
+        if self.detection_model.model is None:
+            logger.warning("⚠️ Servidor iniciado sem modelo carregado")
+        logger.info(f"🌐 API de inferência em http://{host}:{port} (POST /detect, GET /health)")
+
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n⏹️ Interrompido pelo usuário")
+        finally:
+            self.server.server_close()
+            stats = self.server.scheduler.get_stats()
+            logger.info(f"🌐 Servidor encerrado: {stats['requests']} requisições em {stats['batches']} lotes")
+            encerrar_logging()
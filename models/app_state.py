@@ -0,0 +1,100 @@
+"""
+🔒 App State - MODEL
+Estado compartilhado entre threads: snapshots imutáveis versionados e eventos de ciclo de vida
+"""
+
+import dataclasses
+import threading
+from dataclasses import dataclass
+
+from models.log_manager import get_logger
+
+logger = get_logger('state')
+
+
+@dataclass(frozen=True)
+class ImageSettings:
+    """Ajustes de imagem aplicados pela thread de captura"""
+    brightness: float = 0
+    contrast: float = 1.0
+    sharpness: float = 0
+    version: int = 0
+
+
+@dataclass(frozen=True)
+class RuntimeState:
+    """Estado de execução da aplicação (câmera e detecção)"""
+    camera_running: bool = False
+    detection_running: bool = False
+    version: int = 0
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Cópia imutável das configurações em uma versão"""
+    version: int
+    data: dict
+
+    def get(self, key_path, default=None):
+        """Busca valor por caminho (ex: 'model.confidence_threshold')"""
+        value = self.data
+        try:
+            for key in key_path.split('.'):
+                value = value[key]
+            return value
+        except (KeyError, TypeError):
+            return default
+
+
+class AtomicState:
+    """
+    Referência para um dataclass imutável, trocada atomicamente.
+    Leitores chamam get() sem lock e recebem um snapshot consistente;
+    escritores são serializados e cada alteração incrementa a versão.
+    """
+
+    def __init__(self, initial, events=None, event_name=None):
+        self._value = initial
+        self._write_lock = threading.Lock()
+        self.events = events
+        self.event_name = event_name
+
+    def get(self):
+        """Snapshot atual (leitura de uma referência, sem lock)"""
+        return self._value
+
+    def update(self, **changes):
+        """Publica um novo snapshot com as alterações; retorna (anterior, novo)"""
+        with self._write_lock:
+            anterior = self._value
+            novo = dataclasses.replace(anterior, version=anterior.version + 1, **changes)
+            self._value = novo
+        if self.events is not None and self.event_name:
+            self.events.emit(self.event_name, anterior=anterior, novo=novo)
+        return anterior, novo
+
+
+class LifecycleEvents:
+    """Barramento simples de eventos (camera_started, detection_stopped, model_swapped...)"""
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def on(self, event, callback):
+        """Registra um callback para o evento"""
+        with self._lock:
+            self._listeners[event] = self._listeners.get(event, ()) + (callback,)
+
+    def off(self, event, callback):
+        """Remove um callback registrado"""
+        with self._lock:
+            self._listeners[event] = tuple(c for c in self._listeners.get(event, ()) if c is not callback)
+
+    def emit(self, event, **data):
+        """Chama os callbacks na thread atual; erros não interrompem os demais"""
+        for callback in self._listeners.get(event, ()):
+            try:
+                callback(**data)
+            except Exception as e:
+                logger.error(f"❌ Erro no evento {event}: {e}")
@@ -0,0 +1,159 @@
+"""
+⚙️ Autotune - MODEL
+Calibração de threads do PyTorch e tamanho de lote para a máquina atual
+"""
+
+import hashlib
+import os
+import platform
+import time
+
+import numpy as np
+
+from models.log_manager import get_logger
+from models.model_store import hash_arquivo
+
+logger = get_logger('autotune')
+
+
+def fingerprint_maquina():
+    """Identificador curto da máquina (CPU, núcleos, versão do torch)"""
+    try:
+        import torch
+        torch_version = torch.__version__
+        cuda = torch.cuda.is_available() if hasattr(torch, 'cuda') else False
+    except ImportError:
+        torch_version, cuda = 'none', False
+
+    dados = '|'.join([
+        platform.system(), platform.machine(), platform.processor(),
+        str(os.cpu_count()), torch_version, str(cuda)
+    ])
+    return hashlib.sha1(dados.encode('utf-8')).hexdigest()[:12]
+
+
+def chave_perfil(model_path):
+    """Chave do perfil: fingerprint da máquina + hash do modelo"""
+    model_hash = hash_arquivo(model_path)[:16] if model_path and os.path.exists(model_path) else 'nomodel'
+    return f"{fingerprint_maquina()}:{model_hash}"
+
+
+def aplicar_calibracao(config, model_path, aplicar_threads=True):
+    """
+    Aplica o perfil salvo (se houver) e retorna o tamanho de lote calibrado.
+    aplicar_threads=False mantém as threads já fixadas pelo processo (workers).
+    """
+    try:
+        perfil = (config.get('autotune.profiles', {}) or {}).get(chave_perfil(model_path))
+    except Exception as e:
+        logger.warning(f"⚠️ Perfil de calibração indisponível: {e}")
+        perfil = None
+    if not perfil:
+        return 1
+
+    if not aplicar_threads:
+        return int(perfil.get('batch_size', 1))
+
+    try:
+        import torch
+        torch.set_num_threads(int(perfil['threads']))
+        if perfil.get('interop_threads'):
+            try:
+                # Só pode ser definido antes do primeiro trabalho paralelo
+                torch.set_num_interop_threads(int(perfil['interop_threads']))
+            except RuntimeError:
+                pass
+    except ImportError:
+        pass
+
+    logger.info(f"⚙️ Calibração aplicada: {perfil['threads']} threads, lote {perfil['batch_size']}")
+    return int(perfil.get('batch_size', 1))
+
+
+def calibrar(detection_model, config, goal=None, progress=None, batch_grid=None, frames=None):
+    """
+    Mede inferir_lote() em uma grade de threads x tamanho de lote e salva o
+    melhor perfil no config.
+
+    goal: 'latency' (menor tempo por lote) ou 'throughput' (maior FPS
+    respeitando autotune.target_latency_ms).
+    batch_grid: lotes medidos (padrão autotune.batch_grid). A interface passa
+    [1]: o vídeo ao vivo infere um frame por vez, só o servidor forma lotes.
+    frames: frames representativos (ex.: o último da câmera). Sem eles, usa
+    quantization.calibration_dir; ruído sintético só em último caso, pois não
+    gera detecções e deixa de fora máscaras, geometria e NMS.
+    """
+    import torch
+
+    goal = goal or config.get('autotune.goal', 'latency')
+    target_latency = config.get('autotune.target_latency_ms', 0)
+    repeats = max(int(config.get('autotune.repeats', 5)), 1)
+    cpu_count = os.cpu_count() or 1
+    thread_grid = config.get('autotune.thread_grid') or sorted({1, 2, 4, 8, 16, cpu_count} & set(range(1, cpu_count + 1)))
+    batch_grid = batch_grid or config.get('autotune.batch_grid') or [1, 2, 4]
+
+    frames, origem = _frames_calibracao(config, frames, max(batch_grid))
+    if origem == 'synthetic':
+        aviso = ("⚠️ Calibração com frames sintéticos (sem detecções): máscaras e NMS não entram na medição; "
+                 "coloque imagens em quantization.calibration_dir")
+        logger.warning(aviso)
+        if progress:
+            progress(aviso)
+
+    threads_originais = torch.get_num_threads()
+    medicoes = []
+    try:
+        for threads in thread_grid:
+            detection_model.definir_threads(threads)
+            for batch_size in batch_grid:
+                lote = [frames[i % len(frames)] for i in range(batch_size)]
+                detection_model.inferir_lote(lote)  # aquecimento
+
+                start = time.perf_counter()
+                for _ in range(repeats):
+                    detection_model.inferir_lote(lote)
+                latency = (time.perf_counter() - start) / repeats * 1000
+                fps = batch_size * 1000 / latency
+
+                medicoes.append({'threads': threads, 'batch_size': batch_size,
+                                 'latency_ms': round(latency, 2), 'fps': round(fps, 2)})
+                if progress:
+                    progress(f"⚙️ {threads} threads, lote {batch_size}: {latency:.1f} ms ({fps:.1f} FPS)")
+    finally:
+        detection_model.definir_threads(threads_originais)
+
+    if not medicoes:
+        return None
+
+    if goal == 'throughput':
+        candidatos = [m for m in medicoes if not target_latency or m['latency_ms'] <= target_latency]
+        melhor = max(candidatos or medicoes, key=lambda m: m['fps'])
+    else:
+        melhor = min(medicoes, key=lambda m: (m['latency_ms'], m['batch_size']))
+
+    perfil = dict(melhor, goal=goal, frames=origem, timestamp=time.strftime('%Y-%m-%d %H:%M:%S'))
+    profiles = dict(config.get('autotune.profiles', {}) or {})
+    profiles[chave_perfil(config.get('model.path'))] = perfil
+    config.set('autotune.profiles', profiles)
+    config.salvar_config()
+
+    # Aplicar imediatamente (torch e, no modelo INT8, ONNX Runtime)
+    detection_model.definir_threads(perfil['threads'])
+    detection_model.batch_size = perfil['batch_size']
+    return perfil
+
+
+def _frames_calibracao(config, frames, quantidade):
+    """(frames, origem): os recebidos, os de quantization.calibration_dir ou ruído sintético"""
+    if frames:
+        return list(frames), 'camera'
+
+    from models.quantization import carregar_frames_calibracao
+    frames = carregar_frames_calibracao(config.get('quantization.calibration_dir', './calibracao'), quantidade)
+    if frames:
+        return frames, 'calibration_dir'
+
+    width = config.get('camera.resolution_width', 640)
+    height = config.get('camera.resolution_height', 480)
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(quantidade)], 'synthetic'
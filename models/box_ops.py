@@ -0,0 +1,115 @@
+"""
+📦 Box Ops - MODEL
+Operações vetorizadas com bounding boxes (IoU em matriz e NMS)
+"""
+
+import numpy as np
+
+
+def box_area(boxes):
+    """Área de cada box (N, 4) no formato xyxy"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def box_intersection(a, b):
+    """Matriz (N, M) de áreas de interseção"""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    return np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+
+def box_iou_matrix(a, b, metric='iou'):
+    """
+    Matriz (N, M) de sobreposição entre dois conjuntos de boxes.
+    metric='iou' (interseção/união) ou 'ios' (interseção/menor área).
+    """
+    inter = box_intersection(a, b)
+    area_a = box_area(a)[:, None]
+    area_b = box_area(b)[None, :]
+    if metric == 'ios':
+        denom = np.minimum(area_a, area_b)
+    else:
+        denom = area_a + area_b - inter
+    return inter / np.maximum(denom, 1e-9)
+
+
+def nms(boxes, scores, iou_threshold, classes=None, metric='iou', method='greedy'):
+    """
+    Non-maximum suppression. Retorna índices mantidos, por score decrescente.
+
+    classes: se informado, só suprime boxes da mesma classe
+    method='greedy': NMS clássico (uma linha da matriz por box mantida)
+    method='fast': Fast NMS, totalmente em matriz (pode suprimir um pouco mais)
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind='stable')
+    boxes = boxes[order]
+    if classes is not None:
+        # Deslocar classes diferentes para regiões disjuntas
+        classes = np.asarray(classes).reshape(-1)[order]
+        offset = (boxes.max() + 1) * classes.astype(np.float32)
+        boxes = boxes + offset[:, None]
+
+    overlap = box_iou_matrix(boxes, boxes, metric=metric)
+    return order[suprimir(overlap, iou_threshold, method=method)]
+
+
+def suprimir(overlap, threshold, method='greedy'):
+    """
+    Supressão sobre uma matriz de sobreposição (N, N) já ordenada por score
+    decrescente. Retorna os índices (na ordem da matriz) mantidos.
+    """
+    n = len(overlap)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if method == 'fast':
+        # Mantém a box se nenhuma de score maior a sobrepõe acima do limite
+        overlap = np.triu(overlap, k=1)
+        return np.flatnonzero(overlap.max(axis=0) <= threshold)
+
+    suppressed = np.zeros(n, dtype=bool)
+    keep = []
+    for i in range(n):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        suppressed |= overlap[i] > threshold
+    return np.asarray(keep, dtype=np.int64)
+
+
+def casar_deteccoes(pred_boxes, pred_scores, gt_boxes, iou_threshold=0.5, pred_classes=None, gt_classes=None):
+    """
+    Pareamento guloso predição -> referência por score decrescente (critério do mAP).
+    Retorna um vetor booleano (na ordem de entrada) com os verdadeiros positivos.
+    O status de cada predição depende só das de score maior, então o resultado
+    para scores >= c é o mesmo que filtrar antes e casar de novo.
+    """
+    pred_boxes = np.asarray(pred_boxes, dtype=np.float32).reshape(-1, 4)
+    gt_boxes = np.asarray(gt_boxes, dtype=np.float32).reshape(-1, 4)
+    tp = np.zeros(len(pred_boxes), dtype=bool)
+    if len(pred_boxes) == 0 or len(gt_boxes) == 0:
+        return tp
+
+    overlap = box_iou_matrix(pred_boxes, gt_boxes)
+    if pred_classes is not None and gt_classes is not None:
+        overlap[np.asarray(pred_classes)[:, None] != np.asarray(gt_classes)[None, :]] = 0.0
+    overlap[overlap < iou_threshold] = 0.0
+
+    usados = np.zeros(len(gt_boxes), dtype=bool)
+    for i in np.argsort(-np.asarray(pred_scores, dtype=np.float32), kind='stable'):
+        candidatos = np.where(usados, 0.0, overlap[i])
+        j = int(candidatos.argmax())
+        if candidatos[j] > 0:
+            tp[i] = True
+            usados[j] = True
+    return tp
@@ -8,6 +8,26 @@ import threading
 import time
 import numpy as np
 
+from models.app_state import AtomicState, ImageSettings
+from models.log_manager import get_logger
+from models.mjpeg_decoder import MjpegDecoder, fator_reducao
+
+logger = get_logger('camera')
+
+
+class PedidoResolucao:
+    """Troca de resolução pedida pela UI e o tamanho que a câmera de fato entregou"""
+    
+    def __init__(self, width, height):
+        self.tamanho = (int(width), int(height))
+        self.aplicado = None
+        self.pronto = threading.Event()
+    
+    def concluir(self, aplicado):
+        self.aplicado = aplicado
+        self.pronto.set()
+
+
 class CameraModel:
     def __init__(self, config_manager):
         self.config = config_manager
@@ -17,10 +37,30 @@ class CameraModel:
         self.capture_thread = None
         self.frame_lock = threading.Lock()
         
-        # Configurações de imagem
-        self.brightness = self.config.get('camera.brightness', 0)
-        self.contrast = self.config.get('camera.contrast', 1.0)
-        self.sharpness = self.config.get('camera.sharpness', 0)
+        # Configurações de imagem (snapshot imutável lido uma vez por frame)
+        self.image_settings = AtomicState(ImageSettings(
+            brightness=self.config.get('camera.brightness', 0),
+            contrast=self.config.get('camera.contrast', 1.0),
+            sharpness=self.config.get('camera.sharpness', 0)
+        ))
+        
+        # Resolução pedida pela UI, aplicada pela própria thread de captura
+        self.pending_resolution = None
+        
+        # Modo MJPEG: bytes comprimidos lidos na captura e decodificados em pool
+        self.mjpeg_raw = False
+        
+    @property
+    def brightness(self):
+        return self.image_settings.get().brightness
+    
+    @property
+    def contrast(self):
+        return self.image_settings.get().contrast
+    
+    @property
+    def sharpness(self):
+        return self.image_settings.get().sharpness
         
     def start_camera(self):
         """Inicia captura da câmera"""
@@ -29,9 +69,16 @@ class CameraModel:
             self.cap = cv2.VideoCapture(device_id)
             
             if not self.cap.isOpened():
-                print(f"❌ Não foi possível abrir a câmera {device_id}")
+                logger.error(f"❌ Não foi possível abrir a câmera {device_id}")
                 return False
             
+            # Pedir MJPEG antes da resolução (muitas câmeras USB só entregam 1080p30 assim)
+            self.mjpeg_raw = False
+            if self.config.get('camera.capture_mode', 'default') == 'mjpeg':
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+                # Sem conversão: read() devolve os bytes JPEG (se o backend suportar)
+                self.mjpeg_raw = bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+            
             # Configurar resolução
             width = self.config.get('camera.resolution_width', 640)
             height = self.config.get('camera.resolution_height', 480)
@@ -46,11 +93,11 @@ class CameraModel:
             self.capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
             self.capture_thread.start()
             
-            print(f"✅ Câmera iniciada - {width}x{height} @ {fps_limit}fps")
+            logger.info(f"✅ Câmera iniciada - {width}x{height} @ {fps_limit}fps")
             return True
             
         except Exception as e:
-            print(f"❌ Erro ao iniciar câmera: {e}")
+            logger.error(f"❌ Erro ao iniciar câmera: {e}")
             return False
     
     def stop_camera(self):
@@ -67,25 +114,93 @@ class CameraModel:
         with self.frame_lock:
             self.current_frame = None
         
-        print("📹 Câmera parada")
+        logger.info("📹 Câmera parada")
     
     def _capture_loop(self):
         """Loop de captura em thread separada"""
         fps_limit = self.config.get('camera.fps_limit', 30)
         frame_time = 1.0 / fps_limit if fps_limit > 0 else 0
         
-        while self.is_running and self.cap and self.cap.isOpened():
+        cap = self.cap
+        decoder = None
+        if self.mjpeg_raw:
+            decoder = MjpegDecoder(
+                threads=self.config.get('camera.decode_threads', 2),
+                reduce=self._fator_decodificacao(cap),
+                pos_processar=self._apply_image_adjustments
+            )
+            logger.info(f"🗜️ Captura MJPEG: {decoder.threads} threads de decodificação, redução 1/{decoder.reduce}")
+            self._publicar_fator(decoder.reduce)
+        
+        try:
+            self._loop_captura(cap, decoder, frame_time)
+        finally:
+            if decoder is not None:
+                decoder.encerrar()
+                self._publicar_fator(1)
+    
+    def _fator_decodificacao(self, cap):
+        """Redução na decodificação: camera.decode_reduce (1, 2, 4, 8 ou 'auto')"""
+        reduce = self.config.get('camera.decode_reduce', 1)
+        if reduce == 'auto':
+            # Menor resolução que ainda atende inferência e exibição
+            target = max(self.config.get('pipeline.inference_width', 640),
+                         self.config.get('pipeline.display_width', 0) or 0)
+            return fator_reducao(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), target)
+        return int(reduce) if int(reduce) in (1, 2, 4, 8) else 1
+    
+    def _publicar_fator(self, fator):
+        """
+        Frames decodificados com redução ficam 1/fator do tamanho capturado.
+        camera.decode_factor (sobreposição temporária, também vista pelos
+        workers) permite converter áreas de volta para pixels da captura.
+        """
+        fator = int(fator) if fator and int(fator) > 1 else None
+        if self.config.get('camera.decode_factor') != fator:
+            self.config.sobrepor('camera.decode_factor', fator)
+    
+    def _tamanho_entregue(self, cap, frame):
+        """(w, h) do frame lido; bytes MJPEG ainda não decodificados usam o que o backend informa"""
+        if frame is not None and frame.ndim == 3:
+            return frame.shape[1], frame.shape[0]
+        return int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    
+    def _publicar_frame(self, frame):
+        """Torna o frame processado visível para get_frame()"""
+        with self.frame_lock:
+            self.current_frame = frame
+    
+    def _loop_captura(self, cap, decoder, frame_time):
+        while self.is_running and cap.isOpened():
             start_time = time.time()
             
-            ret, frame = self.cap.read()
-            if ret:
-                # Aplicar ajustes de imagem
-                processed_frame = self._apply_image_adjustments(frame)
-                
+            # Reconfiguração entre leituras: nenhum frame fica pela metade
+            pedido = None
+            if self.pending_resolution is not None:
                 with self.frame_lock:
-                    self.current_frame = processed_frame.copy()
+                    pedido, self.pending_resolution = self.pending_resolution, None
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, pedido.tamanho[0])
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, pedido.tamanho[1])
+                if decoder is not None:
+                    decoder.reduce = self._fator_decodificacao(cap)
+                    self._publicar_fator(decoder.reduce)
+            
+            ret, frame = cap.read()
+            if pedido is not None:
+                # Primeiro frame após a troca: o tamanho real (alguns drivers ignoram cap.set)
+                pedido.concluir(self._tamanho_entregue(cap, frame if ret else None))
+            if ret:
+                if decoder is not None and frame.ndim <= 2 and frame.shape[0] == 1:
+                    # Bytes JPEG: decodificação + ajustes no pool, saída em ordem
+                    # (cópia: o backend pode reutilizar o buffer na próxima leitura)
+                    prontos = decoder.enviar(frame.copy())
+                    if prontos:
+                        self._publicar_frame(prontos[-1])
+                else:
+                    # Aplicar ajustes de imagem
+                    self._publicar_frame(self._apply_image_adjustments(frame))
             else:
-                print("⚠️ Falha na captura do frame")
+                logger.warning("⚠️ Falha na captura do frame")
             
             # Controle de FPS
             if frame_time > 0:
@@ -99,19 +214,23 @@ class CameraModel:
         if frame is None:
             return frame
         
+        # Um único snapshot por frame: ajustes nunca se misturam entre versões
+        settings = self.image_settings.get()
+        
         # Aplicar brilho e contraste
-        adjusted = cv2.convertScaleAbs(frame, alpha=self.contrast, beta=self.brightness)
+        adjusted = cv2.convertScaleAbs(frame, alpha=settings.contrast, beta=settings.brightness)
         
         # Aplicar nitidez (sharpening) se necessário
-        if abs(self.sharpness) > 0.1:  # Evitar processamento desnecessário
-            if self.sharpness > 0:
+        sharpness = settings.sharpness
+        if abs(sharpness) > 0.1:  # Evitar processamento desnecessário
+            if sharpness > 0:
                 # Kernel de nitidez para valores positivos
                 kernel = np.array([[-1,-1,-1],
-                                  [-1, 9 + self.sharpness,-1],
+                                  [-1, 9 + sharpness,-1],
                                   [-1,-1,-1]])
             else:
                 # Suavização para valores negativos (blur leve)
-                blur_intensity = int(abs(self.sharpness) + 1)
+                blur_intensity = int(abs(sharpness) + 1)
                 adjusted = cv2.GaussianBlur(adjusted, (blur_intensity*2+1, blur_intensity*2+1), 0)
                 return adjusted
             
@@ -156,23 +275,40 @@ class CameraModel:
     
     def update_brightness(self, value):
         """Atualiza brilho da imagem"""
-        self.brightness = value
-        self.config.set('camera.brightness', value)
+        self.atualizar_ajustes(brightness=value)
     
     def update_contrast(self, value):
         """Atualiza contraste da imagem"""
-        self.contrast = value
-        self.config.set('camera.contrast', value)
+        self.atualizar_ajustes(contrast=value)
     
     def update_sharpness(self, value):
         """Atualiza nitidez da imagem"""
-        self.sharpness = value
-        self.config.set('camera.sharpness', value)
+        self.atualizar_ajustes(sharpness=value)
+    
+    def atualizar_ajustes(self, **changes):
+        """Publica vários ajustes de uma vez (um único novo snapshot)"""
+        self.image_settings.update(**changes)
+        for key, value in changes.items():
+            self.config.set(f'camera.{key}', value)
+    
+    def solicitar_resolucao(self, width, height, timeout=2.0):
+        """
+        Pede nova resolução, aplicada pela thread de captura entre dois frames.
+        Retorna o tamanho (w, h) que a câmera entregou após a troca, ou None
+        se a captura não respondeu dentro de timeout.
+        """
+        pedido = PedidoResolucao(width, height)
+        with self.frame_lock:
+            self.pending_resolution = pedido
+        if not pedido.pronto.wait(timeout):
+            return None
+        return pedido.aplicado
     
     def get_image_settings(self):
         """Retorna configurações atuais de imagem"""
+        settings = self.image_settings.get()
         return {
-            'brightness': self.brightness,
-            'contrast': self.contrast,
-            'sharpness': self.sharpness
+            'brightness': settings.brightness,
+            'contrast': settings.contrast,
+            'sharpness': settings.sharpness
         }
\ No newline at end of file
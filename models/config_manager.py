@@ -3,15 +3,44 @@
 Gerenciamento centralizado de configurações
 """
 
+import copy
 import json
 import os
+import tempfile
+import threading
+import time
 from pathlib import Path
 
+from models.app_state import ConfigSnapshot
+from models.log_manager import get_logger
+
+logger = get_logger('config')
+
 class ConfigManager:
     def __init__(self, config_file="config.json"):
         self.config_file = config_file
         self.config = self.carregar_config()
         
+        # Incrementado a cada alteração (permite detectar mudanças sem comparar o dict)
+        self.version = 0
+        
+        # Gravação em segundo plano (debounce + escrita atômica)
+        self.lock = threading.RLock()
+        self.save_condition = threading.Condition(self.lock)
+        self.save_deadline = None
+        self.saved_version = 0
+        self.writer_thread = None
+        self.writer_stop = False
+        self._snapshot = None
+        
+        # Serializa as escritas no arquivo; disk_version impede que um conteúdo
+        # mais antigo (escrita em segundo plano atrasada) substitua um mais novo
+        self.write_lock = threading.Lock()
+        self.disk_version = -1
+        
+        # Valores temporários (ex.: governador de qualidade): prevalecem em get(), nunca são gravados
+        self.overrides = {}
+        
     def carregar_config(self):
         """Carrega configurações do arquivo JSON"""
         try:
@@ -21,19 +50,121 @@ class ConfigManager:
             else:
                 return self.config_padrao()
         except Exception as e:
-            print(f"❌ Erro ao carregar configurações: {e}")
+            logger.error(f"❌ Erro ao carregar configurações: {e}")
             return self.config_padrao()
     
     def salvar_config(self):
-        """Salva configurações no arquivo JSON"""
+        """
+        Salva configurações no arquivo JSON (imediato, substituição atômica).
+        Cancela a gravação agendada e espera a que estiver em andamento.
+        """
+        with self.lock:
+            self.save_deadline = None
+            conteudo = json.dumps(self.config, indent=2, ensure_ascii=False)
+            version = self.version
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            self._gravar(conteudo, version)
+            with self.lock:
+                self.saved_version = max(self.saved_version, version)
             return True
         except Exception as e:
-            print(f"❌ Erro ao salvar configurações: {e}")
+            logger.error(f"❌ Erro ao salvar configurações: {e}")
             return False
     
+    def parar(self):
+        """Gravação final: encerra a thread de gravação e salva uma última vez"""
+        with self.lock:
+            self.writer_stop = True
+            self.save_condition.notify_all()
+            writer = self.writer_thread
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout=5.0)
+        return self.salvar_config()
+    
+    def agendar_salvamento(self, delay=None):
+        """
+        Agenda a gravação em segundo plano. Chamadas seguidas dentro do
+        intervalo são agrupadas em uma única escrita (debounce).
+        """
+        if delay is None:
+            delay = self.get('persistence.debounce_ms', 1000) / 1000.0
+        with self.lock:
+            if self.writer_stop:
+                return
+            self.save_deadline = time.monotonic() + delay
+            if self.writer_thread is None or not self.writer_thread.is_alive():
+                self.writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+                self.writer_thread.start()
+            self.save_condition.notify()
+    
+    def tem_alteracoes_pendentes(self):
+        """Verifica se há alterações ainda não gravadas"""
+        with self.lock:
+            return self.version != self.saved_version
+    
+    def _writer_loop(self):
+        """Thread de gravação: espera o fim do intervalo sem novas alterações"""
+        with self.lock:
+            while True:
+                if self.writer_stop:
+                    self.writer_thread = None
+                    return
+                if self.save_deadline is None:
+                    # Encerrar após um período ocioso (recriada sob demanda)
+                    if not self.save_condition.wait(timeout=30.0) and self.save_deadline is None:
+                        self.writer_thread = None
+                        return
+                    continue
+                
+                remaining = self.save_deadline - time.monotonic()
+                if remaining > 0:
+                    self.save_condition.wait(timeout=remaining)
+                    continue
+                
+                self.save_deadline = None
+                if self.version == self.saved_version:
+                    continue
+                conteudo = json.dumps(self.config, indent=2, ensure_ascii=False)
+                version = self.version
+                
+                # Escrever fora do lock para não bloquear set()
+                self.lock.release()
+                try:
+                    self._gravar(conteudo, version)
+                    ok = True
+                except Exception as e:
+                    logger.error(f"❌ Erro ao salvar configurações: {e}")
+                    ok = False
+                finally:
+                    self.lock.acquire()
+                if ok:
+                    self.saved_version = max(self.saved_version, version)
+    
+    def _gravar(self, conteudo, version):
+        """Uma escrita por vez; descarta conteúdo mais antigo que o já gravado"""
+        with self.write_lock:
+            if version < self.disk_version:
+                return
+            self._escrever_atomico(conteudo)
+            self.disk_version = version
+    
+    def _escrever_atomico(self, conteudo):
+        """Escreve em arquivo temporário no mesmo diretório e substitui com os.replace"""
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(conteudo)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.config_file)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+    
     def config_padrao(self):
         """Retorna configuração padrão"""
         return {
@@ -41,13 +172,19 @@ class ConfigManager:
                 "path": "./modelo_treinado/best.pt",
                 "fallback_path": "yolov8n-seg.pt",
                 "confidence_threshold": 0.15,
-                "iou_threshold": 0.5
+                "iou_threshold": 0.5,
+                "inference_size": 640,
+                "mask_mode": "auto",
+                "detection_path": ""
             },
             "camera": {
                 "device_id": 0,
                 "resolution_width": 640,
                 "resolution_height": 480,
-                "fps_limit": 30
+                "fps_limit": 30,
+                "capture_mode": "default",
+                "decode_threads": 2,
+                "decode_reduce": 1
             },
             "display": {
                 "show_masks": True,
@@ -55,7 +192,12 @@ class ConfigManager:
                 "show_labels": True,
                 "show_confidence": True,
                 "show_fps": True,
-                "window_title": "🎯 YOLO Detection Studio"
+                "window_title": "🎯 YOLO Detection Studio",
+                "batch_boxes": False,
+                "label_alpha": 1.0,
+                "label_cache_size": 256,
+                "label_conf_step": 0.01,
+                "show_heatmap": False
             },
             "tracking": {
                 "enabled": True,
@@ -78,12 +220,196 @@ class ConfigManager:
                 "stability_check": True,
                 "stability_frames": 3,
                 "nms_threshold": 0.4,
-                "duplicate_threshold": 0.3
+                "duplicate_threshold": 0.3,
+                "duplicate_filter": True,
+                "duplicate_use_masks": False,
+                "duplicate_mask_grid": 64,
+                "duplicate_method": "greedy",
+                "area_source": "bbox",
+                "compute_polygons": True
+            },
+            "pipeline": {
+                "inference_width": 640,
+                "annotation_width": 0,
+                "inference_stride": 1,
+                "display_width": 0,
+                "snapshot_dir": "./snapshots"
+            },
+            "workers": {
+                "count": 0,
+                "threads_per_worker": 0,
+                "slots_per_worker": 2,
+                "pin_cpus": False,
+                "max_restarts": 3
+            },
+            "autotune": {
+                "run_on_first_start": False,
+                "goal": "latency",
+                "target_latency_ms": 0,
+                "thread_grid": [],
+                "batch_grid": [1, 2, 4],
+                "repeats": 5,
+                "profiles": {}
+            },
+            "tiling": {
+                "enabled": False,
+                "rows": 2,
+                "cols": 3,
+                "overlap": 0.2,
+                "include_full_frame": True,
+                "merge_metric": "ios"
+            },
+            "model_store": {
+                "enabled": True,
+                "dir": "./model_store",
+                "mmap": True,
+                "max_entries": 4
+            },
+            "cascade": {
+                "enabled": False,
+                "proposal_path": "",
+                "proposal_size": 320,
+                "proposal_confidence": 0.1,
+                "padding": 0.2,
+                "min_crop_size": 96,
+                "crop_size": 320,
+                "max_crops": 6,
+                "max_area_fraction": 0.5
+            },
+            "cache": {
+                "enabled": False,
+                "grid_size": 32,
+                "tolerance": 4.0,
+                "max_entries": 8,
+                "ttl_seconds": 5.0
+            },
+            "persistence": {
+                "autosave": True,
+                "debounce_ms": 1000
+            },
+            "ui": {
+                "slider_throttle_ms": 100,
+                "log_debounce_ms": 500
+            },
+            "logging": {
+                "level": "INFO",
+                "buffer_size": 1000,
+                "file": "./logs/app.log",
+                "max_bytes": 1048576,
+                "backup_count": 3,
+                "console": True,
+                "ui_refresh_ms": 200,
+                "ui_max_lines": 500
+            },
+            "recorder": {
+                "enabled": False,
+                "mode": "clip",
+                "pre_seconds": 5,
+                "post_seconds": 3,
+                "fps": 10,
+                "width": 960,
+                "jpeg_quality": 80,
+                "max_memory_mb": 64,
+                "workers": 2,
+                "max_pending": 8,
+                "cooldown_seconds": 10,
+                "output_dir": "./recordings",
+                "triggers": [
+                    {"type": "low_confidence", "min": 0.15, "max": 0.4}
+                ]
+            },
+            "heatmap": {
+                "enabled": True,
+                "source": "center",
+                "grid_width": 96,
+                "half_life_seconds": 300,
+                "max_gap_seconds": 1.0,
+                "min_dwell_seconds": 1.0,
+                "alpha": 0.5,
+                "render_interval": 0.5,
+                "export_dir": "./heatmaps"
+            },
+            "stats": {
+                "shift_hours": 8,
+                "accuracy": 0.02,
+                "quantiles": [0.5, 0.9, 0.99],
+                "ui_refresh_ms": 500,
+                "export_dir": "./stats"
+            },
+            "governor": {
+                "enabled": False,
+                "target_fps": 15,
+                "inference_sizes": [512, 416, 320],
+                "strides": [2, 3],
+                "display_widths": [640],
+                "smoothing": 0.1,
+                "degrade_margin": 0.1,
+                "upgrade_margin": 0.25,
+                "degrade_seconds": 2,
+                "upgrade_seconds": 10,
+                "max_upgrade_seconds": 120,
+                "cooldown_seconds": 3
+            },
+            "stream": {
+                "enabled": False,
+                "host": "127.0.0.1",
+                "port": 8766,
+                "width": 960,
+                "jpeg_quality": 75,
+                "fps": 15,
+                "max_clients": 16,
+                "send_timeout": 5.0
+            },
+            "server": {
+                "host": "127.0.0.1",
+                "port": 8765,
+                "max_batch": 0,
+                "max_latency_ms": 10,
+                "max_queue": 64,
+                "max_body_mb": 32,
+                "timeout_seconds": 10
+            },
+            "quantization": {
+                "mode": "off",
+                "calibration_dir": "./calibracao",
+                "calibration_frames": 100,
+                "max_recall_drop": 0.02,
+                "min_box_iou": 0.9,
+                "min_mask_iou": 0.85,
+                "max_conf_drift": 0.05
             }
         }
     
+    def snapshot(self):
+        """
+        Snapshot imutável da versão atual (recriado só quando a versão muda).
+        Seguro para enviar a outras threads/processos enquanto a UI altera valores.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+        with self.lock:
+            data = copy.deepcopy(self.config)
+            for key_path, value in self.overrides.items():
+                ref = data
+                keys = key_path.split('.')
+                for key in keys[:-1]:
+                    ref = ref.setdefault(key, {})
+                ref[keys[-1]] = value
+            snapshot = ConfigSnapshot(self.version, data)
+            self._snapshot = snapshot
+        return snapshot
+    
     def get(self, key_path, default=None):
         """Busca valor por caminho (ex: 'model.confidence_threshold')"""
+        # Uma única leitura: sobrepor() troca o dicionário inteiro (copy-on-write)
+        overrides = self.overrides
+        if key_path in overrides:
+            return overrides[key_path]
+        return self.get_base(key_path, default)
+    
+    def get_base(self, key_path, default=None):
+        """Valor configurado pelo usuário, ignorando sobreposições temporárias"""
         keys = key_path.split('.')
         value = self.config
         try:
@@ -96,19 +422,39 @@ class ConfigManager:
     def set(self, key_path, value):
         """Define valor por caminho"""
         keys = key_path.split('.')
-        config_ref = self.config
         try:
-            for key in keys[:-1]:
-                if key not in config_ref:
-                    config_ref[key] = {}
-                config_ref = config_ref[key]
-            config_ref[keys[-1]] = value
+            with self.lock:
+                config_ref = self.config
+                for key in keys[:-1]:
+                    if key not in config_ref:
+                        config_ref[key] = {}
+                    config_ref = config_ref[key]
+                config_ref[keys[-1]] = value
+                self.version += 1
             return True
         except Exception as e:
-            print(f"❌ Erro ao definir configuração: {e}")
+            logger.error(f"❌ Erro ao definir configuração: {e}")
             return False
     
+    def sobrepor(self, key_path, value):
+        """
+        Define (ou remove, com value=None) um valor temporário para key_path.
+        Não altera o dicionário salvo em disco; incrementa a versão.
+        """
+        with self.lock:
+            # Cópia na escrita: leitores em get() nunca veem o dict pela metade
+            overrides = dict(self.overrides)
+            if value is None:
+                if overrides.pop(key_path, None) is None:
+                    return
+            else:
+                overrides[key_path] = value
+            self.overrides = overrides
+            self.version += 1
+    
     def reset_to_default(self):
         """Restaura configurações padrão"""
-        self.config = self.config_padrao()
+        with self.lock:
+            self.config = self.config_padrao()
+            self.version += 1
         return self.salvar_config()
\ No newline at end of file
@@ -6,107 +6,602 @@ Lógica de detecção e processamento YOLO
 import cv2
 import numpy as np
 from ultralytics import YOLO
-from collections import deque
 import time
 import math
 import os
 
+from models.mask_codec import MaskTransform, aplicar_mascara, mask_iou_matrix
+from models.mask_geometry import calcular_geometria
+from models.label_renderer import LabelRenderer, desenhar_caixas
+from models.autotune import aplicar_calibracao
+from models.tiling import gerar_tiles, regioes_candidatas, deslocar_deteccao, mesclar_deteccoes
+from models.box_ops import box_iou_matrix, suprimir
+from models.frame_cache import FrameCache
+from models.log_manager import get_logger
+from models.quantization import selecionar_modelo_quantizado, configurar_threads_onnx
+from models.model_store import ModelStore, hash_arquivo
+from models.streaming_stats import StreamingStats
+
+logger = get_logger('detection')
+
 class DetectionModel:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, threads=None):
         self.config = config_manager
+        # Threads fixadas pelo chamador (workers); None usa as da calibração
+        self.threads = threads
+        
+        # Artefatos pré-fundidos por hash do arquivo (carregados via mmap)
+        self.model_store = ModelStore(
+            root=self.config.get('model_store.dir', './model_store'),
+            max_entries=self.config.get('model_store.max_entries', 4),
+            mmap=self.config.get('model_store.mmap', True)
+        )
         self.model = self.carregar_modelo()
+        self.chave_carga = self._chave_carga()
+        
+        # Variante só de detecção (sem protótipos de máscara), pré-carregada
+        self.modelo_deteccao = self.carregar_variante_deteccao(self.model)
         
-        # Métricas de performance
-        self.fps_counter = 0
-        self.start_time = time.time()
-        self.fps_history = deque(maxlen=30)
-        self.detection_history = deque(maxlen=10)
+        # Modelo de propostas da cascata (opcional) e recortes do último frame
+        self.modelo_proposta = self.carregar_modelo_proposta()
+        self.ultimas_regioes = 0
+        
+        # Métricas de performance (janelas 1 min / 15 min / turno, memória fixa)
+        self.stats = StreamingStats(config_manager)
         
         # Sistema de tracking
         self.tracking_data = {}
         self.next_id = 1
         
+        # Cache de transformações máscara -> frame por (entrada do modelo, frame)
+        self.mask_transforms = {}
+        
+        # Cache de rótulos pré-renderizados
+        self.label_renderer = LabelRenderer(
+            max_size=self.config.get('display.label_cache_size', 256),
+            conf_step=self.config.get('display.label_conf_step', 0.01)
+        )
+        
+        # Geração do modelo (incrementada a cada troca)
+        self.model_version = 0
+        
+        # Cache de resultados para cenas paradas
+        self.frame_cache = FrameCache()
+        self.frame_cache_version = None
+        
     def carregar_modelo(self):
         """Carrega modelo YOLO"""
+        # Threads/lote calibrados para esta máquina e este modelo
+        self.batch_size = aplicar_calibracao(self.config, self.config.get('model.path'),
+                                             aplicar_threads=self.threads is None)
+        
         try:
             # Verificar e criar pasta modelo_treinado se não existir
             model_path = self.config.get('model.path')
             model_dir = os.path.dirname(model_path)
             if model_dir and not os.path.exists(model_dir):
                 os.makedirs(model_dir, exist_ok=True)
-                print(f"📁 Pasta criada: {model_dir}")
+                logger.info(f"📁 Pasta criada: {model_dir}")
             
             # Tentar carregar modelo principal
             if os.path.exists(model_path):
-                model = YOLO(model_path)
-                print(f"✅ Modelo principal carregado: {model_path}")
+                # Variante INT8 somente se aprovada na verificação de paridade
+                quantizado = selecionar_modelo_quantizado(self.config, model_path)
+                if quantizado:
+                    quantized_path, task = quantizado
+                    model = YOLO(quantized_path, task=task)
+                    logger.info(f"✅ Modelo INT8 carregado: {quantized_path}")
+                    self._aquecer_onnx(model)
+                    return model
+                
+                model = self._abrir_pesos(model_path)
+                logger.info(f"✅ Modelo principal carregado: {model_path}")
                 return model
             
             # Fallback para modelo padrão
             fallback_path = self.config.get('model.fallback_path')
-            if os.path.exists(fallback_path):
-                model = YOLO(fallback_path)
-                print(f"⚠️ Usando modelo fallback: {fallback_path}")
+            if fallback_path and os.path.exists(fallback_path):
+                model = self._abrir_pesos(fallback_path)
+                logger.warning(f"⚠️ Usando modelo fallback: {fallback_path}")
                 return model
             
-            # Último recurso - baixar modelo
-            print("📥 Baixando modelo padrão...")
-            return YOLO('yolov8n-seg.pt')
+            # Estações offline: nada de download implícito
+            raise FileNotFoundError(
+                f"nenhum modelo local (model.path={model_path}, model.fallback_path={fallback_path}); "
+                "copie os pesos para a máquina, o download automático está desativado"
+            )
             
         except Exception as e:
-            print(f"❌ Erro ao carregar modelo: {e}")
+            logger.error(f"❌ Erro ao carregar modelo: {e}")
             return None
     
-    def detectar(self, frame):
-        """Executa detecção no frame"""
-        if self.model is None:
-            return frame, []
+    def _aquecer_onnx(self, model):
+        """Cria a sessão ONNX Runtime com um frame vazio e aplica as threads deste processo"""
+        try:
+            imgsz = self.config.get('model.inference_size', 640)
+            model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), imgsz=imgsz, verbose=False)
+            self.definir_threads(model=model)
+        except Exception as e:
+            logger.warning(f"⚠️ Threads do ONNX Runtime não ajustadas: {e}")
+    
+    def definir_threads(self, threads=None, model=None):
+        """
+        Threads de inferência: torch e, no modelo INT8, a sessão ONNX Runtime.
+        threads=None reaplica as atuais do torch (fixadas pelo worker ou pela calibração).
+        """
+        import torch
+        
+        if threads is None:
+            threads = self.threads or torch.get_num_threads()
+        else:
+            torch.set_num_threads(int(threads))
+        
+        model = model or self.model
+        onnx_path = str(getattr(model, 'ckpt_path', '') or '')
+        if onnx_path.endswith('.onnx'):
+            configurar_threads_onnx(model, onnx_path, threads)
+    
+    def _abrir_pesos(self, path, **kwargs):
+        """YOLO a partir do model store (.pt) ou direto do arquivo"""
+        if self.config.get('model_store.enabled', True) and str(path).endswith('.pt'):
+            try:
+                return self.model_store.carregar(path, **kwargs)
+            except Exception as e:
+                logger.warning(f"⚠️ Model store indisponível ({e}); carregando {path} diretamente")
+        return YOLO(path, **kwargs)
+    
+    def _resolver_caminho(self):
+        """Arquivo de pesos que carregar_modelo usaria (principal ou fallback)"""
+        for path in (self.config.get('model.path'), self.config.get('model.fallback_path')):
+            if path and os.path.exists(path):
+                return path
+        return None
+    
+    def _chave_carga(self):
+        """Identidade do que seria carregado: conteúdo dos pesos + opções que mudam os modelos"""
+        path = self._resolver_caminho()
+        quantizacao = self.config.get('quantization.mode', 'off')
+        return (
+            path,
+            hash_arquivo(path) if path else None,
+            quantizacao,
+            # ONNX INT8 tem entrada fixa: outro tamanho seleciona outro artefato
+            int(self.config.get('model.inference_size', 640)) if quantizacao != 'off' else None,
+            self.config.get('model.mask_mode', 'auto'),
+            self.config.get('model.detection_path', ''),
+            self.config.get('cascade.proposal_path', ''),
+        )
+    
+    def carregar_variante_deteccao(self, model):
+        """
+        Modelo sem cabeça de máscaras, usado quando nenhuma máscara é necessária.
+        Usa model.detection_path se configurado; senão recarrega os mesmos pesos
+        com a cabeça Segment rebaixada para Detect (pula protótipos e coeficientes).
+        """
+        if model is None or self.config.get('model.mask_mode', 'auto') == 'always':
+            return None
         
         try:
-            # Executar predição
-            results = self.model(
-                frame,
-                conf=self.config.get('model.confidence_threshold', 0.15),
-                iou=self.config.get('model.iou_threshold', 0.5),
-                verbose=False
-            )
+            detection_path = self.config.get('model.detection_path', '')
+            if detection_path and os.path.exists(detection_path):
+                variante = self._abrir_pesos(detection_path)
+                logger.info(f"✅ Modelo de detecção carregado: {detection_path}")
+                return variante
             
-            detections = []
-            annotated_frame = frame.copy()
+            ckpt_path = getattr(model, 'ckpt_path', None)
+            if getattr(model, 'task', None) != 'segment' or not ckpt_path or not str(ckpt_path).endswith('.pt'):
+                return None
             
-            if results and len(results) > 0:
-                result = results[0]
-                
-                # Processar detecções
-                if result.boxes is not None and len(result.boxes) > 0:
-                    for i, box in enumerate(result.boxes):
-                        # Extrair dados da detecção
-                        detection_data = self._processar_deteccao(box, result, i)
-                        
-                        if self._validar_deteccao(detection_data):
-                            detections.append(detection_data)
-                            annotated_frame = self._desenhar_deteccao(annotated_frame, detection_data)
+            from ultralytics.nn.modules import Detect, Segment
+            
+            # Mesmo artefato do model store: páginas dos pesos compartilhadas via mmap
+            variante = self._abrir_pesos(self._resolver_caminho())
+            head = variante.model.model[-1]
+            if not isinstance(head, Segment):
+                return None
+            # Segment herda de Detect: mesmos pesos de caixas/classes, sem o ramo de máscaras
+            head.__class__ = Detect
+            variante.task = 'detect'
+            variante.overrides['task'] = 'detect'
+            variante.model.args['task'] = 'detect'
+            logger.info("✅ Variante sem máscaras preparada (mesmos pesos, cabeça Detect)")
+            return variante
             
-            # Atualizar métricas
-            self._atualizar_metricas(len(detections))
+        except Exception as e:
+            logger.warning(f"⚠️ Variante sem máscaras indisponível ({e}); máscaras apenas descartadas")
+            return None
+    
+    def carregar_modelo_proposta(self):
+        """Modelo pequeno de detecção para o primeiro estágio da cascata (cascade.proposal_path)"""
+        proposal_path = self.config.get('cascade.proposal_path', '')
+        if not proposal_path:
+            return None
+        if not os.path.exists(proposal_path):
+            logger.warning(f"⚠️ Modelo de propostas não encontrado: {proposal_path}")
+            return None
+        try:
+            model = self._abrir_pesos(proposal_path)
+            logger.info(f"✅ Modelo de propostas carregado: {proposal_path}")
+            return model
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao carregar modelo de propostas: {e}")
+            return None
+    
+    def precisa_mascaras(self, saida=None):
+        """
+        Máscaras são exibidas, usadas no heatmap, filtradas ou usadas na
+        supressão de duplicatas? saida substitui os consumidores da interface
+        (exibição e heatmap): o servidor passa o que o cliente pediu.
+        """
+        if self.config.get('model.mask_mode', 'auto') == 'always':
+            return True
+        if saida is None:
+            saida = (self.config.get('display.show_masks', True)
+                     or (self.config.get('heatmap.enabled', True)
+                         and self.config.get('heatmap.source', 'center') == 'mask'))
+        return bool(
+            saida
+            or self.config.get('precision.duplicate_use_masks', False)
+            or (self.config.get('precision.area_filter', False)
+                and self.config.get('precision.area_source', 'bbox') == 'mask')
+        )
+    
+    def _selecionar_modelo(self, mascaras=None):
+        """(modelo, com_mascaras) para o próximo forward pass (decidido por frame)"""
+        if self.precisa_mascaras(mascaras):
+            return self.model, True
+        return self.modelo_deteccao or self.model, False
+    
+    def detectar(self, frame, output_size=None):
+        """
+        Executa detecção no frame.
+        output_size=(w, h) define a resolução do frame anotado retornado;
+        as detecções ficam sempre em coordenadas do frame completo.
+        """
+        if self.model is None:
+            return self._redimensionar(frame, output_size), []
+        
+        try:
+            inicio = time.perf_counter()
+            
+            # Cena inalterada: reaproveitar detecções e anotação
+            cache = self._obter_cache()
+            if cache is not None:
+                chave = (self.config.version, self.model_version, output_size)
+                assinatura, resultado = cache.buscar(frame, chave)
+                if resultado is not None:
+                    self.stats.registrar_exibicao()
+                    return resultado
             
+            detections = self.inferir(frame, mask_scale=self.escala_saida(frame.shape, output_size))
+            annotated_frame = self.renderizar(frame, detections, output_size,
+                                              latencia_ms=(time.perf_counter() - inicio) * 1000)
+            
+            if cache is not None:
+                cache.guardar(assinatura, chave, (annotated_frame, detections))
             return annotated_frame, detections
             
         except Exception as e:
-            print(f"❌ Erro na detecção: {e}")
-            return frame, []
+            logger.error(f"❌ Erro na detecção: {e}")
+            return self._redimensionar(frame, output_size), []
     
-    def _processar_deteccao(self, box, result, index):
-        """Processa uma detecção individual"""
-        # Coordenadas da bounding box
-        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-        confidence = box.conf[0].cpu().numpy()
+    def _obter_cache(self):
+        """Cache de frames com parâmetros atualizados, ou None se desativado"""
+        if not self.config.get('cache.enabled', False):
+            return None
+        
+        cache = self.frame_cache
+        if self.frame_cache_version != self.config.version:
+            cache.max_entries = max(int(self.config.get('cache.max_entries', 8)), 1)
+            cache.ttl = float(self.config.get('cache.ttl_seconds', 5.0))
+            cache.tolerance = float(self.config.get('cache.tolerance', 4.0))
+            cache.grid = max(int(self.config.get('cache.grid_size', 32)), 4)
+            cache.invalidar()
+            self.frame_cache_version = self.config.version
+        return cache
+    
+    def get_cache_stats(self):
+        """Estatísticas do cache de frames"""
+        return self.frame_cache.get_stats()
+    
+    def inferir(self, frame, mask_scale=1.0):
+        """Executa o modelo e retorna as detecções em coordenadas do frame completo"""
+        return self.inferir_lote([frame], mask_scale)[0]
+    
+    def inferir_lote(self, frames, mask_scale=1.0, mascaras=None):
+        """
+        Executa o modelo em um lote de frames (um único forward pass).
+        mascaras: o chamador precisa de máscaras na saída? None decide pela
+        configuração da interface (precisa_mascaras).
+        """
+        model, com_mascaras = self._selecionar_modelo(mascaras)
+        if model is None or not frames:
+            return [[] for _ in frames]
         
-        # Obter classe (para modelo de classe única, sempre será 0)
-        if hasattr(box, 'cls') and box.cls is not None:
-            class_id = int(box.cls[0].cpu().numpy())
+        # Modo em tiles: cada frame vira um lote de tiles sobrepostos
+        if self.config.get('tiling.enabled', False):
+            return [self.remover_duplicatas(self.inferir_tiles(frame, mask_scale, mascaras)) for frame in frames]
+        
+        # Modo em cascata: propostas baratas, segmentação só nos recortes
+        if self.config.get('cascade.enabled', False):
+            return [self.remover_duplicatas(self.inferir_cascata(frame, mask_scale, mascaras)) for frame in frames]
+        
+        # Entrada de inferência desacoplada da resolução de captura
+        entradas = [self._preparar_entrada(frame) for frame in frames]
+        
+        results = model(
+            [input_frame for input_frame, _ in entradas],
+            conf=self.config.get('model.confidence_threshold', 0.15),
+            iou=self.config.get('model.iou_threshold', 0.5),
+            imgsz=self.config.get('model.inference_size', 640),
+            verbose=False
+        )
+        
+        if not results:
+            return [[] for _ in frames]
+        return [
+            self.remover_duplicatas(self._processar_resultado(result, frame.shape, escala, mask_scale, com_mascaras))
+            for result, frame, (_, escala) in zip(results, frames, entradas)
+        ]
+    
+    def inferir_tiles(self, frame, mask_scale=1.0, mascaras=None):
+        """
+        Inferência em tiles sobrepostos (objetos pequenos em frames grandes).
+        Todos os tiles vão em um único lote; duplicatas são fundidas (união de caixas e máscaras).
+        """
+        regioes = gerar_tiles(
+            frame.shape,
+            rows=self.config.get('tiling.rows', 2),
+            cols=self.config.get('tiling.cols', 3),
+            overlap=self.config.get('tiling.overlap', 0.2)
+        )
+        if self.config.get('tiling.include_full_frame', True):
+            # Frame inteiro reduzido também entra no lote (objetos grandes)
+            regioes.append((0, 0, frame.shape[1], frame.shape[0]))
+        
+        # Filtros de área só depois da fusão: um pedaço cortado no tile não é a peça
+        detections = self._inferir_regioes(frame, regioes, mask_scale, validar=False, mascaras=mascaras)
+        detections = mesclar_deteccoes(
+            detections,
+            iou_threshold=self.config.get('precision.nms_threshold', 0.4),
+            metric=self.config.get('tiling.merge_metric', 'ios'),
+            calcular_poligonos=self.config.get('precision.compute_polygons', True)
+        )
+        return [detection for detection in detections if self._validar_deteccao(detection)]
+    
+    def inferir_cascata(self, frame, mask_scale=1.0, mascaras=None):
+        """
+        Cascata em dois estágios: propostas no frame inteiro com um modelo pequeno
+        (ou entrada reduzida) e segmentação em um lote de recortes com margem em
+        volta delas. Muitos recortes ou área grande: estágio único no frame inteiro.
+        """
+        regioes = regioes_candidatas(
+            self._propor_regioes(frame), frame.shape,
+            padding=self.config.get('cascade.padding', 0.2),
+            min_size=self.config.get('cascade.min_crop_size', 96)
+        )
+        self.ultimas_regioes = len(regioes)
+        if not regioes:
+            return []
+        
+        frame_h, frame_w = frame.shape[:2]
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regioes) / float(frame_w * frame_h)
+        if (len(regioes) > self.config.get('cascade.max_crops', 6)
+                or area > self.config.get('cascade.max_area_fraction', 0.5)):
+            self.ultimas_regioes = 1
+            return self._inferir_regioes(frame, [(0, 0, frame_w, frame_h)], mask_scale, mascaras=mascaras)
+        
+        # Recortes vizinhos cortam a mesma peça: fundir antes do filtro de área
+        detections = self._inferir_regioes(frame, regioes, mask_scale,
+                                           imgsz=self.config.get('cascade.crop_size', 320), validar=False,
+                                           mascaras=mascaras)
+        detections = mesclar_deteccoes(
+            detections,
+            iou_threshold=self.config.get('precision.nms_threshold', 0.4),
+            metric='ios',
+            calcular_poligonos=self.config.get('precision.compute_polygons', True)
+        )
+        return [detection for detection in detections if self._validar_deteccao(detection)]
+    
+    def _propor_regioes(self, frame):
+        """Boxes candidatas (xyxy no frame completo) do primeiro estágio"""
+        model = self.modelo_proposta or self.modelo_deteccao or self.model
+        if model is None:
+            return np.zeros((0, 4), dtype=np.float32)
+        
+        input_frame, escala = self._preparar_entrada(frame)
+        results = model(
+            input_frame,
+            conf=self.config.get('cascade.proposal_confidence', 0.1),
+            iou=self.config.get('model.iou_threshold', 0.5),
+            imgsz=self.config.get('cascade.proposal_size', 320),
+            verbose=False
+        )
+        if not results or results[0].boxes is None or len(results[0].boxes) == 0:
+            return np.zeros((0, 4), dtype=np.float32)
+        return results[0].boxes.xyxy.cpu().numpy() * escala
+    
+    def remover_duplicatas(self, detections):
+        """
+        Supressão de duplicatas pós-NMS, entre classes (precision.duplicate_threshold).
+        IoU das boxes em matriz; opcionalmente IoU das máscaras compactas nos
+        pares cujas boxes se sobrepõem.
+        """
+        threshold = self.config.get('precision.duplicate_threshold', 0.3)
+        if len(detections) <= 1 or not self.config.get('precision.duplicate_filter', True) or threshold <= 0:
+            return detections
+        
+        scores = np.array([d['confidence'] for d in detections], dtype=np.float32)
+        order = np.argsort(-scores, kind='stable')
+        boxes = np.array([detections[i]['bbox'] for i in order], dtype=np.float32)
+        overlap = box_iou_matrix(boxes, boxes)
+        
+        if self.config.get('precision.duplicate_use_masks', False):
+            masks = [detections[i].get('mask') for i in order]
+            if all(mask is not None for mask in masks):
+                # Só rasterizar as máscaras que encostam em alguma outra
+                np.fill_diagonal(overlap, 0.0)
+                vizinhos = np.flatnonzero(overlap.max(axis=1) > 0)
+                if len(vizinhos) > 1:
+                    mask_iou = mask_iou_matrix(
+                        [masks[i] for i in vizinhos],
+                        grid=self.config.get('precision.duplicate_mask_grid', 64)
+                    )
+                    overlap[np.ix_(vizinhos, vizinhos)] = mask_iou
+        
+        keep = suprimir(overlap, threshold, method=self.config.get('precision.duplicate_method', 'greedy'))
+        if len(keep) == len(detections):
+            return detections
+        # Preservar a ordem original das detecções mantidas
+        return [detections[i] for i in np.sort(order[keep])]
+    
+    def _inferir_regioes(self, frame, regioes, mask_scale=1.0, imgsz=None, validar=True, mascaras=None):
+        """
+        Executa um único lote com os recortes do frame e devolve detecções globais.
+        validar=False adia _validar_deteccao para depois da fusão entre recortes.
+        """
+        model, com_mascaras = self._selecionar_modelo(mascaras)
+        if model is None or not regioes:
+            return []
+        
+        recortes = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regioes]
+        entradas = [self._preparar_entrada(recorte) for recorte in recortes]
+        
+        results = model(
+            [input_frame for input_frame, _ in entradas],
+            conf=self.config.get('model.confidence_threshold', 0.15),
+            iou=self.config.get('model.iou_threshold', 0.5),
+            imgsz=imgsz or self.config.get('model.inference_size', 640),
+            verbose=False
+        )
+        
+        detections = []
+        for result, recorte, (_, escala), (x1, y1, _, _) in zip(results or [], recortes, entradas, regioes):
+            for detection in self._processar_resultado(result, recorte.shape, escala, mask_scale, com_mascaras,
+                                                       validar=validar):
+                detections.append(deslocar_deteccao(detection, x1, y1))
+        return detections
+    
+    def renderizar(self, frame, detections, output_size=None, latencia_ms=None, reaproveitado=False):
+        """
+        Gera o frame anotado na resolução de saída e atualiza as métricas.
+        A imagem é reduzida uma vez e caixas/máscaras são escaladas
+        (em vez de desenhar no frame cheio). latencia_ms é o tempo de
+        inferência já gasto; o da anotação é somado a ele. Com reaproveitado
+        (detecções de um frame anterior), só o FPS de exibição é atualizado.
+        """
+        inicio = time.perf_counter()
+        annotated_frame = self._redimensionar(frame, output_size)
+        if annotated_frame is frame:
+            annotated_frame = frame.copy()
+        scale = annotated_frame.shape[1] / frame.shape[1]
+        
+        annotated_frame = self.anotar(annotated_frame, detections, scale)
+        
+        # Atualizar métricas
+        if reaproveitado:
+            self.stats.registrar_exibicao()
+            return annotated_frame
+        if latencia_ms is not None:
+            latencia_ms += (time.perf_counter() - inicio) * 1000
+        self._atualizar_metricas(detections, latencia_ms)
+        
+        return annotated_frame
+    
+    def escala_saida(self, frame_shape, output_size):
+        """Escala entre o frame de saída e o frame original"""
+        if output_size is None or output_size[0] <= 0:
+            return 1.0
+        return output_size[0] / frame_shape[1]
+    
+    def anotar(self, frame, detections, scale=1.0):
+        """Desenha as detecções em um frame de qualquer resolução (scale = frame / original)"""
+        return self._desenhar_deteccoes(frame, detections, scale)
+    
+    def _preparar_entrada(self, frame):
+        """Reduz o frame para a largura de inferência configurada"""
+        h, w = frame.shape[:2]
+        escala = np.ones(4, dtype=np.float32)
+        
+        inference_width = self.config.get('pipeline.inference_width', 0)
+        if not inference_width or inference_width >= w:
+            return frame, escala
+        
+        inference_height = max(int(round(h * inference_width / w)), 1)
+        input_frame = cv2.resize(frame, (inference_width, inference_height), interpolation=cv2.INTER_AREA)
+        escala[[0, 2]] = w / inference_width
+        escala[[1, 3]] = h / inference_height
+        return input_frame, escala
+    
+    def _redimensionar(self, frame, output_size):
+        """Reduz o frame para output_size=(w, h), se informado"""
+        if output_size is None:
+            return frame
+        
+        w, h = int(output_size[0]), int(output_size[1])
+        if w <= 0 or h <= 0 or (w, h) == (frame.shape[1], frame.shape[0]):
+            return frame
+        return cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+    
+    def _processar_resultado(self, result, frame_shape, escala, mask_scale=1.0, com_mascaras=True, validar=True):
+        """Converte o resultado do YOLO em detecções validadas (validar=False: todas)"""
+        if result.boxes is None or len(result.boxes) == 0:
+            return []
+        
+        # Caixas, confianças e classes transferidas em lote
+        xyxy = result.boxes.xyxy.cpu().numpy() * escala
+        confidences = result.boxes.conf.cpu().numpy()
+        if result.boxes.cls is not None:
+            class_ids = result.boxes.cls.cpu().numpy().astype(int)
         else:
-            class_id = 0
+            class_ids = np.zeros(len(xyxy), dtype=int)
+        
+        # Máscaras transferidas uma única vez e métricas calculadas em lote
+        # Sem consumidor de máscaras: nem transferir para a CPU
+        masks = self._extrair_mascaras(result) if com_mascaras else None
+        geometria = None
+        mascaras = None
+        if masks is not None:
+            transform = self._obter_transform(masks.shape[1:], frame_shape)
+            geometria = calcular_geometria(
+                masks, frame_shape,
+                calcular_poligonos=self.config.get('precision.compute_polygons', True),
+                transform=transform
+            )
+            mascaras = transform.compactar(masks, xyxy.astype(int), scale=mask_scale)
+        
+        detections = []
+        for i in range(len(xyxy)):
+            detection_data = self._processar_deteccao(xyxy[i], confidences[i], class_ids[i], i, mascaras, geometria)
+            
+            if not validar or self._validar_deteccao(detection_data):
+                detections.append(detection_data)
+        
+        return detections
+    
+    def _extrair_mascaras(self, result):
+        """Copia todas as máscaras para a CPU em uma única transferência"""
+        if not hasattr(result, 'masks') or result.masks is None:
+            return None
+        return result.masks.data.cpu().numpy()
+    
+    def _obter_transform(self, mask_shape, frame_shape):
+        """Transformação letterbox em cache para o par (máscara, frame)"""
+        key = (tuple(mask_shape[:2]), tuple(frame_shape[:2]))
+        transform = self.mask_transforms.get(key)
+        if transform is None:
+            transform = MaskTransform(mask_shape, frame_shape)
+            self.mask_transforms[key] = transform
+        return transform
+    
+    def invalidar_cache_mascaras(self):
+        """Descarta transformações em cache (ex.: mudança de resolução)"""
+        self.mask_transforms = {}
+    
+    def _processar_deteccao(self, xyxy, confidence, class_id, index, mascaras=None, geometria=None):
+        """Processa uma detecção individual"""
+        # Coordenadas da bounding box
+        x1, y1, x2, y2 = xyxy
         
         # Calcular centro e área
         centro_x = int((x1 + x2) / 2)
@@ -118,15 +613,21 @@ class DetectionModel:
             'confidence': float(confidence),
             'center': (centro_x, centro_y),
             'area': float(area),
-            'class_id': class_id,
+            'class_id': int(class_id),
             'class_name': 'estator'  # Nome específico do modelo treinado
         }
         
-        # Adicionar máscara se disponível
-        if hasattr(result, 'masks') and result.masks is not None:
-            if len(result.masks.data) > index:
-                mask = result.masks.data[index].cpu().numpy()
-                detection_data['mask'] = mask
+        # Adicionar máscara se disponível (recortada na bbox e compactada)
+        if mascaras is not None and len(mascaras) > index:
+            detection_data['mask'] = mascaras[index]
+        
+        # Geometria real da máscara (área, centróide, orientação, polígono)
+        if geometria is not None and len(geometria['area']) > index:
+            detection_data['mask_area'] = float(geometria['area'][index])
+            detection_data['centroid'] = tuple(float(v) for v in geometria['centroid'][index])
+            detection_data['orientation'] = float(geometria['orientation'][index])
+            if geometria['polygon']:
+                detection_data['polygon'] = geometria['polygon'][index]
         
         return detection_data
     
@@ -139,19 +640,41 @@ class DetectionModel:
         if not (min_conf <= detection['confidence'] <= max_conf):
             return False
         
-        # Filtro de área
+        # Filtro de área (bbox ou área real da máscara)
         if self.config.get('precision.area_filter', False):
             min_area = self.config.get('precision.min_area_pixels', 10)
             max_area = self.config.get('precision.max_area_pixels', 999999)
             
-            if not (min_area <= detection['area'] <= max_area):
+            area = detection['area']
+            if self.config.get('precision.area_source', 'bbox') == 'mask':
+                area = detection.get('mask_area', area)
+            # Limites em pixels da captura, mesmo com frames reduzidos na decodificação
+            area *= self.escala_area()
+            
+            if not (min_area <= area <= max_area):
                 return False
         
         return True
     
-    def _desenhar_deteccao(self, frame, detection):
+    def _desenhar_deteccoes(self, frame, detections, scale=1.0):
+        """Desenha todas as detecções, com caixas opcionalmente em um único passo"""
+        if not self.config.get('display.batch_boxes', False):
+            for detection in detections:
+                frame = self._desenhar_deteccao(frame, detection, scale=scale)
+            return frame
+        
+        for detection in detections:
+            frame = self._desenhar_deteccao(frame, detection, desenhar_caixa=False, scale=scale)
+        
+        if self.config.get('display.show_boxes', True):
+            color = tuple(self.config.get('colors.detection_color', [0, 255, 0]))
+            bboxes = [[int(round(v * scale)) for v in d['bbox']] for d in detections]
+            desenhar_caixas(frame, bboxes, color, 2)
+        return frame
+    
+    def _desenhar_deteccao(self, frame, detection, desenhar_caixa=True, scale=1.0):
         """Desenha visualização da detecção"""
-        x1, y1, x2, y2 = detection['bbox']
+        x1, y1, x2, y2 = (int(round(v * scale)) for v in detection['bbox'])
         confidence = detection['confidence']
         
         # Cores
@@ -159,75 +682,71 @@ class DetectionModel:
         text_color = tuple(self.config.get('colors.text_color', [255, 255, 255]))
         
         # Desenhar bounding box
-        if self.config.get('display.show_boxes', True):
+        if desenhar_caixa and self.config.get('display.show_boxes', True):
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
         
-        # Desenhar label e confiança
-        if self.config.get('display.show_labels', True) or self.config.get('display.show_confidence', True):
-            label = ""
-            if self.config.get('display.show_labels', True):
-                label += detection['class_name']
-            if self.config.get('display.show_confidence', True):
-                if label:
-                    label += f" {confidence:.2f}"
-                else:
-                    label = f"{confidence:.2f}"
-            
-            # Background do texto
-            (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-            cv2.rectangle(frame, (x1, y1 - text_height - 10), (x1 + text_width, y1), color, -1)
-            cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, text_color, 2)
+        # Desenhar label e confiança (sprite pré-renderizado em cache)
+        show_labels = self.config.get('display.show_labels', True)
+        show_confidence = self.config.get('display.show_confidence', True)
+        if show_labels or show_confidence:
+            label = self.label_renderer.formatar_label(
+                detection['class_name'], confidence, show_labels, show_confidence
+            )
+            self.label_renderer.desenhar(
+                frame, x1, y1, label, color, text_color,
+                bg_alpha=self.config.get('display.label_alpha', 1.0)
+            )
         
-        # Desenhar máscara
+        # Desenhar máscara (apenas na região da bbox)
         if self.config.get('display.show_masks', True) and 'mask' in detection:
-            mask = detection['mask']
-            
-            # Verificar e ajustar dimensões da máscara
-            if mask.shape != frame.shape[:2]:
-                # Redimensionar máscara para combinar com o frame
-                mask = cv2.resize(mask, (frame.shape[1], frame.shape[0]))
-            
-            # Criar máscara colorida
-            colored_mask = np.zeros_like(frame)
-            colored_mask[:, :] = color
-            
-            # Aplicar máscara com verificação de dimensões
             try:
-                mask_area = mask > 0.5
-                if mask_area.shape == frame.shape[:2]:
-                    frame[mask_area] = cv2.addWeighted(frame, 0.7, colored_mask, 0.3, 0)[mask_area]
-                else:
-                    print(f"DEBUG: Dimensões incompatíveis - mask: {mask_area.shape}, frame: {frame.shape[:2]}")
+                aplicar_mascara(frame, detection['mask'], color, alpha=0.3, scale=scale)
             except Exception as e:
-                print(f"DEBUG: Erro ao aplicar máscara: {e}")
+                logger.debug(f"Erro ao aplicar máscara: {e}")
         
         return frame
     
-    def _atualizar_metricas(self, num_detections):
+    def _atualizar_metricas(self, detections, latencia_ms=None):
         """Atualiza métricas de performance"""
-        # Calcular FPS
-        current_time = time.time()
-        if hasattr(self, 'last_frame_time'):
-            fps = 1.0 / (current_time - self.last_frame_time)
-            self.fps_history.append(fps)
-        self.last_frame_time = current_time
-        
-        # Histórico de detecções
-        self.detection_history.append(num_detections)
+        self.stats.registrar(detections, latencia_ms, escala_area=self.escala_area())
+    
+    def escala_area(self):
+        """Pixels da captura por pixel do frame (camera.decode_factor²; 1 sem redução MJPEG)"""
+        fator = self.config.get('camera.decode_factor') or 1
+        return float(fator * fator)
     
     def get_fps(self):
-        """Retorna FPS médio"""
-        if len(self.fps_history) > 0:
-            return sum(self.fps_history) / len(self.fps_history)
-        return 0.0
+        """Retorna FPS instantâneo (média exponencial dos intervalos)"""
+        return self.stats.fps
     
     def get_detection_count(self):
-        """Retorna contagem média de detecções"""
-        if len(self.detection_history) > 0:
-            return sum(self.detection_history) / len(self.detection_history)
-        return 0.0
+        """Retorna contagem média de detecções por frame no último minuto"""
+        return self.stats.resumo().get('1min', {}).get('detections_per_frame', 0.0)
     
-    def reload_model(self):
-        """Recarrega o modelo (útil quando configurações mudam)"""
-        self.model = self.carregar_modelo()
-        return self.model is not None
\ No newline at end of file
+    def reload_model(self, forcar=False):
+        """
+        Recarrega o modelo (útil quando configurações mudam).
+        O novo modelo é carregado por completo antes da troca; a inferência em
+        andamento continua com a referência antiga e o próximo frame usa a nova.
+        Se o carregamento falhar, o modelo atual é mantido.
+        Retorna True (trocado), False (falha) ou None (pesos e opções inalterados).
+        """
+        chave = self._chave_carga()
+        if not forcar and self.model is not None and chave == self.chave_carga:
+            logger.info("ℹ️ Modelo inalterado (mesmo hash); recarga ignorada")
+            return None
+        
+        novo_modelo = self.carregar_modelo()
+        if novo_modelo is None:
+            logger.warning("⚠️ Novo modelo não carregado; mantendo o modelo atual")
+            return False
+        nova_variante = self.carregar_variante_deteccao(novo_modelo)
+        novo_proposta = self.carregar_modelo_proposta()
+        
+        self.model = novo_modelo
+        self.modelo_deteccao = nova_variante
+        self.modelo_proposta = novo_proposta
+        self.chave_carga = chave
+        self.mask_transforms = {}
+        self.model_version += 1
+        return True
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+🗃️ Frame Cache - MODEL
+Cache de resultados para frames idênticos ou quase idênticos (assinatura por médias de blocos)
+"""
+
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class FrameCache:
+    """
+    Cache limitado (LRU + TTL) de (frame anotado, detecções) indexado pela
+    assinatura do frame: médias de blocos em tons de cinza numa grade grid x grid.
+    Um frame casa com uma entrada se nenhum bloco variar mais que tolerance.
+    """
+
+    def __init__(self, max_entries=8, ttl=5.0, tolerance=4.0, grid=32):
+        self.max_entries = max(int(max_entries), 1)
+        self.ttl = float(ttl)
+        self.tolerance = float(tolerance)
+        self.grid = max(int(grid), 4)
+
+        self.entries = OrderedDict()  # id -> (chave, assinatura, instante, resultado)
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+
+    def assinatura(self, frame):
+        """Médias de blocos (INTER_AREA) do frame em tons de cinza"""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, (self.grid, self.grid), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def buscar(self, frame, chave):
+        """
+        Retorna (assinatura, resultado). resultado é None em caso de miss;
+        a assinatura pode ser reaproveitada em guardar().
+        """
+        assinatura = self.assinatura(frame)
+        agora = time.monotonic()
+
+        # Remover entradas expiradas ou de outra configuração/modelo
+        for entry_id in [i for i, (k, _, t, _) in self.entries.items() if k != chave or agora - t > self.ttl]:
+            del self.entries[entry_id]
+
+        for entry_id, (_, referencia, _, resultado) in self.entries.items():
+            if np.abs(assinatura - referencia).max() <= self.tolerance:
+                self.entries.move_to_end(entry_id)
+                self.hits += 1
+                return assinatura, resultado
+
+        self.misses += 1
+        return assinatura, None
+
+    def guardar(self, assinatura, chave, resultado):
+        """Armazena o resultado, descartando a entrada menos recente se cheio"""
+        self.entries[self.next_id] = (chave, assinatura, time.monotonic(), resultado)
+        self.next_id += 1
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidar(self):
+        """Descarta todas as entradas"""
+        self.entries.clear()
+
+    def get_stats(self):
+        """Estatísticas de acerto do cache"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+            'hit_rate': self.hits / total if total else 0.0
+        }
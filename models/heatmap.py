@@ -0,0 +1,194 @@
+"""
+🔥 Heatmap - MODEL
+Mapa de ocupação incremental (onde as peças se acumulam ou travam) e
+estatísticas de permanência, com decaimento exponencial e memória fixa
+"""
+
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from models.log_manager import get_logger
+
+logger = get_logger('heatmap')
+
+
+class OccupancyHeatmap:
+    """
+    Grade float32 em resolução reduzida (heatmap.grid_width colunas, altura
+    proporcional ao frame). Cada célula acumula os segundos em que um centro
+    (ou máscara) de detecção esteve sobre ela, com decaimento exponencial de
+    meia-vida heatmap.half_life_seconds: não há histórico de frames.
+
+    O decaimento é um fator de escala global (valor real = grade * escala);
+    a grade só é reescalada no lugar quando a escala fica pequena. Assim
+    atualizar() custa O(detecções), independente do tempo de execução.
+    """
+
+    RENORMALIZAR = 1e-3  # escala mínima antes de aplicar o decaimento na grade
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.lock = threading.Lock()
+        self.grade = None
+        self.escala = 1.0
+        self.frame_shape = None
+        self.ultimo = None
+        self.frames = 0
+
+        # Overlay pré-multiplicado (cor * alpha) já no tamanho do frame desenhado
+        self._overlay = None
+        self._overlay_info = None  # (shape, instante)
+
+    def _garantir_grade(self, frame_shape):
+        h, w = frame_shape[:2]
+        if self.grade is not None and self.frame_shape == (h, w):
+            return
+        largura = max(int(self.config.get('heatmap.grid_width', 96)), 8)
+        altura = max(int(round(largura * h / w)), 1)
+        self.grade = np.zeros((altura, largura), dtype=np.float32)
+        self.escala = 1.0
+        self.frame_shape = (h, w)
+        self._overlay = None
+
+    def atualizar(self, detections, frame_shape, timestamp=None):
+        """Decai o mapa pelo tempo decorrido e deposita as detecções do frame"""
+        agora = time.monotonic() if timestamp is None else timestamp
+        with self.lock:
+            self._garantir_grade(frame_shape)
+            dt = 0.0 if self.ultimo is None else max(agora - self.ultimo, 0.0)
+            self.ultimo = agora
+            self.frames += 1
+
+            meia_vida = float(self.config.get('heatmap.half_life_seconds', 300))
+            if dt > 0 and meia_vida > 0:
+                self.escala *= 0.5 ** (dt / meia_vida)
+                if self.escala < self.RENORMALIZAR:
+                    self.grade *= self.escala
+                    self.escala = 1.0
+
+            # Pausas longas (câmera parada) não contam como permanência
+            peso = min(dt, float(self.config.get('heatmap.max_gap_seconds', 1.0)))
+            if peso <= 0 or not detections:
+                return
+            peso /= self.escala
+
+            if self.config.get('heatmap.source', 'center') == 'mask':
+                for detection in detections:
+                    mask = detection.get('mask')
+                    if mask is not None:
+                        self._depositar_mascara(mask, peso)
+                    else:
+                        self._depositar_centro(detection['center'], peso)
+            else:
+                for detection in detections:
+                    self._depositar_centro(detection['center'], peso)
+
+    def _depositar_centro(self, centro, peso):
+        altura, largura = self.grade.shape
+        h, w = self.frame_shape
+        gx = min(max(int(centro[0] * largura / w), 0), largura - 1)
+        gy = min(max(int(centro[1] * altura / h), 0), altura - 1)
+        self.grade[gy, gx] += peso
+
+    def _depositar_mascara(self, mask, peso):
+        """Rasteriza a máscara compacta direto na grade (custo ~ área da bbox em células)"""
+        altura, largura = self.grade.shape
+        h, w = self.frame_shape
+        x1, y1, x2, y2 = mask.bbox
+        gx1 = min(max(int(x1 * largura / w), 0), largura - 1)
+        gy1 = min(max(int(y1 * altura / h), 0), altura - 1)
+        gx2 = min(max(int(np.ceil(x2 * largura / w)), gx1 + 1), largura)
+        gy2 = min(max(int(np.ceil(y2 * altura / h)), gy1 + 1), altura)
+        if mask.shape[0] == 0 or mask.shape[1] == 0:
+            return
+        celulas = mask.to_crop((gx2 - gx1, gy2 - gy1))
+        self.grade[gy1:gy2, gx1:gx2][celulas] += peso
+
+    def valores(self):
+        """Cópia da grade em segundos de permanência (já com decaimento)"""
+        with self.lock:
+            if self.grade is None:
+                return None
+            return self.grade * self.escala
+
+    def get_stats(self):
+        """Pico de permanência (s), posição do pico no frame e fração ocupada"""
+        valores = self.valores()
+        if valores is None:
+            return {'frames': self.frames, 'peak_seconds': 0.0, 'peak_position': None, 'occupied_fraction': 0.0}
+        indice = int(np.argmax(valores))
+        gy, gx = divmod(indice, valores.shape[1])
+        h, w = self.frame_shape
+        minimo = float(self.config.get('heatmap.min_dwell_seconds', 1.0))
+        return {
+            'frames': self.frames,
+            'peak_seconds': float(valores[gy, gx]),
+            'peak_position': (int((gx + 0.5) * w / valores.shape[1]), int((gy + 0.5) * h / valores.shape[0])),
+            'occupied_fraction': float(np.count_nonzero(valores >= minimo)) / valores.size,
+        }
+
+    def _colorir(self, valores, tamanho, alpha=None):
+        """Mapa JET pré-multiplicado pela intensidade, redimensionado para (w, h)"""
+        pico = max(float(valores.max()), float(self.config.get('heatmap.min_dwell_seconds', 1.0)))
+        intensidade = np.clip(valores / pico, 0.0, 1.0)
+        cores = cv2.applyColorMap((intensidade * 255).astype(np.uint8), cv2.COLORMAP_JET)
+        if alpha is None:
+            alpha = float(self.config.get('heatmap.alpha', 0.5))
+        cores = (cores * (intensidade * alpha)[..., None]).astype(np.uint8)
+        return cv2.resize(cores, tamanho, interpolation=cv2.INTER_LINEAR)
+
+    def renderizar(self, frame):
+        """
+        Frame novo com o overlay somado (o original pode estar no cache de frames).
+        O mapa colorido é refeito no máximo a cada heatmap.render_interval s;
+        por frame resta um único cv2.add.
+        """
+        h, w = frame.shape[:2]
+        agora = time.monotonic()
+        intervalo = float(self.config.get('heatmap.render_interval', 0.5))
+        overlay, info = self._overlay, self._overlay_info
+        if overlay is None or info[0] != (h, w) or agora - info[1] >= intervalo:
+            valores = self.valores()
+            if valores is None:
+                return frame
+            overlay = self._colorir(valores, (w, h))
+            self._overlay, self._overlay_info = overlay, ((h, w), agora)
+        if frame.ndim != 3 or frame.shape[2] != 3:
+            return frame
+        return cv2.add(frame, overlay)
+
+    def exportar(self, caminho=None, fundo=None):
+        """
+        Grava o mapa como PNG na resolução do frame. Com 'fundo', o mapa é
+        sobreposto a uma cópia dele. Retorna o caminho gravado ou None.
+        """
+        valores = self.valores()
+        if valores is None:
+            return None
+        if caminho is None:
+            pasta = self.config.get('heatmap.export_dir', './heatmaps')
+            os.makedirs(pasta, exist_ok=True)
+            caminho = os.path.join(pasta, f"heatmap_{time.strftime('%Y%m%d_%H%M%S')}.png")
+
+        h, w = self.frame_shape
+        imagem = self._colorir(valores, (w, h), alpha=None if fundo is not None else 1.0)
+        if fundo is not None:
+            base = fundo if fundo.shape[:2] == (h, w) else cv2.resize(fundo, (w, h), interpolation=cv2.INTER_AREA)
+            imagem = cv2.add(base, imagem)
+        if not cv2.imwrite(caminho, imagem):
+            logger.error(f"❌ Falha ao gravar heatmap: {caminho}")
+            return None
+        return caminho
+
+    def resetar(self):
+        with self.lock:
+            self.grade = None
+            self.frame_shape = None
+            self.escala = 1.0
+            self.ultimo = None
+            self.frames = 0
+            self._overlay = None
@@ -0,0 +1,341 @@
+"""
+🌐 Inference Server - MODEL
+API HTTP local (keep-alive) com agrupamento de requisições em lotes de inferência
+"""
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+from models.log_manager import get_logger
+
+logger = get_logger('server')
+
+# Formato binário: float32 little-endian, uma linha por detecção
+BINARY_FIELDS = ('x1', 'y1', 'x2', 'y2', 'confidence', 'class_id')
+
+
+class _Pedido:
+    """Requisição aguardando vaga em um lote"""
+
+    __slots__ = ('frame', 'mascaras', 'evento', 'detections', 'erro', 'entrada', 'inicio', 'fim', 'lote',
+                 'cancelado')
+
+    def __init__(self, frame, mascaras=False):
+        self.frame = frame
+        self.mascaras = mascaras
+        self.evento = threading.Event()
+        self.cancelado = False  # cliente já recebeu 504: não ocupar vaga em lote
+        self.detections = None
+        self.erro = None
+        self.entrada = time.perf_counter()
+        self.inicio = self.fim = None
+        self.lote = 0
+
+
+class BatchScheduler:
+    """
+    Agrupa requisições concorrentes em um único inferir_lote().
+    O lote fecha ao atingir max_batch ou max_latency_ms após a primeira
+    requisição; uma única thread executa o modelo. Máscaras só são geradas
+    se alguma requisição do lote pediu (inferir_lote(frames, mascaras=...)).
+    Requisições que expiraram na fila são descartadas ao montar o lote.
+    """
+
+    def __init__(self, inferir_lote, max_batch=4, max_latency_ms=10, max_queue=64):
+        self.inferir_lote = inferir_lote
+        self.max_batch = max(int(max_batch), 1)
+        self.max_latency = max(float(max_latency_ms), 0.0) / 1000.0
+        self.fila = queue.Queue(maxsize=max(int(max_queue), 1))
+        self.rodando = True
+        self.lotes = 0
+        self.requisicoes = 0
+        self.canceladas = 0
+        self.thread = threading.Thread(target=self._loop, name='batch-scheduler', daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+
+    def submeter(self, frame, timeout=10.0, mascaras=False):
+        """Enfileira o frame e aguarda as detecções (levanta queue.Full / TimeoutError)"""
+        pedido = _Pedido(frame, mascaras)
+        self.fila.put_nowait(pedido)
+        if not pedido.evento.wait(timeout):
+            pedido.cancelado = True
+            raise TimeoutError("inferência não concluída no prazo")
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido
+
+    def _loop(self):
+        while self.rodando:
+            try:
+                primeiro = self.fila.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if primeiro is None:
+                break
+            if self._descartar(primeiro):
+                continue
+
+            # Janela de latência a partir da chegada da primeira requisição
+            lote = [primeiro]
+            prazo = primeiro.entrada + self.max_latency
+            while len(lote) < self.max_batch:
+                restante = prazo - time.perf_counter()
+                try:
+                    pedido = self.fila.get(timeout=restante) if restante > 0 else self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if pedido is None:
+                    self.rodando = False
+                    break
+                if not self._descartar(pedido):
+                    lote.append(pedido)
+
+            inicio = time.perf_counter()
+            try:
+                resultados = self.inferir_lote([pedido.frame for pedido in lote],
+                                               mascaras=any(pedido.mascaras for pedido in lote))
+                erro = None
+            except Exception as e:
+                resultados, erro = [None] * len(lote), e
+            fim = time.perf_counter()
+
+            self.lotes += 1
+            self.requisicoes += len(lote)
+            for pedido, detections in zip(lote, resultados):
+                pedido.detections, pedido.erro = detections, erro
+                pedido.inicio, pedido.fim, pedido.lote = inicio, fim, len(lote)
+                pedido.frame = None
+                pedido.evento.set()
+
+    def _descartar(self, pedido):
+        """True se ninguém espera mais pelo pedido (timeout no cliente)"""
+        if not pedido.cancelado:
+            return False
+        pedido.frame = None
+        self.canceladas += 1
+        return True
+
+    def get_stats(self):
+        return {
+            'batches': self.lotes,
+            'requests': self.requisicoes,
+            'avg_batch': self.requisicoes / self.lotes if self.lotes else 0.0,
+            'queued': self.fila.qsize(),
+            'cancelled': self.canceladas,
+        }
+
+    def encerrar(self):
+        self.rodando = False
+        try:
+            self.fila.put_nowait(None)
+        except queue.Full:
+            pass
+        if self.thread.is_alive():
+            self.thread.join(timeout=5.0)
+
+
+def decodificar_corpo(body, content_type, shape_header):
+    """
+    Frame BGR a partir do corpo da requisição: imagem codificada (JPEG/PNG)
+    ou array uint8 bruto com X-Shape: altura,largura[,canais] (1, 3 ou 4 canais;
+    cinza e BGRA são convertidos para BGR).
+    """
+    if content_type.startswith('application/octet-stream') and shape_header:
+        shape = tuple(int(v) for v in shape_header.split(','))
+        if len(shape) == 2:
+            shape += (1,)
+        if len(shape) != 3 or np.prod(shape) != len(body):
+            raise ValueError(f"X-Shape {shape_header} incompatível com {len(body)} bytes")
+        if shape[2] not in (1, 3, 4):
+            raise ValueError(f"X-Shape {shape_header}: {shape[2]} canais (use 1, 3 ou 4)")
+        frame = np.frombuffer(body, dtype=np.uint8).reshape(shape)
+        if shape[2] == 1:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        elif shape[2] == 4:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR)
+        return frame
+
+    frame = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("imagem não reconhecida (envie JPEG/PNG ou octet-stream com X-Shape)")
+    return frame
+
+
+def serializar_deteccao(detection, poligonos=False):
+    """Campos JSON de uma detecção (sem a máscara compacta)"""
+    dados = {
+        'bbox': [int(v) for v in detection['bbox']],
+        'confidence': round(float(detection['confidence']), 4),
+        'class_id': int(detection['class_id']),
+        'class_name': detection.get('class_name'),
+        'center': [int(v) for v in detection['center']],
+        'area': float(detection['area']),
+    }
+    for chave in ('mask_area', 'orientation'):
+        if chave in detection:
+            dados[chave] = float(detection[chave])
+    if 'centroid' in detection:
+        dados['centroid'] = [float(v) for v in detection['centroid']]
+    if poligonos and detection.get('polygon'):
+        dados['polygon'] = [[float(x), float(y)] for x, y in detection['polygon']]
+    return dados
+
+
+def empacotar_binario(detections):
+    """Matriz (N, 6) float32 little-endian: x1, y1, x2, y2, confiança, classe"""
+    dados = np.zeros((len(detections), len(BINARY_FIELDS)), dtype='<f4')
+    for i, detection in enumerate(detections):
+        dados[i, :4] = detection['bbox']
+        dados[i, 4] = detection['confidence']
+        dados[i, 5] = detection['class_id']
+    return dados.tobytes()
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /detect  corpo JPEG/PNG ou octet-stream + X-Shape; ?format=json|binary&polygons=1
+    GET  /health  estado do modelo e do agendador
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep-alive (toda resposta tem Content-Length)
+    timeout = 60  # fecha conexões ociosas
+    disable_nagle_algorithm = True  # cabeçalho e corpo saem em writes separados (evita +40 ms de ACK atrasado)
+    server_version = 'YOLODetectionStudio/1.0'
+
+    def do_GET(self):
+        if urlparse(self.path).path != '/health':
+            self._responder_json(404, {'error': 'rota não encontrada'})
+            return
+        detection_model = self.server.detection_model
+        self._responder_json(200, dict(
+            self.server.scheduler.get_stats(),
+            model_loaded=detection_model.model is not None,
+            model_version=detection_model.model_version
+        ))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/detect':
+            self._descartar_corpo()
+            self._responder_json(404, {'error': 'rota não encontrada'})
+            return
+
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            tamanho = -1
+        if tamanho <= 0 or tamanho > self.server.max_body:
+            self.close_connection = True
+            self._responder_json(413 if tamanho > 0 else 411, {'error': 'Content-Length ausente ou grande demais'})
+            return
+        body = self.rfile.read(tamanho)
+
+        params = parse_qs(url.query)
+        formato = params.get('format', [''])[0] or (
+            'binary' if 'application/octet-stream' in self.headers.get('Accept', '') else 'json')
+        # Campos de máscara (polígono, área real, centróide, orientação) só quando pedidos
+        poligonos = formato != 'binary' and params.get('polygons', ['0'])[0] in ('1', 'true')
+
+        try:
+            frame = decodificar_corpo(body, self.headers.get('Content-Type', ''), self.headers.get('X-Shape'))
+        except ValueError as e:
+            self._responder_json(400, {'error': str(e)})
+            return
+
+        try:
+            pedido = self.server.scheduler.submeter(frame, timeout=self.server.inference_timeout,
+                                                    mascaras=poligonos)
+        except queue.Full:
+            self._responder_json(503, {'error': 'fila de inferência cheia'}, {'Retry-After': '1'})
+            return
+        except TimeoutError as e:
+            self._responder_json(504, {'error': str(e)})
+            return
+        except Exception as e:
+            logger.error(f"❌ Erro na inferência via API: {e}")
+            self._responder_json(500, {'error': str(e)})
+            return
+
+        fila_ms = (pedido.inicio - pedido.entrada) * 1000
+        inferencia_ms = (pedido.fim - pedido.inicio) * 1000
+        headers = {
+            'X-Queue-Ms': f"{fila_ms:.2f}",
+            'X-Inference-Ms': f"{inferencia_ms:.2f}",
+            'X-Batch-Size': str(pedido.lote),
+            'X-Detections': str(len(pedido.detections)),
+            'X-Frame-Shape': f"{frame.shape[0]},{frame.shape[1]}",
+            'Server-Timing': f"queue;dur={fila_ms:.2f}, inference;dur={inferencia_ms:.2f}",
+        }
+
+        if formato == 'binary':
+            headers['X-Fields'] = ','.join(BINARY_FIELDS)
+            self._responder(200, empacotar_binario(pedido.detections), 'application/octet-stream', headers)
+        else:
+            self._responder_json(200, {
+                'detections': [serializar_deteccao(d, poligonos) for d in pedido.detections],
+                'width': frame.shape[1],
+                'height': frame.shape[0],
+            }, headers)
+
+    def _descartar_corpo(self):
+        """Consome o corpo não usado para manter a conexão reaproveitável"""
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            tamanho = 0
+        if 0 < tamanho <= self.server.max_body:
+            self.rfile.read(tamanho)
+        elif tamanho:
+            self.close_connection = True
+
+    def _responder_json(self, status, dados, headers=None):
+        corpo = json.dumps(dados, ensure_ascii=False).encode('utf-8')
+        self._responder(status, corpo, 'application/json; charset=utf-8', headers)
+
+    def _responder(self, status, corpo, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(corpo)))
+        for chave, valor in (headers or {}).items():
+            self.send_header(chave, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """Servidor HTTP local: uma thread por conexão, inferência centralizada no BatchScheduler"""
+
+    daemon_threads = True
+
+    def __init__(self, detection_model, config, host=None, port=None):
+        self.detection_model = detection_model
+        max_batch = config.get('server.max_batch', 0) or getattr(detection_model, 'batch_size', 1) or 1
+        self.scheduler = BatchScheduler(
+            detection_model.inferir_lote,
+            max_batch=max_batch,
+            max_latency_ms=config.get('server.max_latency_ms', 10),
+            max_queue=config.get('server.max_queue', 64)
+        )
+        self.max_body = int(config.get('server.max_body_mb', 32) * 1024 * 1024)
+        self.inference_timeout = float(config.get('server.timeout_seconds', 10))
+        super().__init__((host or config.get('server.host', '127.0.0.1'),
+                          int(port if port is not None else config.get('server.port', 8765))),
+                         InferenceRequestHandler)
+        # Só depois do bind: com a porta ocupada nenhuma thread fica para trás
+        self.scheduler.iniciar()
+
+    def server_close(self):
+        super().server_close()
+        self.scheduler.encerrar()
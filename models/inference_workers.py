@@ -0,0 +1,312 @@
+"""
+🧵 Inference Workers - MODEL
+Processos de inferência paralelos com transporte de frames por memória compartilhada
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from models.log_manager import get_logger
+
+logger = get_logger('workers')
+
+
+def _worker_main(worker_id, config_file, config_data, shm_name, slot_bytes,
+                 tasks, results, threads, cpus):
+    """Loop de um processo de inferência (modelo próprio, threads fixas)"""
+    # Limitar threads antes de importar torch/ultralytics
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+    import cv2
+    import torch
+    from models.config_manager import ConfigManager
+    from models.detection_model import DetectionModel
+    from models.log_manager import configurar_logging
+
+    cv2.setNumThreads(1)
+    torch.set_num_threads(threads)
+
+    # O processo pai é o dono do segmento (e do unlink no encerramento)
+    shm = shared_memory.SharedMemory(name=shm_name)
+
+    config = ConfigManager(config_file)
+    config.config = config_data
+    # Só console: o arquivo rotativo pertence ao processo principal
+    configurar_logging(config, arquivo=False)
+    # Threads do worker prevalecem sobre as da calibração (feita para o processo inteiro)
+    model = DetectionModel(config, threads=threads)
+    results.put(('ready', worker_id, model.model is not None))
+
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            seq, slot, shape, mask_scale, new_config = task
+            if new_config is not None:
+                model_path = config.get('model.path')
+                config.config = new_config
+                if config.get('model.path') != model_path:
+                    model.reload_model()
+
+            start = time.perf_counter()
+            try:
+                frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+                detections = model.inferir(frame, mask_scale=mask_scale)
+            except Exception as e:
+                logger.error(f"❌ Erro no worker {worker_id}: {e}")
+                detections = []
+            finally:
+                frame = None
+
+            # O slot volta a ficar livre quando o pai recebe o resultado
+            results.put((seq, worker_id, detections, time.perf_counter() - start))
+    finally:
+        shm.close()
+
+
+class InferencePool:
+    """Pool de processos de inferência com reordenação dos resultados"""
+
+    def __init__(self, config_manager, num_workers=2, threads_per_worker=None,
+                 slots_per_worker=2, pin_cpus=False, max_restarts=3):
+        self.config = config_manager
+        self.num_workers = max(int(num_workers), 1)
+        cpu_count = os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max(cpu_count // self.num_workers, 1)
+        self.num_slots = self.num_workers * max(int(slots_per_worker), 1)
+        self.pin_cpus = pin_cpus
+        self.max_restarts = max(int(max_restarts), 0)
+
+        self.ctx = mp.get_context('spawn')
+        self.shm = None
+        self.slot_bytes = 0
+        self.processes = []
+        self.task_queues = []
+        self.results = None
+        self.free_slots = None
+
+        # Controle de envio e reordenação
+        self.next_seq = 0
+        self.next_output = 0
+        self.inflight = {}  # seq -> (worker_id, slot)
+        self.pending = {}  # seq -> (detections, tempo)
+        self.worker_load = []
+        self.worker_config_version = []
+        self.worker_ready = []
+        self.restarts = 0
+
+    def start(self, frame_nbytes):
+        """Cria a memória compartilhada e inicia os processos"""
+        self.slot_bytes = int(frame_nbytes)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * self.num_slots)
+        self.results = self.ctx.Queue()
+        # Slots livres controlados só pelo pai: um worker morto não leva slots junto
+        self.free_slots = deque(range(self.num_slots))
+
+        for worker_id in range(self.num_workers):
+            self.processes.append(None)
+            self.task_queues.append(None)
+            self.worker_load.append(0)
+            self.worker_config_version.append(None)
+            self.worker_ready.append(False)
+            self._iniciar_worker(worker_id)
+
+        logger.info(f"🧵 {self.num_workers} workers de inferência iniciados "
+                    f"({self.threads_per_worker} threads cada, {self.num_slots} slots)")
+
+    def _iniciar_worker(self, worker_id):
+        """Cria (ou recria) o processo de um worker com a configuração atual"""
+        snapshot = self.config.snapshot()
+        cpus = None
+        if self.pin_cpus:
+            cpu_count = os.cpu_count() or 1
+            first = (worker_id * self.threads_per_worker) % cpu_count
+            cpus = {(first + i) % cpu_count for i in range(self.threads_per_worker)}
+
+        tasks = self.ctx.Queue()
+        process = self.ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.config.config_file, snapshot.data, self.shm.name,
+                  self.slot_bytes, tasks, self.results, self.threads_per_worker, cpus),
+            daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.task_queues[worker_id] = tasks
+        self.worker_load[worker_id] = 0
+        self.worker_config_version[worker_id] = snapshot.version
+        self.worker_ready[worker_id] = False
+
+    def verificar_workers(self):
+        """
+        Detecta workers encerrados (crash, OOM): libera as sequências e os
+        slots presos neles e reinicia o processo até max_restarts vezes no
+        total. Retorna o número de workers vivos.
+        """
+        vivos = 0
+        for worker_id, process in enumerate(self.processes):
+            if process is None:
+                continue
+            if process.is_alive():
+                vivos += 1
+                continue
+
+            perdidos = [seq for seq, (dono, _) in self.inflight.items() if dono == worker_id]
+            for seq in perdidos:
+                _, slot = self.inflight.pop(seq)
+                self.free_slots.append(slot)
+            logger.error(f"❌ Worker {worker_id} encerrado (exitcode {process.exitcode}); "
+                         f"{len(perdidos)} frame(s) descartado(s)")
+
+            self.task_queues[worker_id].close()
+            if self.restarts < self.max_restarts:
+                self.restarts += 1
+                self._iniciar_worker(worker_id)
+                logger.warning(f"🧵 Worker {worker_id} reiniciado ({self.restarts}/{self.max_restarts})")
+                vivos += 1
+            else:
+                self.processes[worker_id] = None
+                self.task_queues[worker_id] = None
+                self.worker_ready[worker_id] = False
+        return vivos
+
+    @property
+    def ready_workers(self):
+        return sum(self.worker_ready)
+
+    def _registrar_resultado(self, item):
+        """Trata uma mensagem da fila de resultados (aviso de pronto ou detecções)"""
+        if item[0] == 'ready':
+            self.worker_ready[item[1]] = True
+            return
+        seq, worker_id, detections, elapsed = item
+        entrada = self.inflight.pop(seq, None)
+        if entrada is None:
+            return  # já descartado (worker dado como morto)
+        self.worker_load[worker_id] = max(self.worker_load[worker_id] - 1, 0)
+        self.free_slots.append(entrada[1])
+        self.pending[seq] = (detections, elapsed)
+
+    def stop(self):
+        """Encerra os processos e libera a memória compartilhada"""
+        for tasks in self.task_queues:
+            if tasks is not None:
+                tasks.put(None)
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(timeout=5.0)
+            if process.is_alive():
+                process.terminate()
+
+        self.processes = []
+        self.task_queues = []
+        self.worker_load = []
+        self.worker_config_version = []
+        self.worker_ready = []
+        self.inflight = {}
+        self.pending = {}
+
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def is_running(self):
+        """Verifica se o pool está ativo (com ao menos um worker vivo)"""
+        return any(process is not None for process in self.processes)
+
+    def submit(self, frame, mask_scale=1.0):
+        """
+        Copia o frame para um slot livre e agenda a inferência.
+        Retorna o número de sequência, ou None se não houver slot livre.
+        """
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame de {frame.nbytes} bytes excede o slot de {self.slot_bytes} bytes")
+
+        vivos = [i for i, process in enumerate(self.processes) if process is not None]
+        if not self.free_slots or not vivos:
+            return None
+        slot = self.free_slots.popleft()
+
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        destino = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+        destino[...] = frame
+        destino = None
+
+        # Worker vivo com menos tarefas pendentes
+        worker_id = min(vivos, key=lambda i: self.worker_load[i])
+        new_config = None
+        if self.worker_config_version[worker_id] != self.config.version:
+            snapshot = self.config.snapshot()
+            new_config = snapshot.data
+            self.worker_config_version[worker_id] = snapshot.version
+
+        seq = self.next_seq
+        self.next_seq += 1
+        self.inflight[seq] = (worker_id, slot)
+        self.worker_load[worker_id] += 1
+        self.task_queues[worker_id].put((seq, slot, frame.shape, mask_scale, new_config))
+        return seq
+
+    def coletar(self, timeout=0.0):
+        """Retorna [(seq, detections, tempo)] prontos, na ordem de envio"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    item = self.results.get(timeout=remaining)
+                else:
+                    item = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            self._registrar_resultado(item)
+
+            # Já há resultado na ordem: apenas drenar o que estiver na fila
+            if self.next_output in self.pending:
+                deadline = 0
+
+        # Depois de drenar a fila: o que um worker morto não entregou é descartado
+        self.verificar_workers()
+
+        ordered = []
+        while True:
+            if self.next_output in self.pending:
+                detections, elapsed = self.pending.pop(self.next_output)
+                ordered.append((self.next_output, detections, elapsed))
+                self.next_output += 1
+            elif self.next_output < self.next_seq and self.next_output not in self.inflight:
+                # Resultado perdido (ex.: worker encerrado): pular
+                self.next_output += 1
+            else:
+                break
+        return ordered
+
+    def aguardar_prontos(self, timeout=120.0):
+        """Bloqueia até todos os workers carregarem o modelo"""
+        deadline = time.perf_counter() + timeout
+        while self.ready_workers < self.num_workers and time.perf_counter() < deadline:
+            if not self.verificar_workers():
+                return False
+            try:
+                item = self.results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._registrar_resultado(item)
+        return self.ready_workers >= self.num_workers
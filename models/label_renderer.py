@@ -0,0 +1,127 @@
+"""
+🏷️ Label Renderer - MODEL
+Cache LRU de rótulos pré-renderizados para os overlays de detecção
+"""
+
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class LabelRenderer:
+    """Renderiza rótulos uma vez e reaproveita os sprites nos frames seguintes"""
+
+    def __init__(self, max_size=256, conf_step=0.01, font_scale=0.6, thickness=2):
+        self.max_size = max_size
+        self.conf_step = conf_step
+        self.font = cv2.FONT_HERSHEY_SIMPLEX
+        self.font_scale = font_scale
+        self.thickness = thickness
+
+        self.sprites = OrderedDict()
+        self.lock = threading.Lock()  # anotação também ocorre fora do loop principal (snapshots, gravação)
+        self.hits = 0
+        self.misses = 0
+
+    def formatar_label(self, class_name, confidence, show_label=True, show_confidence=True):
+        """Monta o texto do rótulo com a confiança quantizada"""
+        label = class_name if show_label else ""
+        if show_confidence:
+            conf = self.quantizar(confidence)
+            label = f"{label} {conf:.2f}" if label else f"{conf:.2f}"
+        return label
+
+    def quantizar(self, confidence):
+        """Quantiza a confiança no passo do cache"""
+        return round(round(float(confidence) / self.conf_step) * self.conf_step, 4)
+
+    def obter_sprite(self, label, color, text_color, bg_alpha=1.0):
+        """Retorna (bgr, alpha) do rótulo, renderizando apenas em caso de miss"""
+        key = (label, tuple(color), tuple(text_color), bg_alpha)
+        with self.lock:
+            sprite = self.sprites.get(key)
+            if sprite is not None:
+                self.sprites.move_to_end(key)
+                self.hits += 1
+                return sprite
+            self.misses += 1
+
+        sprite = self._renderizar(label, color, text_color, bg_alpha)
+        with self.lock:
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_size:
+                self.sprites.popitem(last=False)
+        return sprite
+
+    def _renderizar(self, label, color, text_color, bg_alpha):
+        """Renderiza fundo + texto no mesmo layout do overlay original"""
+        (text_width, text_height), _ = cv2.getTextSize(label, self.font, self.font_scale, self.thickness)
+        height = text_height + 10
+        width = max(text_width, 1)
+
+        # Máscara do texto para compor cor e alpha
+        text_mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.putText(text_mask, label, (0, height - 5), self.font, self.font_scale, 255, self.thickness)
+        text_alpha = text_mask.astype(np.float32)[:, :, None] / 255.0
+
+        bgr = np.empty((height, width, 3), dtype=np.float32)
+        bgr[:] = color
+        bgr = bgr * (1.0 - text_alpha) + np.asarray(text_color, dtype=np.float32) * text_alpha
+        bgr = bgr.astype(np.uint8)
+
+        alpha = np.maximum(text_alpha[:, :, 0], bg_alpha)
+        opaque = bool(alpha.min() >= 1.0)
+        return bgr, (None if opaque else alpha[:, :, None])
+
+    def desenhar(self, frame, x, y, label, color, text_color, bg_alpha=1.0):
+        """Aplica o sprite com o canto inferior esquerdo em (x, y)"""
+        bgr, alpha = self.obter_sprite(label, color, text_color, bg_alpha)
+        height, width = bgr.shape[:2]
+        frame_h, frame_w = frame.shape[:2]
+
+        # Recortar o sprite nas bordas do frame
+        fx1, fy1 = x, y - height
+        sx1, sy1 = max(-fx1, 0), max(-fy1, 0)
+        fx1, fy1 = max(fx1, 0), max(fy1, 0)
+        fx2, fy2 = min(x + width, frame_w), min(y, frame_h)
+        if fx2 <= fx1 or fy2 <= fy1:
+            return frame
+        sx2 = sx1 + (fx2 - fx1)
+        sy2 = sy1 + (fy2 - fy1)
+
+        roi = frame[fy1:fy2, fx1:fx2]
+        if alpha is None:
+            roi[:] = bgr[sy1:sy2, sx1:sx2]
+        else:
+            a = alpha[sy1:sy2, sx1:sx2]
+            roi[:] = (bgr[sy1:sy2, sx1:sx2] * a + roi * (1.0 - a)).astype(frame.dtype)
+        return frame
+
+    def limpar(self):
+        """Esvazia o cache de sprites"""
+        with self.lock:
+            self.sprites.clear()
+
+    def get_stats(self):
+        """Estatísticas de uso do cache"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self.sprites),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+def desenhar_caixas(frame, bboxes, color, thickness=2):
+    """Desenha todas as bounding boxes em uma única chamada de cv2.polylines"""
+    if len(bboxes) == 0:
+        return frame
+    b = np.asarray(bboxes, dtype=np.int32).reshape(-1, 4)
+    polys = np.stack([
+        b[:, [0, 1]], b[:, [2, 1]], b[:, [2, 3]], b[:, [0, 3]]
+    ], axis=1)
+    cv2.polylines(frame, list(polys), True, color, thickness)
+    return frame
@@ -0,0 +1,121 @@
+"""
+📝 Log Manager - MODEL
+Logging estruturado: fila thread-safe, buffer circular em memória e arquivo rotativo
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from collections import deque
+
+LOGGER_NAME = 'yolo_studio'
+
+# Estado global do backend (um por processo)
+_listener = None
+_ring_buffer = None
+
+
+class RingBufferHandler(logging.Handler):
+    """Mantém as últimas N linhas formatadas, com número de sequência crescente"""
+
+    def __init__(self, capacity=1000):
+        super().__init__()
+        self.records = deque(maxlen=max(int(capacity), 1))
+        self.next_seq = 0
+        self.buffer_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.buffer_lock:
+            self.records.append((self.next_seq, record.levelno, line))
+            self.next_seq += 1
+
+    def obter_desde(self, seq, level=logging.NOTSET):
+        """Entradas com sequência >= seq e nível >= level, e a próxima sequência"""
+        with self.buffer_lock:
+            entries = [(s, lvl, line) for s, lvl, line in self.records if s >= seq and lvl >= level]
+            return entries, self.next_seq
+
+
+def configurar_logging(config=None, arquivo=True):
+    """
+    Instala o backend de logging do processo: QueueHandler no logger da
+    aplicação e um QueueListener que despacha para o buffer circular, o arquivo
+    rotativo e o console. Pode ser chamado de novo para aplicar nova configuração.
+    """
+    global _listener, _ring_buffer
+
+    get = config.get if config is not None else (lambda key, default=None: default)
+
+    encerrar_logging()
+
+    formatter = logging.Formatter('[%(asctime)s] %(message)s', datefmt='%H:%M:%S')
+    handlers = []
+
+    _ring_buffer = RingBufferHandler(get('logging.buffer_size', 1000))
+    _ring_buffer.setFormatter(formatter)
+    handlers.append(_ring_buffer)
+
+    aviso = None
+    log_file = get('logging.file', './logs/app.log')
+    if arquivo and log_file:
+        try:
+            directory = os.path.dirname(os.path.abspath(log_file))
+            os.makedirs(directory, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_file,
+                maxBytes=int(get('logging.max_bytes', 1048576)),
+                backupCount=int(get('logging.backup_count', 3)),
+                encoding='utf-8'
+            )
+            file_handler.setFormatter(logging.Formatter(
+                '%(asctime)s %(levelname)-7s %(threadName)s %(name)s: %(message)s'
+            ))
+            handlers.append(file_handler)
+        except OSError as e:
+            aviso = f"⚠️ Arquivo de log indisponível: {e}"
+
+    if get('logging.console', True):
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter('%(message)s'))
+        handlers.append(console)
+
+    log_queue = queue.SimpleQueue()
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(getattr(logging, str(get('logging.level', 'INFO')).upper(), logging.INFO))
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    if aviso:
+        logger.warning(aviso)
+    return _ring_buffer
+
+
+def encerrar_logging():
+    """Esvazia a fila e fecha os handlers (chamar no encerramento)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def get_logger(name):
+    """Logger filho da aplicação (ex.: get_logger('camera'))"""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def get_ring_buffer():
+    """Buffer circular do processo (None antes de configurar_logging)"""
+    return _ring_buffer
@@ -0,0 +1,349 @@
+"""
+🎭 Mask Codec - MODEL
+Representação compacta das máscaras de segmentação (recorte na bbox + bits)
+"""
+
+import cv2
+import numpy as np
+
+# Tabela de contagem de bits por byte (área direto na forma compacta)
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint32)
+
+
+class CompactMask:
+    """Máscara binária recortada na bbox e compactada com np.packbits"""
+
+    __slots__ = ('bbox', 'shape', 'bits')
+
+    def __init__(self, bbox, shape, bits):
+        self.bbox = tuple(int(v) for v in bbox)  # (x1, y1, x2, y2) no frame
+        self.shape = (int(shape[0]), int(shape[1]))  # (h, w) do recorte armazenado
+        self.bits = bits
+
+    @classmethod
+    def from_crop(cls, crop, bbox):
+        """Cria a partir de um recorte booleano já alinhado à bbox"""
+        crop = np.ascontiguousarray(crop, dtype=bool)
+        return cls(bbox, crop.shape[:2], np.packbits(crop, axis=None))
+
+    @classmethod
+    def from_dense(cls, mask, bbox, frame_shape, threshold=0.5, transform=None):
+        """Cria a partir de uma máscara densa (resolução nativa do modelo)"""
+        if transform is None:
+            transform = MaskTransform(mask.shape[:2], frame_shape)
+        return transform.compactar(mask[None], [bbox], threshold=threshold)[0]
+
+    @property
+    def bbox_size(self):
+        """Tamanho (w, h) da bbox no frame"""
+        x1, y1, x2, y2 = self.bbox
+        return x2 - x1, y2 - y1
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelos bits da máscara"""
+        return int(self.bits.nbytes)
+
+    @property
+    def area(self):
+        """Área em pixels do frame, calculada sobre os bits compactados"""
+        h, w = self.shape
+        if h == 0 or w == 0:
+            return 0.0
+        pixels = int(_POPCOUNT[self.bits].sum())
+        bbox_w, bbox_h = self.bbox_size
+        return float(pixels) * (bbox_w * bbox_h) / (h * w)
+
+    def to_crop(self, size=None):
+        """Retorna recorte booleano; redimensiona para size=(w, h) se necessário"""
+        h, w = self.shape
+        crop = np.unpackbits(self.bits, count=h * w).reshape(h, w).astype(bool)
+        if size is not None and (size[0], size[1]) != (w, h) and h > 0 and w > 0:
+            crop = cv2.resize(crop.view(np.uint8), (int(size[0]), int(size[1])),
+                              interpolation=cv2.INTER_NEAREST).astype(bool)
+        return crop
+
+    def to_full(self, frame_shape):
+        """Converte para máscara booleana do tamanho do frame (só quando necessário)"""
+        full = np.zeros(frame_shape[:2], dtype=bool)
+        x1, y1, x2, y2 = self.bbox
+        if x2 > x1 and y2 > y1:
+            full[y1:y2, x1:x2] = self.to_crop(self.bbox_size)
+        return full
+
+    def to_rle(self):
+        """Codifica o recorte em run-length (começando por zeros)"""
+        h, w = self.shape
+        flat = np.unpackbits(self.bits, count=h * w)
+        if flat.size == 0:
+            return []
+        changes = np.flatnonzero(np.diff(flat)) + 1
+        bounds = np.concatenate(([0], changes, [flat.size]))
+        counts = np.diff(bounds).tolist()
+        if flat[0] == 1:
+            counts.insert(0, 0)
+        return counts
+
+    @classmethod
+    def from_rle(cls, bbox, shape, counts):
+        """Reconstrói a máscara a partir do run-length"""
+        values = np.zeros(len(counts), dtype=np.uint8)
+        values[1::2] = 1
+        flat = np.repeat(values, np.asarray(counts, dtype=np.int64))
+        return cls(bbox, shape, np.packbits(flat, axis=None))
+
+    def to_dict(self, rle=True):
+        """Forma serializável (JSON) para persistência"""
+        data = {'bbox': list(self.bbox), 'shape': list(self.shape)}
+        if rle:
+            data['counts'] = self.to_rle()
+        else:
+            data['bits'] = self.bits.tolist()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstrói a máscara a partir de to_dict()"""
+        if 'counts' in data:
+            return cls.from_rle(data['bbox'], data['shape'], data['counts'])
+        return cls(data['bbox'], data['shape'], np.asarray(data['bits'], dtype=np.uint8))
+
+    def __getstate__(self):
+        return self.bbox, self.shape, self.bits
+
+    def __setstate__(self, state):
+        self.bbox, self.shape, self.bits = state
+
+    def __repr__(self):
+        return f"CompactMask(bbox={self.bbox}, shape={self.shape}, nbytes={self.nbytes})"
+
+
+class MaskTransform:
+    """
+    Mapeamento letterbox entre a saída de máscaras do modelo e o frame.
+    Calculado uma vez por par (tamanho de entrada do modelo, tamanho do frame).
+    """
+
+    # Limite de elementos para o resize em lote da união das bboxes
+    MAX_BATCH_ELEMENTS = 8_000_000
+
+    def __init__(self, mask_shape, frame_shape):
+        self.mask_shape = (int(mask_shape[0]), int(mask_shape[1]))
+        self.frame_shape = (int(frame_shape[0]), int(frame_shape[1]))
+        mask_h, mask_w = self.mask_shape
+        frame_h, frame_w = self.frame_shape
+
+        # Mesmo cálculo do letterbox da Ultralytics (escala única + padding centralizado)
+        self.gain = min(mask_h / frame_h, mask_w / frame_w)
+        self.pad_x = (mask_w - frame_w * self.gain) / 2
+        self.pad_y = (mask_h - frame_h * self.gain) / 2
+
+        # Transformação afim máscara -> frame
+        self.affine = np.array([
+            [1 / self.gain, 0, -self.pad_x / self.gain],
+            [0, 1 / self.gain, -self.pad_y / self.gain]
+        ], dtype=np.float64)
+
+        # Região útil da máscara (sem o padding)
+        left = int(round(self.pad_x - 0.1))
+        top = int(round(self.pad_y - 0.1))
+        right = mask_w - int(round(self.pad_x + 0.1))
+        bottom = mask_h - int(round(self.pad_y + 0.1))
+        self.crop = (left, top, right, bottom)
+
+    @property
+    def scale(self):
+        """Escala de pixels da máscara para pixels do frame"""
+        return 1 / self.gain
+
+    @property
+    def offset(self):
+        """Deslocamento (x, y) em pixels do frame causado pelo padding"""
+        return -self.pad_x / self.gain, -self.pad_y / self.gain
+
+    def frame_to_mask(self, x, y):
+        """Converte coordenadas do frame para coordenadas da máscara"""
+        return x * self.gain + self.pad_x, y * self.gain + self.pad_y
+
+    def mask_to_frame(self, x, y):
+        """Converte coordenadas da máscara para coordenadas do frame"""
+        return (x - self.pad_x) / self.gain, (y - self.pad_y) / self.gain
+
+    def recortar(self, masks, bboxes, threshold=0.5, scale=1.0):
+        """
+        Recortes booleanos de cada máscara no tamanho da sua bbox (x scale).
+        Todas as máscaras são redimensionadas juntas, limitadas à união das bboxes.
+        """
+        masks = np.asarray(masks)
+        num = len(bboxes)
+        if num == 0:
+            return []
+
+        bboxes = np.asarray(bboxes, dtype=np.float64).reshape(num, 4)
+        bboxes[:, [0, 2]] = bboxes[:, [0, 2]].clip(0, self.frame_shape[1])
+        bboxes[:, [1, 3]] = bboxes[:, [1, 3]].clip(0, self.frame_shape[0])
+
+        # União das bboxes no espaço da máscara, limitada à região sem padding
+        left, top, right, bottom = self.crop
+        ux1, uy1 = self.frame_to_mask(bboxes[:, 0].min(), bboxes[:, 1].min())
+        ux2, uy2 = self.frame_to_mask(bboxes[:, 2].max(), bboxes[:, 3].max())
+        mx1 = min(max(int(np.floor(ux1)), left), right - 1)
+        my1 = min(max(int(np.floor(uy1)), top), bottom - 1)
+        mx2 = max(min(int(np.ceil(ux2)), right), mx1 + 1)
+        my2 = max(min(int(np.ceil(uy2)), bottom), my1 + 1)
+
+        # Região correspondente no frame (já escalada)
+        rx1, ry1 = self.mask_to_frame(mx1, my1)
+        rx2, ry2 = self.mask_to_frame(mx2, my2)
+        out_w = max(int(round((rx2 - rx1) * scale)), 1)
+        out_h = max(int(round((ry2 - ry1) * scale)), 1)
+
+        if num * out_w * out_h > self.MAX_BATCH_ELEMENTS:
+            # União grande demais: redimensionar cada máscara só na sua bbox
+            return [self._recortar_individual(masks[i], bboxes[i], threshold, scale) for i in range(num)]
+
+        stack = np.ascontiguousarray(masks[:, my1:my2, mx1:mx2].transpose(1, 2, 0), dtype=np.float32)
+        resized = _resize_canais(stack, (out_w, out_h)) > threshold
+
+        crops = []
+        for i in range(num):
+            x1 = int(round((bboxes[i, 0] - rx1) * scale))
+            y1 = int(round((bboxes[i, 1] - ry1) * scale))
+            x2 = int(round((bboxes[i, 2] - rx1) * scale))
+            y2 = int(round((bboxes[i, 3] - ry1) * scale))
+            x1, x2 = min(max(x1, 0), out_w), min(max(x2, 0), out_w)
+            y1, y2 = min(max(y1, 0), out_h), min(max(y2, 0), out_h)
+            crops.append(resized[y1:y2, x1:x2, i])
+        return crops
+
+    def compactar(self, masks, bboxes, threshold=0.5, scale=1.0):
+        """
+        Converte máscaras nativas em CompactMask alinhadas às bboxes.
+        scale < 1 armazena o recorte em resolução reduzida (ex.: a de exibição).
+        """
+        bboxes = [_clip_bbox(bbox, self.frame_shape) for bbox in bboxes]
+        crops = self.recortar(masks, bboxes, threshold=threshold, scale=scale)
+        return [CompactMask.from_crop(crop, bbox) for crop, bbox in zip(crops, bboxes)]
+
+    def _recortar_individual(self, mask, bbox, threshold, scale):
+        """Recorta e redimensiona uma única máscara dentro da sua bbox"""
+        x1, y1, x2, y2 = bbox
+        out_w = int(round((x2 - x1) * scale))
+        out_h = int(round((y2 - y1) * scale))
+        if out_w <= 0 or out_h <= 0:
+            return np.zeros((max(out_h, 0), max(out_w, 0)), dtype=bool)
+
+        mx1, my1 = self.frame_to_mask(x1, y1)
+        mx2, my2 = self.frame_to_mask(x2, y2)
+        ix1 = min(max(int(np.floor(mx1)), 0), self.mask_shape[1] - 1)
+        iy1 = min(max(int(np.floor(my1)), 0), self.mask_shape[0] - 1)
+        ix2 = max(min(int(np.ceil(mx2)), self.mask_shape[1]), ix1 + 1)
+        iy2 = max(min(int(np.ceil(my2)), self.mask_shape[0]), iy1 + 1)
+
+        crop = np.ascontiguousarray(mask[iy1:iy2, ix1:ix2], dtype=np.float32)
+        return cv2.resize(crop, (out_w, out_h), interpolation=cv2.INTER_LINEAR) > threshold
+
+
+def aplicar_mascara(frame, mask, color, alpha=0.3, scale=1.0):
+    """
+    Sobrepõe a máscara compacta no frame, tocando apenas a região da bbox.
+    scale converte as coordenadas do frame original para o frame desenhado.
+    """
+    x1, y1, x2, y2 = (int(round(v * scale)) for v in mask.bbox)
+    frame_h, frame_w = frame.shape[:2]
+    if x2 <= x1 or y2 <= y1 or mask.shape[0] == 0:
+        return frame
+
+    crop = mask.to_crop((x2 - x1, y2 - y1))
+
+    # Recortar a parte que cai fora do frame (ex.: frame de outra resolução)
+    cx1, cy1 = max(x1, 0), max(y1, 0)
+    cx2, cy2 = min(x2, frame_w), min(y2, frame_h)
+    if cx2 <= cx1 or cy2 <= cy1:
+        return frame
+    crop = crop[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1]
+
+    roi = frame[cy1:cy2, cx1:cx2]
+    pixels = roi[crop].astype(np.float32)
+    roi[crop] = (pixels * (1.0 - alpha) + np.asarray(color, dtype=np.float32) * alpha).astype(frame.dtype)
+    return frame
+
+
+def mask_iou_matrix(masks, grid=64):
+    """
+    Matriz (N, N) de IoU entre máscaras compactas.
+    Só os pares cujas bboxes se cruzam são comparados, cada um em uma grade
+    própria sobre a interseção das duas bboxes (lado maior = grid, nunca acima
+    da resolução do frame). As áreas vêm dos bits completos (CompactMask.area):
+    a precisão não depende de onde os pares estão no frame.
+    """
+    n = len(masks)
+    iou = np.zeros((n, n), dtype=np.float32)
+    if n == 0:
+        return iou
+
+    areas = [mask.area for mask in masks]
+    np.fill_diagonal(iou, [1.0 if area > 0 else 0.0 for area in areas])
+
+    bboxes = np.array([m.bbox for m in masks], dtype=np.float64)
+    ix1 = np.maximum(bboxes[:, None, 0], bboxes[None, :, 0])
+    iy1 = np.maximum(bboxes[:, None, 1], bboxes[None, :, 1])
+    ix2 = np.minimum(bboxes[:, None, 2], bboxes[None, :, 2])
+    iy2 = np.minimum(bboxes[:, None, 3], bboxes[None, :, 3])
+    pares = np.argwhere(np.triu((ix2 > ix1) & (iy2 > iy1), k=1))
+
+    crops = {}  # recorte desempacotado uma vez por máscara
+    for i, j in pares:
+        if areas[i] <= 0 or areas[j] <= 0:
+            continue
+        regiao = (ix1[i, j], iy1[i, j], ix2[i, j], iy2[i, j])
+        largura, altura = regiao[2] - regiao[0], regiao[3] - regiao[1]
+        escala = min(grid / max(largura, altura), 1.0)
+        tamanho = (max(int(round(largura * escala)), 1), max(int(round(altura * escala)), 1))
+
+        for k in (i, j):
+            if k not in crops:
+                crops[k] = masks[k].to_crop()
+        a = _rasterizar_regiao(masks[i], crops[i], regiao, tamanho)
+        b = _rasterizar_regiao(masks[j], crops[j], regiao, tamanho)
+
+        inter = np.count_nonzero(a & b) * (largura * altura) / (tamanho[0] * tamanho[1])
+        inter = min(inter, areas[i], areas[j])
+        iou[i, j] = iou[j, i] = inter / max(areas[i] + areas[j] - inter, 1e-9)
+    return iou
+
+
+def _rasterizar_regiao(mask, crop, regiao, size):
+    """Parte da máscara dentro de regiao=(x1, y1, x2, y2) do frame, em size=(w, h)"""
+    x1, y1, x2, y2 = mask.bbox
+    h, w = mask.shape
+    sx, sy = w / max(x2 - x1, 1), h / max(y2 - y1, 1)
+    cx1 = min(max(int(np.floor((regiao[0] - x1) * sx)), 0), w - 1)
+    cy1 = min(max(int(np.floor((regiao[1] - y1) * sy)), 0), h - 1)
+    cx2 = max(min(int(np.ceil((regiao[2] - x1) * sx)), w), cx1 + 1)
+    cy2 = max(min(int(np.ceil((regiao[3] - y1) * sy)), h), cy1 + 1)
+    recorte = crop[cy1:cy2, cx1:cx2].astype(np.uint8)
+    return cv2.resize(recorte, size, interpolation=cv2.INTER_NEAREST).astype(bool)
+
+
+def _resize_canais(stack, size):
+    """cv2.resize de uma pilha (h, w, N), em blocos de até 512 canais"""
+    num = stack.shape[2]
+    if num == 1:
+        return cv2.resize(stack[:, :, 0], size, interpolation=cv2.INTER_LINEAR)[:, :, None]
+    blocos = []
+    for start in range(0, num, 512):
+        bloco = cv2.resize(stack[:, :, start:start + 512], size, interpolation=cv2.INTER_LINEAR)
+        blocos.append(bloco if bloco.ndim == 3 else bloco[:, :, None])
+    return blocos[0] if len(blocos) == 1 else np.concatenate(blocos, axis=2)
+
+
+def _clip_bbox(bbox, frame_shape):
+    """Limita a bbox às dimensões do frame"""
+    frame_h, frame_w = frame_shape[:2]
+    x1, y1, x2, y2 = (int(v) for v in bbox)
+    x1 = min(max(x1, 0), frame_w)
+    x2 = min(max(x2, 0), frame_w)
+    y1 = min(max(y1, 0), frame_h)
+    y2 = min(max(y2, 0), frame_h)
+    return x1, y1, x2, y2
@@ -0,0 +1,98 @@
+"""
+📐 Mask Geometry - MODEL
+Métricas geométricas das máscaras (área, centróide, orientação, polígono) em lote
+"""
+
+import cv2
+import numpy as np
+
+
+def calcular_geometria(masks, frame_shape, threshold=0.5, calcular_poligonos=True, transform=None):
+    """
+    Calcula métricas de todas as máscaras de uma vez, na resolução nativa.
+
+    masks: array (N, h, w) na resolução de saída do modelo
+    frame_shape: shape do frame original, usado apenas para escalar os resultados
+    transform: MaskTransform (letterbox); sem ele a escala é proporcional
+    Retorna dict com arrays 'area', 'centroid', 'orientation' e lista 'polygon'.
+    """
+    masks = np.asarray(masks)
+    num = masks.shape[0]
+    if num == 0:
+        return {
+            'area': np.zeros(0, dtype=np.float32),
+            'centroid': np.zeros((0, 2), dtype=np.float32),
+            'orientation': np.zeros(0, dtype=np.float32),
+            'polygon': []
+        }
+
+    mask_h, mask_w = masks.shape[1:3]
+    if transform is not None:
+        sx = sy = transform.scale
+        ox, oy = transform.offset
+    else:
+        frame_h, frame_w = frame_shape[:2]
+        sx = frame_w / mask_w
+        sy = frame_h / mask_h
+        ox, oy = 0.0, 0.0
+
+    binarias = (masks > threshold).astype(np.float32)
+    xs = np.arange(mask_w, dtype=np.float32)
+    ys = np.arange(mask_h, dtype=np.float32)
+
+    # Projeções por linha/coluna: todos os momentos saem de produtos matriciais
+    linhas = binarias.sum(axis=2)  # (N, h)
+    colunas = binarias.sum(axis=1)  # (N, w)
+    m00 = linhas.sum(axis=1)
+    validas = m00 > 0
+    m00_seguro = np.where(validas, m00, 1.0)
+
+    cx = colunas @ xs / m00_seguro
+    cy = linhas @ ys / m00_seguro
+    m20 = colunas @ (xs * xs) / m00_seguro - cx * cx
+    m02 = linhas @ (ys * ys) / m00_seguro - cy * cy
+    m11 = (binarias.reshape(num * mask_h, mask_w) @ xs).reshape(num, mask_h) @ ys / m00_seguro - cx * cy
+
+    # Escalar momentos centrais para o espaço do frame antes da orientação
+    mu20 = m20 * sx * sx
+    mu02 = m02 * sy * sy
+    mu11 = m11 * sx * sy
+    orientation = 0.5 * np.degrees(np.arctan2(2 * mu11, mu20 - mu02))
+
+    area = m00 * sx * sy
+    centroid = np.stack(((cx + 0.5) * sx + ox, (cy + 0.5) * sy + oy), axis=1)
+    centroid[~validas] = 0
+    orientation[~validas] = 0
+
+    polygons = []
+    if calcular_poligonos:
+        for i in range(num):
+            polygons.append(_extrair_poligono(binarias[i], linhas[i], colunas[i], sx, sy, ox, oy)
+                            if validas[i] else [])
+
+    return {
+        'area': area.astype(np.float32),
+        'centroid': centroid.astype(np.float32),
+        'orientation': orientation.astype(np.float32),
+        'polygon': polygons
+    }
+
+
+def _extrair_poligono(mask, linhas, colunas, sx, sy, ox, oy):
+    """Contorno externo principal, recortado na extensão ocupada da máscara"""
+    ys = np.flatnonzero(linhas)
+    xs = np.flatnonzero(colunas)
+    y1, y2 = ys[0], ys[-1] + 1
+    x1, x2 = xs[0], xs[-1] + 1
+
+    crop = np.ascontiguousarray(mask[y1:y2, x1:x2], dtype=np.uint8)
+    contours, _ = cv2.findContours(crop, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return []
+
+    contorno = max(contours, key=cv2.contourArea)
+    epsilon = 0.005 * cv2.arcLength(contorno, True)
+    contorno = cv2.approxPolyDP(contorno, epsilon, True).reshape(-1, 2).astype(np.float32)
+    contorno[:, 0] = (contorno[:, 0] + x1 + 0.5) * sx + ox
+    contorno[:, 1] = (contorno[:, 1] + y1 + 0.5) * sy + oy
+    return contorno.round().astype(np.int32).tolist()
@@ -0,0 +1,77 @@
+"""
+🗜️ MJPEG Decoder - MODEL
+Decodificação de frames JPEG em pool de threads, com redução opcional no domínio DCT
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Fator de redução -> flag do imdecode (libjpeg reduz na IDCT, sem decodificar a resolução cheia)
+REDUCE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def fator_reducao(frame_width, target_width):
+    """Maior fator (1, 2, 4, 8) que mantém a largura >= target_width"""
+    fator = 1
+    for candidato in (2, 4, 8):
+        if target_width and frame_width // candidato >= target_width:
+            fator = candidato
+    return fator
+
+
+def decodificar_jpeg(data, reduce=1):
+    """Decodifica bytes JPEG (bytes ou array uint8) para BGR"""
+    buffer = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data.reshape(-1)
+    return cv2.imdecode(buffer, REDUCE_FLAGS.get(int(reduce), cv2.IMREAD_COLOR))
+
+
+class MjpegDecoder:
+    """
+    Pool de decodificação com saída na ordem de chegada.
+    O cv2.imdecode libera o GIL, então as threads decodificam em paralelo.
+    """
+
+    def __init__(self, threads=2, reduce=1, pos_processar=None, max_inflight=None):
+        self.threads = max(int(threads), 1)
+        self.reduce = int(reduce)
+        self.pos_processar = pos_processar  # ex.: ajustes de imagem, na mesma thread
+        self.max_inflight = max_inflight or self.threads * 2
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='mjpeg')
+        self.inflight = deque()
+
+    def _decodificar(self, data):
+        frame = decodificar_jpeg(data, self.reduce)
+        if frame is not None and self.pos_processar is not None:
+            frame = self.pos_processar(frame)
+        return frame
+
+    def enviar(self, data):
+        """
+        Agenda a decodificação e retorna os frames já prontos, em ordem.
+        Com a fila cheia, espera o mais antigo (contrapressão para a captura).
+        """
+        prontos = []
+        if len(self.inflight) >= self.max_inflight:
+            prontos.append(self.inflight.popleft().result())
+        self.inflight.append(self.executor.submit(self._decodificar, data))
+        while self.inflight and self.inflight[0].done():
+            prontos.append(self.inflight.popleft().result())
+        return [frame for frame in prontos if frame is not None]
+
+    def drenar(self):
+        """Aguarda e retorna todos os frames pendentes"""
+        prontos = [future.result() for future in self.inflight]
+        self.inflight.clear()
+        return [frame for frame in prontos if frame is not None]
+
+    def encerrar(self):
+        self.executor.shutdown(wait=True)
+        self.inflight.clear()
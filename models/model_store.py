@@ -0,0 +1,170 @@
+"""
+📦 Model Store - MODEL
+Cache local de modelos endereçado por conteúdo: artefatos pré-fundidos, carregados via mmap
+"""
+
+import hashlib
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from models.log_manager import get_logger
+
+logger = get_logger('model_store')
+
+# Hash memorizado por (caminho, tamanho, mtime): reabrir um modelo inalterado não relê o arquivo
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+# A referência ao torch.load em ultralytics.nn.tasks é trocada durante o carregamento
+_carga_lock = threading.Lock()
+
+
+def hash_arquivo(path, chunk_size=1 << 20):
+    """SHA-256 do conteúdo do arquivo"""
+    stat = os.stat(path)
+    chave = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+    with _hashes_lock:
+        digest = _hashes.get(chave)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _hashes_lock:
+        _hashes[chave] = digest
+    return digest
+
+
+class _TorchComMmap:
+    """Proxy do módulo torch em que só load() usa mmap=True"""
+
+    def __init__(self, torch):
+        self._torch = torch
+
+    def __getattr__(self, nome):
+        return getattr(self._torch, nome)
+
+    def load(self, *args, **kwargs):
+        kwargs.setdefault('mmap', True)
+        return self._torch.load(*args, **kwargs)
+
+
+@contextmanager
+def _torch_load_mmap():
+    """
+    Faz o carregador de checkpoints do Ultralytics mapear o arquivo em memória
+    (torch>=2.1). Páginas dos pesos ficam compartilhadas entre recargas e
+    processos de inferência. Só a referência dentro de ultralytics.nn.tasks é
+    trocada: torch.load continua intacto para as outras threads.
+    """
+    import torch
+    from ultralytics.nn import tasks
+
+    if 'mmap' not in inspect.signature(torch.load).parameters:
+        yield False
+        return
+
+    # Versões novas chamam ultralytics.utils.patches.torch_load; as antigas, torch.load
+    if hasattr(tasks, 'torch_load'):
+        nome, original = 'torch_load', tasks.torch_load
+
+        def substituto(*args, **kwargs):
+            kwargs.setdefault('mmap', True)
+            return original(*args, **kwargs)
+    else:
+        nome, original = 'torch', tasks.torch
+        substituto = _TorchComMmap(original)
+
+    with _carga_lock:
+        setattr(tasks, nome, substituto)
+        try:
+            yield True
+        finally:
+            setattr(tasks, nome, original)
+
+
+class ModelStore:
+    """
+    Artefatos em <dir>/<sha256>.pt: checkpoint com o modelo já fundido
+    (Conv+BN), em float32 e modo eval, gerado uma vez por conteúdo do .pt original.
+    """
+
+    def __init__(self, root='./model_store', max_entries=4, mmap=True):
+        self.root = root
+        self.max_entries = max(int(max_entries), 1)
+        self.mmap = mmap
+
+    def caminho(self, digest):
+        return os.path.join(self.root, f"{digest}.pt")
+
+    def obter(self, model_path):
+        """Caminho do artefato pronto para o conteúdo de model_path (gera se necessário)"""
+        digest = hash_arquivo(model_path)
+        destino = self.caminho(digest)
+        if os.path.exists(destino):
+            os.utime(destino)  # recência para a poda
+            return destino
+
+        os.makedirs(self.root, exist_ok=True)
+        start = time.perf_counter()
+        self._construir(model_path, destino, digest)
+        logger.info(f"📦 Artefato {digest[:12]} gerado em {time.perf_counter() - start:.1f} s")
+        self._podar()
+        return destino
+
+    def _construir(self, model_path, destino, digest):
+        """Funde o modelo e grava o checkpoint de forma atômica"""
+        import torch
+        from ultralytics.nn.tasks import torch_safe_load
+
+        ckpt, _ = torch_safe_load(model_path)
+        model = (ckpt.get('ema') or ckpt['model']).float()
+        if hasattr(model, 'fuse'):
+            model = model.fuse(verbose=False)
+        model.eval()
+        for param in model.parameters():
+            param.requires_grad = False
+
+        artefato = {
+            'model': model,
+            'train_args': ckpt.get('train_args', {}),
+            'version': ckpt.get('version'),
+            'date': ckpt.get('date'),
+            'source_hash': digest,
+            'source_path': os.path.abspath(model_path),
+        }
+        temp_path = f"{destino}.{os.getpid()}.tmp"
+        try:
+            torch.save(artefato, temp_path)
+            os.replace(temp_path, destino)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def carregar(self, model_path, **kwargs):
+        """YOLO a partir do artefato (mmap quando disponível)"""
+        from ultralytics import YOLO
+
+        artefato = self.obter(model_path)
+        if not self.mmap:
+            return YOLO(artefato, **kwargs)
+        with _torch_load_mmap():
+            return YOLO(artefato, **kwargs)
+
+    def _podar(self):
+        """Mantém apenas os max_entries artefatos usados mais recentemente"""
+        artefatos = sorted(
+            (os.path.join(self.root, nome) for nome in os.listdir(self.root) if nome.endswith('.pt')),
+            key=os.path.getmtime, reverse=True
+        )
+        for path in artefatos[self.max_entries:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Em uso por outro processo (Windows): fica para a próxima poda
@@ -0,0 +1,195 @@
+"""
+🎚️ Quality Governor - MODEL
+Controle em malha fechada da qualidade: degrada/recupera em uma escada
+(tamanho de inferência, máscaras, stride, resolução de exibição) para
+manter a latência por frame dentro do alvo de governor.target_fps
+"""
+
+import time
+from collections import deque
+
+from models.log_manager import get_logger
+
+logger = get_logger('governor')
+
+ROTULOS = {
+    'model.inference_size': "entrada",
+    'display.show_masks': "máscaras",
+    'pipeline.inference_stride': "stride",
+    'pipeline.annotation_width': "exibição",
+}
+
+
+class QualityGovernor:
+    """
+    Cada nível da escada é um conjunto cumulativo de sobreposições temporárias
+    (ConfigManager.sobrepor): nada é gravado em config.json e o nível 0 é
+    exatamente a configuração do usuário.
+
+    Histerese: degrada só com a latência média acima de alvo * (1 + degrade_margin)
+    por degrade_seconds; recupera só abaixo de alvo * (1 - upgrade_margin) por
+    upgrade_seconds. Após cada troca há cooldown_seconds sem decisões, e uma
+    recuperação desfeita logo em seguida dobra a espera da próxima (até
+    max_upgrade_seconds), evitando oscilar entre dois níveis.
+
+    A latência observada é só a dos frames realmente inferidos, amortizada
+    pelo stride: a do nível atual decide a degradação e a do nível acima a
+    recuperação (voltar do stride 2 para o 1 dobra o custo por frame).
+    """
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.nivel = 0
+        self.escada = [{}]
+        self.media = None
+        self.acima_desde = None
+        self.abaixo_desde = None
+        self.ultima_troca = None
+        self.ultima_direcao = 0
+        self.espera_subida = None
+        self.mudancas = deque(maxlen=20)  # (instante, nível, mensagem)
+
+    def construir_escada(self):
+        """Níveis a partir dos valores do usuário (ignorando as sobreposições atuais)"""
+        base = self.config.get_base
+        escada = [{}]
+        atual = {}
+
+        # 1) Tamanho de entrada (não se aplica ao ONNX INT8, exportado com tamanho fixo)
+        tamanho = int(base('model.inference_size', 640))
+        if base('quantization.mode', 'off') == 'off':
+            for valor in sorted(self.config.get('governor.inference_sizes', [512, 416, 320]), reverse=True):
+                if int(valor) < tamanho:
+                    atual = dict(atual, **{'model.inference_size': int(valor)})
+                    escada.append(atual)
+
+        # 2) Máscaras desligadas (com model.mask_mode "auto" usa a variante só de detecção)
+        if base('display.show_masks', True):
+            atual = dict(atual, **{'display.show_masks': False})
+            escada.append(atual)
+
+        # 3) Stride: inferência a cada N frames, reaproveitando as últimas detecções
+        stride = int(base('pipeline.inference_stride', 1))
+        for valor in sorted(self.config.get('governor.strides', [2, 3])):
+            if int(valor) > stride:
+                atual = dict(atual, **{'pipeline.inference_stride': int(valor)})
+                escada.append(atual)
+
+        # 4) Resolução de exibição/anotação
+        largura = int(base('pipeline.annotation_width', 0))
+        for valor in sorted(self.config.get('governor.display_widths', [640]), reverse=True):
+            if not largura or int(valor) < largura:
+                atual = dict(atual, **{'pipeline.annotation_width': int(valor)})
+                escada.append(atual)
+
+        return escada
+
+    def observar(self, latencia_ms, timestamp=None):
+        """
+        Registra a latência de um frame processado e, se a histerese permitir,
+        troca de nível. Retorna a mensagem da troca ou None.
+        """
+        if not self.config.get('governor.enabled', False):
+            if self.nivel:
+                return self._aplicar(0, "governador desativado")
+            return None
+        if latencia_ms is None:
+            return None
+
+        agora = time.monotonic() if timestamp is None else timestamp
+        suavizacao = float(self.config.get('governor.smoothing', 0.1))
+        self.media = latencia_ms if self.media is None else (1 - suavizacao) * self.media + suavizacao * latencia_ms
+
+        if self.ultima_troca is not None and agora - self.ultima_troca < float(self.config.get('governor.cooldown_seconds', 3)):
+            return None
+
+        alvo = 1000.0 / max(float(self.config.get('governor.target_fps', 15)), 0.1)
+        espera_maxima = float(self.config.get('governor.max_upgrade_seconds', 120))
+        if self.espera_subida is None or (self.ultima_direcao < 0 and agora - self.ultima_troca >= espera_maxima):
+            # Última recuperação se sustentou por tempo suficiente: voltar à espera normal
+            self.espera_subida = float(self.config.get('governor.upgrade_seconds', 10))
+
+        # Custo por frame exibido no nível atual e no nível acima
+        atual = self.media / self._stride(self.nivel)
+        acima = self.media / self._stride(max(self.nivel - 1, 0))
+
+        if atual > alvo * (1 + float(self.config.get('governor.degrade_margin', 0.1))):
+            self.abaixo_desde = None
+            self.acima_desde = self.acima_desde or agora
+            if agora - self.acima_desde >= float(self.config.get('governor.degrade_seconds', 2)):
+                if self.nivel == 0:
+                    self.escada = self.construir_escada()
+                if self.nivel + 1 < len(self.escada):
+                    # Recuperação recém-feita não se sustentou: esperar mais na próxima
+                    if self.ultima_direcao < 0 and agora - self.ultima_troca < self.espera_subida:
+                        self.espera_subida = min(self.espera_subida * 2, espera_maxima)
+                    return self._aplicar(self.nivel + 1, f"latência {atual:.0f} ms > alvo {alvo:.0f} ms", agora)
+        elif acima < alvo * (1 - float(self.config.get('governor.upgrade_margin', 0.25))):
+            self.acima_desde = None
+            self.abaixo_desde = self.abaixo_desde or agora
+            if self.nivel > 0 and agora - self.abaixo_desde >= self.espera_subida:
+                return self._aplicar(self.nivel - 1, f"latência {acima:.0f} ms < alvo {alvo:.0f} ms", agora)
+        else:
+            self.acima_desde = self.abaixo_desde = None
+        return None
+
+    def _stride(self, nivel):
+        """Stride de inferência em um nível da escada (o nível 0 usa o do usuário)"""
+        sobreposicoes = self.escada[nivel] if nivel < len(self.escada) else {}
+        stride = sobreposicoes.get('pipeline.inference_stride',
+                                   self.config.get_base('pipeline.inference_stride', 1))
+        return max(int(stride), 1)
+
+    def _aplicar(self, nivel, motivo, agora=None):
+        anterior = self.escada[self.nivel] if self.nivel < len(self.escada) else {}
+        novo = self.escada[nivel] if nivel else {}
+        for chave in set(anterior) | set(novo):
+            self.config.sobrepor(chave, novo.get(chave))
+
+        direcao = 1 if nivel > self.nivel else -1
+        mensagem = (f"🎚️ Qualidade {'reduzida' if direcao > 0 else 'restaurada'}: nível {nivel}/"
+                    f"{len(self.escada) - 1} ({motivo}) - {self.descrever(novo)}")
+        logger.info(mensagem)
+
+        self.nivel = nivel
+        self.ultima_direcao = direcao
+        self.ultima_troca = time.monotonic() if agora is None else agora
+        self.acima_desde = self.abaixo_desde = None
+        self.media = None  # medir de novo já no nível novo
+        self.mudancas.append((time.strftime('%H:%M:%S'), nivel, mensagem))
+        return mensagem
+
+    def descrever(self, sobreposicoes=None):
+        """Resumo legível das sobreposições de um nível"""
+        if sobreposicoes is None:
+            sobreposicoes = self.escada[self.nivel] if self.nivel else {}
+        if not sobreposicoes:
+            return "configuração do usuário"
+        partes = []
+        for chave, valor in sobreposicoes.items():
+            if chave == 'display.show_masks':
+                valor = "off" if not valor else "on"
+            elif chave == 'pipeline.annotation_width':
+                valor = f"{valor} px"
+            partes.append(f"{ROTULOS.get(chave, chave)} {valor}")
+        return ", ".join(partes)
+
+    def get_stats(self):
+        if self.nivel == 0:
+            self.escada = self.construir_escada()
+        return {
+            'enabled': bool(self.config.get('governor.enabled', False)),
+            'level': self.nivel,
+            'levels': len(self.escada) - 1,
+            'description': self.descrever(),
+            'overrides': dict(self.escada[self.nivel]) if self.nivel else {},
+            'latency_ms': None if self.media is None else self.media / self._stride(self.nivel),
+            'target_ms': 1000.0 / max(float(self.config.get('governor.target_fps', 15)), 0.1),
+            'last_change': self.mudancas[-1][2] if self.mudancas else None,
+        }
+
+    def resetar(self):
+        """Volta ao nível 0 (configuração do usuário)"""
+        if self.nivel:
+            self._aplicar(0, "reset")
+        self.escada = [{}]
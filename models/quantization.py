@@ -0,0 +1,287 @@
+"""
+🗜️ Quantization - MODEL
+Variante INT8 (ONNX Runtime, dinâmica ou estática) do modelo com verificação de paridade
+"""
+
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from models.box_ops import box_iou_matrix
+from models.log_manager import get_logger
+from models.model_store import hash_arquivo
+
+logger = get_logger('quantization')
+
+MODOS = ('dynamic', 'static')
+
+
+def caminho_quantizado(model_path, mode, imgsz):
+    """Artefato INT8 em cache ao lado do modelo original (exportado com entrada fixa imgsz)"""
+    stem, _ = os.path.splitext(model_path)
+    return f"{stem}.int8-{mode}-{int(imgsz)}.onnx"
+
+
+def caminho_relatorio(quantized_path):
+    """Relatório de paridade (JSON) do artefato"""
+    return f"{quantized_path}.json"
+
+
+def selecionar_modelo_quantizado(config, model_path):
+    """
+    (caminho, task) do artefato INT8 a carregar, ou None para usar o FP32.
+    Só é aceito se a paridade foi aprovada para o hash atual do modelo original
+    e se foi exportado com o model.inference_size atual (a entrada do ONNX é fixa).
+    """
+    mode = config.get('quantization.mode', 'off')
+    if mode not in MODOS:
+        return None
+
+    imgsz = int(config.get('model.inference_size', 640))
+    quantized_path = caminho_quantizado(model_path, mode, imgsz)
+    report_path = caminho_relatorio(quantized_path)
+    if not os.path.exists(quantized_path) or not os.path.exists(report_path):
+        logger.warning(f"⚠️ Modelo INT8 ({mode}, {imgsz} px) ainda não gerado; usando FP32")
+        return None
+
+    try:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Relatório de quantização ilegível ({e}); usando FP32")
+        return None
+
+    if report.get('source_hash') != hash_arquivo(model_path):
+        logger.warning("⚠️ Modelo INT8 gerado a partir de outro arquivo; usando FP32")
+        return None
+    if report.get('imgsz') != imgsz:
+        logger.warning(f"⚠️ Modelo INT8 exportado com {report.get('imgsz')} px, entrada atual {imgsz} px; usando FP32")
+        return None
+    if not report.get('approved'):
+        logger.warning(f"⚠️ Modelo INT8 recusado na verificação de paridade: {report.get('reason')}")
+        return None
+    return quantized_path, report.get('task', 'segment')
+
+
+def configurar_threads_onnx(model, onnx_path, threads):
+    """
+    Recria a sessão ONNX Runtime do modelo INT8 com intra_op_num_threads=threads
+    (torch.set_num_threads não alcança o ONNX Runtime, que usa todos os núcleos).
+    A sessão só existe depois da primeira inferência. Retorna True se aplicado.
+    """
+    backend = getattr(getattr(model, 'predictor', None), 'model', None)
+    session = getattr(backend, 'session', None)
+    if session is None or not threads:
+        return False
+    try:
+        import onnxruntime
+    except ImportError:
+        return False
+
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = int(threads)
+    nova = onnxruntime.InferenceSession(onnx_path, sess_options=options, providers=session.get_providers())
+
+    # Entrada de tamanho fixo: o Ultralytics liga as saídas a tensores pré-alocados
+    bindings = getattr(backend, 'bindings', None)
+    if getattr(backend, 'io', None) is not None and bindings:
+        io = nova.io_binding()
+        for output, tensor in zip(nova.get_outputs(), bindings):
+            io.bind_output(name=output.name, device_type='cpu', device_id=0,
+                           element_type=np.float16 if 'float16' in output.type else np.float32,
+                           shape=tuple(tensor.shape), buffer_ptr=tensor.data_ptr())
+        backend.io = io
+    backend.session = nova
+    logger.info(f"🗜️ ONNX Runtime com {int(threads)} threads")
+    return True
+
+
+def carregar_frames_calibracao(directory, limit=100):
+    """Frames BGR de uma pasta de imagens"""
+    paths = sorted(p for ext in ('*.jpg', '*.jpeg', '*.png', '*.bmp')
+                   for p in glob.glob(os.path.join(directory or '', ext)))
+    frames = [cv2.imread(p) for p in paths[:limit]]
+    return [frame for frame in frames if frame is not None]
+
+
+def _letterbox(frame, size):
+    """Pré-processamento equivalente ao do Ultralytics: letterbox, RGB, NCHW float 0-1"""
+    h, w = frame.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    return np.ascontiguousarray(canvas[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+
+
+def exportar_onnx(model_path, imgsz):
+    """
+    Exporta o modelo FP32 para ONNX com entrada fixa imgsz. O export fica em
+    <modelo>.<imgsz>.onnx e só é reaproveitado se for do mesmo tamanho e mais novo.
+    """
+    from ultralytics import YOLO
+
+    onnx_path = f"{os.path.splitext(model_path)[0]}.{int(imgsz)}.onnx"
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(model_path):
+        return onnx_path
+    exported = YOLO(model_path).export(format='onnx', imgsz=int(imgsz), dynamic=False)
+    os.replace(str(exported), onnx_path)
+    return onnx_path
+
+
+def quantizar(model_path, mode, imgsz, frames=None):
+    """Gera o artefato INT8 e retorna o caminho"""
+    try:
+        from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                              quantize_dynamic, quantize_static)
+    except ImportError:
+        raise RuntimeError("Quantização requer onnx e onnxruntime (pip install onnx onnxruntime)")
+
+    fp32_path = exportar_onnx(model_path, imgsz)
+    output_path = caminho_quantizado(model_path, mode, imgsz)
+
+    if mode == 'dynamic':
+        quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QUInt8)
+    elif mode == 'static':
+        if not frames:
+            raise RuntimeError("Calibração estática requer frames de exemplo (quantization.calibration_dir)")
+
+        class _Leitor(CalibrationDataReader):
+            def __init__(self):
+                import onnx
+                self.input_name = onnx.load(fp32_path, load_external_data=False).graph.input[0].name
+                self.iterator = iter(frames)
+
+            def get_next(self):
+                frame = next(self.iterator, None)
+                return None if frame is None else {self.input_name: _letterbox(frame, imgsz)}
+
+        quantize_static(fp32_path, output_path, _Leitor(), quant_format=QuantFormat.QDQ,
+                        per_channel=True, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    else:
+        raise ValueError(f"Modo de quantização inválido: {mode}")
+    return output_path
+
+
+def _mask_iou(a, b):
+    """IoU entre duas máscaras binárias de mesmo shape"""
+    union = np.logical_or(a, b).sum()
+    return float(np.logical_and(a, b).sum() / union) if union else 1.0
+
+
+def verificar_paridade(fp32_model, int8_model, frames, conf=0.25, iou=0.5, imgsz=640):
+    """
+    Compara as detecções FP32 x INT8 nos frames de calibração.
+    Cada box FP32 é pareada com a INT8 de maior IoU (mesma classe).
+    """
+    box_ious, mask_ious, conf_drift = [], [], []
+    total_fp32 = 0
+    encontrados = 0
+
+    for frame in frames:
+        ref = fp32_model(frame, conf=conf, iou=iou, imgsz=imgsz, verbose=False)[0]
+        test = int8_model(frame, conf=conf, iou=iou, imgsz=imgsz, verbose=False)[0]
+        if ref.boxes is None or len(ref.boxes) == 0:
+            continue
+
+        ref_boxes = ref.boxes.xyxy.cpu().numpy()
+        ref_conf = ref.boxes.conf.cpu().numpy()
+        ref_cls = ref.boxes.cls.cpu().numpy()
+        total_fp32 += len(ref_boxes)
+        if test.boxes is None or len(test.boxes) == 0:
+            continue
+
+        test_boxes = test.boxes.xyxy.cpu().numpy()
+        test_conf = test.boxes.conf.cpu().numpy()
+        test_cls = test.boxes.cls.cpu().numpy()
+
+        overlap = box_iou_matrix(ref_boxes, test_boxes)
+        overlap[ref_cls[:, None] != test_cls[None, :]] = 0.0
+        melhor = overlap.argmax(axis=1)
+        melhor_iou = overlap[np.arange(len(ref_boxes)), melhor]
+        pareados = melhor_iou >= 0.5
+        encontrados += int(pareados.sum())
+        box_ious.extend(melhor_iou[pareados].tolist())
+        conf_drift.extend(np.abs(ref_conf[pareados] - test_conf[melhor[pareados]]).tolist())
+
+        if ref.masks is not None and test.masks is not None:
+            ref_masks = ref.masks.data.cpu().numpy() > 0.5
+            test_masks = test.masks.data.cpu().numpy() > 0.5
+            if ref_masks.shape[1:] == test_masks.shape[1:]:
+                for i in np.flatnonzero(pareados):
+                    mask_ious.append(_mask_iou(ref_masks[i], test_masks[melhor[i]]))
+
+    return {
+        'frames': len(frames),
+        'detections_fp32': total_fp32,
+        'recall': encontrados / total_fp32 if total_fp32 else 1.0,
+        'box_iou': float(np.mean(box_ious)) if box_ious else None,
+        'mask_iou': float(np.mean(mask_ious)) if mask_ious else None,
+        'conf_drift': float(np.mean(conf_drift)) if conf_drift else None,
+    }
+
+
+def avaliar_paridade(metricas, config):
+    """(aprovado, motivo) segundo os limites em quantization.*"""
+    if metricas['detections_fp32'] == 0:
+        return False, "nenhuma detecção FP32 nos frames de calibração"
+    limites = [
+        ('recall', 1.0 - config.get('quantization.max_recall_drop', 0.02), 'min'),
+        ('box_iou', config.get('quantization.min_box_iou', 0.9), 'min'),
+        ('mask_iou', config.get('quantization.min_mask_iou', 0.85), 'min'),
+        ('conf_drift', config.get('quantization.max_conf_drift', 0.05), 'max'),
+    ]
+    for nome, limite, tipo in limites:
+        valor = metricas.get(nome)
+        if valor is None:
+            continue
+        if (tipo == 'min' and valor < limite) or (tipo == 'max' and valor > limite):
+            return False, f"{nome}={valor:.3f} (limite {limite:.3f})"
+    return True, "ok"
+
+
+def quantizar_modelo(config, mode=None, progress=None):
+    """
+    Fluxo completo: exporta, quantiza, compara com o FP32 nos frames de
+    calibração e grava o relatório. Retorna o relatório (approved True/False).
+    """
+    from ultralytics import YOLO
+
+    log = progress or logger.info
+    mode = mode or config.get('quantization.mode', 'dynamic')
+    if mode not in MODOS:
+        mode = 'dynamic'
+    model_path = config.get('model.path')
+    imgsz = int(config.get('model.inference_size', 640))
+
+    frames = carregar_frames_calibracao(config.get('quantization.calibration_dir', './calibracao'),
+                                        config.get('quantization.calibration_frames', 100))
+    if not frames:
+        raise RuntimeError("Nenhum frame de calibração: a paridade não pode ser verificada")
+
+    log(f"🗜️ Quantizando ({mode}) com {len(frames)} frames de calibração...")
+    start = time.perf_counter()
+    quantized_path = quantizar(model_path, mode, imgsz, frames)
+
+    log("🗜️ Verificando paridade FP32 x INT8...")
+    task = getattr(YOLO(model_path), 'task', 'segment')
+    metricas = verificar_paridade(
+        YOLO(model_path), YOLO(quantized_path, task=task), frames,
+        conf=config.get('model.confidence_threshold', 0.25),
+        iou=config.get('model.iou_threshold', 0.5), imgsz=imgsz
+    )
+    approved, reason = avaliar_paridade(metricas, config)
+
+    report = dict(metricas, mode=mode, task=task, approved=approved, reason=reason,
+                  source_hash=hash_arquivo(model_path), imgsz=imgsz,
+                  seconds=round(time.perf_counter() - start, 1),
+                  timestamp=time.strftime('%Y-%m-%d %H:%M:%S'))
+    with open(caminho_relatorio(quantized_path), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
@@ -0,0 +1,232 @@
+"""
+🎬 Recorder - MODEL
+Gravação de clipes/snapshots em torno de eventos, com buffer circular pré-gatilho em JPEG
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from models.log_manager import get_logger
+
+logger = get_logger('recorder')
+
+
+class ClipRecorder:
+    """
+    Mantém os últimos recorder.pre_seconds de frames como JPEG (reduzidos para
+    recorder.width) num buffer com limite de memória. Quando uma regra de
+    gatilho casa, continua por recorder.post_seconds e grava clipe ou snapshot
+    anotado. Codificação e escrita rodam em um pool em segundo plano: alimentar()
+    nunca bloqueia o loop de captura/inferência (frames excedentes são descartados).
+    """
+
+    def __init__(self, config_manager, anotar=None):
+        self.config = config_manager
+        self.anotar = anotar  # anotar(frame, detections, scale) -> frame
+
+        self.buffer = deque()  # (timestamp, jpeg, detections, scale)
+        self.buffer_bytes = 0
+        self.buffer_lock = threading.Lock()
+
+        self.executor = None
+        self.pendentes = deque()
+        self.ultimo_frame = 0.0
+        self.evento = None
+        self.ultimo_evento = -float('inf')
+        self.disparo_manual = None  # publicado pela UI, consumido em alimentar()
+
+        self.frames_descartados = 0
+        self.clipes_salvos = 0
+
+    def _obter_executor(self):
+        """Pool de codificação/escrita, criado sob demanda"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=max(int(self.config.get('recorder.workers', 2)), 1),
+                thread_name_prefix='recorder'
+            )
+        return self.executor
+
+    def alimentar(self, frame, detections):
+        """Recebe um frame do pipeline (coordenadas das detecções no frame completo)"""
+        if frame is None or not self.config.get('recorder.enabled', False):
+            return
+
+        agora = time.monotonic()
+
+        # Taxa própria de gravação, independente do FPS da câmera
+        fps = self.config.get('recorder.fps', 10)
+        if fps > 0 and agora - self.ultimo_frame >= 1.0 / fps:
+            self.ultimo_frame = agora
+            while self.pendentes and self.pendentes[0].done():
+                self.pendentes.popleft()
+            if len(self.pendentes) < self.config.get('recorder.max_pending', 8):
+                self.pendentes.append(self._obter_executor().submit(self._codificar, agora, frame, detections))
+            else:
+                self.frames_descartados += 1
+
+        # Gatilhos (o manual ignora o intervalo mínimo entre eventos)
+        if self.evento is None:
+            motivo, self.disparo_manual = self.disparo_manual, None
+            if motivo is None:
+                motivo = self.avaliar_gatilhos(detections)
+                if motivo and agora - self.ultimo_evento < self.config.get('recorder.cooldown_seconds', 10):
+                    motivo = None
+            if motivo:
+                self._iniciar_evento(agora, motivo)
+        elif agora >= self.evento['fim']:
+            self._finalizar_evento()
+
+    def disparar(self, motivo='manual'):
+        """Gatilho manual (aplicado no próximo frame recebido)"""
+        self.disparo_manual = motivo
+
+    def avaliar_gatilhos(self, detections):
+        """Motivo do primeiro gatilho que casa com as detecções, ou None"""
+        for regra in self.config.get('recorder.triggers', []) or []:
+            tipo = regra.get('type')
+            if tipo == 'low_confidence':
+                minimo, maximo = regra.get('min', 0.0), regra.get('max', 0.4)
+                if any(minimo <= d['confidence'] < maximo for d in detections):
+                    return f"confiança baixa ({minimo:.2f}-{maximo:.2f})"
+            elif tipo == 'count':
+                minimo, maximo = regra.get('min', 1), regra.get('max')
+                if len(detections) >= minimo and (maximo is None or len(detections) <= maximo):
+                    return f"{len(detections)} detecções"
+            elif tipo == 'class':
+                ids = set(regra.get('class_ids', []))
+                if any(d['class_id'] in ids for d in detections):
+                    return "classe monitorada"
+        return None
+
+    def _iniciar_evento(self, agora, motivo):
+        # Snapshot não precisa esperar frames pós-gatilho
+        post = 0 if self.config.get('recorder.mode', 'clip') == 'snapshot' else self.config.get('recorder.post_seconds', 3)
+        self.evento = {
+            'inicio': agora,
+            'fim': agora + post,
+            'motivo': motivo,
+            'timestamp': time.strftime('%Y%m%d_%H%M%S')
+        }
+        self.ultimo_evento = agora
+        logger.info(f"🎬 Gatilho de gravação: {motivo}")
+
+    def _finalizar_evento(self):
+        """Agenda a escrita do evento após a codificação dos frames pendentes"""
+        evento, self.evento = self.evento, None
+        self._obter_executor().submit(self._escrever_evento, evento, list(self.pendentes))
+
+    def _codificar(self, timestamp, frame, detections):
+        """Reduz e codifica o frame em JPEG e o insere no buffer circular"""
+        width = self.config.get('recorder.width', 960)
+        scale = 1.0
+        if width and frame.shape[1] > width:
+            scale = width / frame.shape[1]
+            frame = cv2.resize(frame, (width, int(round(frame.shape[0] * scale))), interpolation=cv2.INTER_AREA)
+
+        quality = int(self.config.get('recorder.jpeg_quality', 80))
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            return
+        jpeg = jpeg.tobytes()
+
+        max_bytes = self.config.get('recorder.max_memory_mb', 64) * 1024 * 1024
+        # Margem de 1 s para a escrita encontrar o início da janela pré-gatilho
+        janela = self.config.get('recorder.pre_seconds', 5) + self.config.get('recorder.post_seconds', 3) + 1.0
+        with self.buffer_lock:
+            self.buffer.append((timestamp, jpeg, detections, scale))
+            self.buffer_bytes += len(jpeg)
+
+            # Limites de memória e de tempo (descarta os mais antigos)
+            limite = time.monotonic() - janela
+            while self.buffer and (self.buffer_bytes > max_bytes or self.buffer[0][0] < limite):
+                _, antigo, _, _ = self.buffer.popleft()
+                self.buffer_bytes -= len(antigo)
+
+    def _escrever_evento(self, evento, pendentes):
+        """Decodifica, anota e grava o clipe (ou snapshot) do evento"""
+        wait(pendentes)
+        inicio = evento['inicio'] - self.config.get('recorder.pre_seconds', 5)
+        with self.buffer_lock:
+            entradas = sorted((e for e in self.buffer if inicio <= e[0] <= evento['fim']), key=lambda e: e[0])
+        if not entradas:
+            logger.warning("⚠️ Evento sem frames no buffer de gravação")
+            return
+
+        output_dir = self.config.get('recorder.output_dir', './recordings')
+        os.makedirs(output_dir, exist_ok=True)
+        nome = os.path.join(output_dir, f"evento_{evento['timestamp']}")
+
+        try:
+            if self.config.get('recorder.mode', 'clip') == 'snapshot':
+                # Frame mais próximo do gatilho
+                entrada = min(entradas, key=lambda e: abs(e[0] - evento['inicio']))
+                caminho = f"{nome}.jpg"
+                cv2.imwrite(caminho, self._decodificar(entrada))
+            else:
+                caminho = f"{nome}.mp4"
+                fps = float(self.config.get('recorder.fps', 10))
+                frame = self._decodificar(entradas[0])
+                h, w = frame.shape[:2]
+                writer = cv2.VideoWriter(caminho, cv2.VideoWriter_fourcc(*'mp4v'), fps, (w, h))
+                try:
+                    # Frames chegam em intervalos irregulares (stride, governador, descartes):
+                    # reamostrar pelos timestamps para o clipe tocar em tempo real,
+                    # repetindo o último frame nas lacunas e pulando os excedentes
+                    inicio_clipe = entradas[0][0]
+                    total = int(round((entradas[-1][0] - inicio_clipe) * fps)) + 1
+                    atual = 0
+                    for k in range(total):
+                        instante = inicio_clipe + (k + 0.5) / fps
+                        proximo = atual
+                        while proximo + 1 < len(entradas) and entradas[proximo + 1][0] <= instante:
+                            proximo += 1
+                        if proximo != atual:
+                            atual = proximo
+                            frame = self._decodificar(entradas[atual])
+                            if frame.shape[:2] != (h, w):
+                                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+                        writer.write(frame)
+                finally:
+                    writer.release()
+
+            self.clipes_salvos += 1
+            logger.info(f"🎬 Gravação salva ({evento['motivo']}, {len(entradas)} frames): {caminho}")
+        except Exception as e:
+            logger.error(f"❌ Erro ao gravar evento: {e}")
+
+    def _decodificar(self, entrada):
+        """JPEG -> frame anotado na resolução armazenada"""
+        _, jpeg, detections, scale = entrada
+        frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if self.anotar is not None and detections:
+            frame = self.anotar(frame, detections, scale)
+        return frame
+
+    def get_stats(self):
+        """Estado do buffer e contadores"""
+        with self.buffer_lock:
+            return {
+                'frames': len(self.buffer),
+                'memory_mb': self.buffer_bytes / (1024 * 1024),
+                'dropped': self.frames_descartados,
+                'saved': self.clipes_salvos,
+                'recording': self.evento is not None
+            }
+
+    def encerrar(self):
+        """Finaliza evento em andamento e aguarda as escritas pendentes"""
+        if self.evento is not None:
+            self._finalizar_evento()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        with self.buffer_lock:
+            self.buffer.clear()
+            self.buffer_bytes = 0
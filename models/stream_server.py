@@ -0,0 +1,280 @@
+"""
+📡 Stream Server - MODEL
+Transmissão do vídeo anotado: JPEG codificado uma vez por frame e
+distribuído a qualquer número de clientes MJPEG (HTTP) ou WebSocket
+"""
+
+import base64
+import hashlib
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from models.log_manager import get_logger
+
+logger = get_logger('stream')
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+BOUNDARY = 'frame'
+SEND_BUFFER = 256 * 1024
+
+PAGINA = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>YOLO Detection Studio</title>
+<style>body{margin:0;background:#111;display:flex;justify-content:center}img{max-width:100%;max-height:100vh}</style>
+</head><body><img src="/stream.mjpeg" alt="stream"></body></html>
+""".encode('utf-8')
+
+
+def quadro_websocket(payload):
+    """Frame WebSocket binário (servidor -> cliente, sem máscara)"""
+    tamanho = len(payload)
+    if tamanho < 126:
+        header = struct.pack('!BB', 0x82, tamanho)
+    elif tamanho < 1 << 16:
+        header = struct.pack('!BBH', 0x82, 126, tamanho)
+    else:
+        header = struct.pack('!BBQ', 0x82, 127, tamanho)
+    return header + payload
+
+
+class FrameBroadcaster:
+    """
+    Guarda só o frame mais recente. Uma thread codifica (redução + JPEG) no
+    máximo stream.fps vezes por segundo e apenas com clientes conectados; os
+    bytes prontos (JPEG, parte MJPEG e frame WebSocket) são compartilhados por
+    todos. Cada cliente recebe sempre o último frame: clientes lentos pulam frames.
+    """
+
+    def __init__(self, width=960, quality=75, fps=15):
+        self.width = width
+        self.quality = quality
+        self.fps = fps
+
+        self.condicao = threading.Condition()
+        self.pendente = None  # último frame publicado, ainda não codificado
+        self.seq = 0
+        self.pacote = None  # {'jpeg', 'mjpeg', 'ws'} do frame seq
+        self.clientes = 0
+        self.codificados = 0
+        self.rodando = True
+        self.thread = threading.Thread(target=self._loop, name='stream-encoder', daemon=True)
+
+    def iniciar(self):
+        self.thread.start()
+
+    def publicar(self, frame):
+        """Chamado pelo pipeline: nunca bloqueia nem copia (o frame não é alterado depois)"""
+        if self.clientes == 0:
+            return
+        with self.condicao:
+            self.pendente = frame
+            self.condicao.notify_all()
+
+    def _loop(self):
+        ultimo = 0.0
+        while self.rodando:
+            with self.condicao:
+                while self.rodando and self.pendente is None:
+                    self.condicao.wait(timeout=0.5)
+                frame, self.pendente = self.pendente, None
+            if frame is None:
+                continue
+
+            # Limite de taxa: o frame mais novo que chegar durante a espera substitui este
+            intervalo = 1.0 / self.fps if self.fps > 0 else 0.0
+            espera = ultimo + intervalo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+                with self.condicao:
+                    if self.pendente is not None:
+                        frame, self.pendente = self.pendente, None
+            ultimo = time.monotonic()
+
+            try:
+                jpeg = self._codificar(frame)
+            except Exception as e:
+                logger.error(f"❌ Erro ao codificar frame do stream: {e}")
+                continue
+
+            pacote = {
+                'jpeg': jpeg,
+                'mjpeg': (f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                          f"Content-Length: {len(jpeg)}\r\n\r\n").encode('ascii') + jpeg + b"\r\n",
+                'ws': quadro_websocket(jpeg),
+            }
+            with self.condicao:
+                self.seq += 1
+                self.pacote = pacote
+                self.codificados += 1
+                self.condicao.notify_all()
+
+    def _codificar(self, frame):
+        h, w = frame.shape[:2]
+        if self.width and w > self.width:
+            frame = cv2.resize(frame, (self.width, max(int(round(h * self.width / w)), 1)),
+                               interpolation=cv2.INTER_AREA)
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        if not ok:
+            raise ValueError("falha no imencode")
+        return jpeg.tobytes()
+
+    def aguardar(self, visto, timeout=1.0):
+        """(seq, pacote) mais recente posterior a 'visto', ou (visto, None) no timeout"""
+        with self.condicao:
+            if self.seq == visto:
+                self.condicao.wait_for(lambda: self.seq != visto or not self.rodando, timeout=timeout)
+            if self.seq == visto or self.pacote is None:
+                return visto, None
+            return self.seq, self.pacote
+
+    def conectar(self):
+        with self.condicao:
+            self.clientes += 1
+
+    def desconectar(self):
+        with self.condicao:
+            self.clientes -= 1
+
+    def encerrar(self):
+        self.rodando = False
+        with self.condicao:
+            self.condicao.notify_all()
+        if self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+
+class StreamRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /              página com o stream
+    GET /stream.mjpeg  multipart/x-mixed-replace
+    GET /snapshot.jpg  último frame
+    GET /ws            WebSocket (um frame binário JPEG por mensagem)
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'YOLODetectionStudio/1.0'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/':
+            self._responder(200, PAGINA, 'text/html; charset=utf-8')
+        elif path == '/snapshot.jpg':
+            self._snapshot()
+        elif path == '/stream.mjpeg':
+            self._transmitir(mjpeg=True)
+        elif path == '/ws' and self.headers.get('Upgrade', '').lower() == 'websocket':
+            self._transmitir(mjpeg=False)
+        else:
+            self._responder(404, b'not found', 'text/plain')
+
+    def _snapshot(self):
+        broadcaster = self.server.broadcaster
+        broadcaster.conectar()
+        try:
+            # Sem clientes nada é codificado: esperar um frame novo
+            _, pacote = broadcaster.aguardar(broadcaster.seq, timeout=2.0)
+        finally:
+            broadcaster.desconectar()
+        if pacote is None:
+            self._responder(503, b'sem frames', 'text/plain')
+        else:
+            self._responder(200, pacote['jpeg'], 'image/jpeg')
+
+    def _transmitir(self, mjpeg):
+        servidor = self.server
+        if servidor.broadcaster.clientes >= servidor.max_clients:
+            self._responder(503, b'limite de clientes', 'text/plain')
+            return
+
+        if mjpeg:
+            self.send_response(200)
+            self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+            self.send_header('Cache-Control', 'no-cache, private')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            chave = 'mjpeg'
+        else:
+            aceite = base64.b64encode(hashlib.sha1(
+                (self.headers.get('Sec-WebSocket-Key', '') + WS_GUID).encode('ascii')).digest()).decode('ascii')
+            self.send_response(101, 'Switching Protocols')
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', aceite)
+            self.end_headers()
+            chave = 'ws'
+        self.close_connection = True
+
+        # Escrita bloqueante com prazo: cliente travado é desconectado, nunca enfileirado.
+        # Buffer de envio pequeno: o atraso de um cliente lento fica em poucos frames
+        self.connection.settimeout(servidor.send_timeout)
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        broadcaster = servidor.broadcaster
+        broadcaster.conectar()
+        cliente = self.address_string()
+        logger.info(f"📡 Cliente conectado ({'MJPEG' if mjpeg else 'WebSocket'}): {cliente}")
+        visto = broadcaster.seq
+        try:
+            while servidor.rodando:
+                visto, pacote = broadcaster.aguardar(visto)
+                if pacote is not None:
+                    self.wfile.write(pacote[chave])
+        except (OSError, socket.timeout):
+            pass
+        finally:
+            broadcaster.desconectar()
+            logger.info(f"📡 Cliente desconectado: {cliente}")
+
+    def _responder(self, status, corpo, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class StreamServer(ThreadingHTTPServer):
+    """Servidor do stream anotado (stream.*), em thread própria"""
+
+    daemon_threads = True
+
+    def __init__(self, config):
+        self.broadcaster = FrameBroadcaster(
+            width=config.get('stream.width', 960),
+            quality=config.get('stream.jpeg_quality', 75),
+            fps=config.get('stream.fps', 15)
+        )
+        self.max_clients = config.get('stream.max_clients', 16)
+        self.send_timeout = float(config.get('stream.send_timeout', 5.0))
+        self.rodando = True
+        super().__init__((config.get('stream.host', '127.0.0.1'), int(config.get('stream.port', 8766))),
+                         StreamRequestHandler)
+        self.thread = threading.Thread(target=self.serve_forever, name='stream-server', daemon=True)
+
+    def iniciar(self):
+        # O encoder só sobe depois do bind (feito no __init__): se a porta
+        # estiver ocupada, nenhuma thread fica para trás
+        self.broadcaster.iniciar()
+        self.thread.start()
+        host, port = self.server_address[:2]
+        logger.info(f"📡 Stream em http://{host}:{port}/ (MJPEG /stream.mjpeg, WebSocket /ws)")
+
+    def publicar(self, frame):
+        self.broadcaster.publicar(frame)
+
+    def get_stats(self):
+        return {'clients': self.broadcaster.clientes, 'encoded': self.broadcaster.codificados}
+
+    def encerrar(self):
+        self.rodando = False
+        self.broadcaster.encerrar()
+        if self.thread.is_alive():
+            self.shutdown()  # sem serve_forever rodando, shutdown() esperaria para sempre
+        self.server_close()
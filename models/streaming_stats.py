@@ -0,0 +1,222 @@
+"""
+📈 Streaming Stats - MODEL
+Estatísticas de detecção em memória fixa: janelas deslizantes (1 min, 15 min,
+turno) em baldes de contadores e esboços de quantis para confiança, área e latência
+"""
+
+import json
+import math
+import threading
+import time
+
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Histograma de bins fixos. Com bins logarítmicos de razão
+    (1 + accuracy) / (1 - accuracy), o quantil estimado tem erro relativo
+    de no máximo accuracy (mesma ideia do DDSketch). O esboço só descreve os
+    bins: as contagens ficam nas janelas, que somam baldes entre si.
+    """
+
+    def __init__(self, bordas, geometrico=False):
+        self.bordas = np.asarray(bordas, dtype=np.float64)
+        self.internas = self.bordas[1:-1]  # busca direta no bin, já limitada a [0, bins - 1]
+        if geometrico:
+            self.centros = np.sqrt(self.bordas[:-1] * self.bordas[1:])
+        else:
+            self.centros = (self.bordas[:-1] + self.bordas[1:]) / 2
+
+    @classmethod
+    def linear(cls, minimo, maximo, bins):
+        return cls(np.linspace(minimo, maximo, int(bins) + 1))
+
+    @classmethod
+    def logaritmico(cls, minimo, maximo, accuracy=0.02):
+        gamma = (1 + accuracy) / (1 - accuracy)
+        bins = int(math.ceil(math.log(maximo / minimo) / math.log(gamma)))
+        return cls(minimo * gamma ** np.arange(bins + 1), geometrico=True)
+
+    @property
+    def bins(self):
+        return len(self.centros)
+
+    def indices(self, valores):
+        """Bin de cada valor (fora da faixa vai para o primeiro/último bin)"""
+        return np.searchsorted(self.internas, valores, side='right')
+
+    def quantis(self, contagens, qs):
+        """Valores aproximados dos quantis qs, ou None sem amostras"""
+        acumulado = np.cumsum(contagens)
+        total = int(acumulado[-1]) if len(acumulado) else 0
+        if total == 0:
+            return [None] * len(qs)
+        alvos = np.maximum(np.asarray(qs, dtype=np.float64) * total, 1)
+        return [float(v) for v in self.centros[np.searchsorted(acumulado, alvos, side='left')]]
+
+
+class RollingWindow:
+    """
+    Janela de 'duracao' segundos em baldes circulares. Cada balde guarda os
+    contadores e as contagens de todos os esboços do seu intervalo; um balde
+    vencido é zerado ao ser reutilizado. Memória: baldes x (contadores + bins).
+    """
+
+    CONTADORES = ('frames', 'detections', 'frames_with_detections', 'latency_sum', 'latency_frames')
+
+    def __init__(self, nome, duracao, baldes, bins):
+        self.nome = nome
+        self.duracao = float(duracao)
+        self.baldes = int(baldes)
+        self.largura = self.duracao / self.baldes
+        self.ids = np.full(self.baldes, -1, dtype=np.int64)
+        self.contadores = np.zeros((self.baldes, len(self.CONTADORES)), dtype=np.float64)
+        self.histogramas = np.zeros((self.baldes, bins), dtype=np.uint32)
+
+    def registrar(self, agora, contadores, indices):
+        balde = int(agora // self.largura)
+        slot = balde % self.baldes
+        if self.ids[slot] != balde:
+            self.ids[slot] = balde
+            self.contadores[slot] = 0
+            self.histogramas[slot] = 0
+        self.contadores[slot] += contadores
+        if len(indices):
+            np.add.at(self.histogramas[slot], indices, 1)
+
+    def agregar(self, agora):
+        """(contadores somados, histograma somado, início da janela)"""
+        atual = int(agora // self.largura)
+        validos = (self.ids > atual - self.baldes) & (self.ids <= atual)
+        inicio = (atual - self.baldes + 1) * self.largura
+        return self.contadores[validos].sum(axis=0), self.histogramas[validos].sum(axis=0), inicio
+
+    def resetar(self):
+        self.ids[:] = -1
+        self.contadores[:] = 0
+        self.histogramas[:] = 0
+
+
+class StreamingStats:
+    """
+    Atualizada a cada frame em O(detecções): cada janela recebe os contadores
+    do frame e um np.add.at com os bins de confiança, área e latência.
+    Consultas (resumo) somam no máximo 'baldes' linhas por janela.
+    """
+
+    def __init__(self, config):
+        accuracy = float(config.get('stats.accuracy', 0.02))
+        self.quantis = [float(q) for q in config.get('stats.quantiles', [0.5, 0.9, 0.99])]
+        self.esbocos = {
+            'confidence': QuantileSketch.linear(0.0, 1.0, 100),
+            'area': QuantileSketch.logaritmico(1.0, 1e8, accuracy),
+            'latency_ms': QuantileSketch.logaritmico(0.1, 1e5, accuracy),
+        }
+        self.offsets = {}
+        bins = 0
+        for nome, esboco in self.esbocos.items():
+            self.offsets[nome] = bins
+            bins += esboco.bins
+
+        turno = float(config.get('stats.shift_hours', 8)) * 3600
+        self.janelas = [
+            RollingWindow('1min', 60, 12, bins),
+            RollingWindow('15min', 900, 30, bins),
+            RollingWindow('shift', turno, 48, bins),
+        ]
+
+        self.lock = threading.Lock()
+        self.inicio = None
+        self.ultimo = None
+        self.fps = 0.0  # média exponencial dos intervalos entre frames (valor instantâneo da UI)
+        self.latencia_ms = None  # latência do último frame inferido (entrada do governador de qualidade)
+        self.medicoes = 0  # latências registradas (o governador só observa medições novas)
+
+    def registrar(self, detections, latencia_ms=None, timestamp=None, escala_area=1.0):
+        """Contabiliza um frame processado (escala_area converte áreas para pixels da captura)"""
+        agora = time.monotonic() if timestamp is None else timestamp
+        n = len(detections)
+
+        partes = []
+        if n:
+            confiancas = [d['confidence'] for d in detections]
+            areas = [d.get('mask_area', d['area']) * escala_area for d in detections]
+            partes.append(self.esbocos['confidence'].indices(confiancas) + self.offsets['confidence'])
+            partes.append(self.esbocos['area'].indices(areas) + self.offsets['area'])
+        if latencia_ms is not None:
+            partes.append(self.esbocos['latency_ms'].indices([latencia_ms]) + self.offsets['latency_ms'])
+        indices = np.concatenate(partes) if partes else ()
+
+        contadores = np.array([1, n, 1 if n else 0,
+                               latencia_ms or 0.0, 0 if latencia_ms is None else 1], dtype=np.float64)
+
+        with self.lock:
+            if self.inicio is None:
+                self.inicio = agora
+            self._marcar(agora)
+            if latencia_ms is not None:
+                self.latencia_ms = latencia_ms
+                self.medicoes += 1
+            for janela in self.janelas:
+                janela.registrar(agora, contadores, indices)
+
+    def registrar_exibicao(self, timestamp=None):
+        """
+        Frame exibido sem inferência (stride ou cache): entra só no FPS
+        instantâneo; detecções e latência reaproveitadas não são recontadas
+        """
+        agora = time.monotonic() if timestamp is None else timestamp
+        with self.lock:
+            self._marcar(agora)
+
+    def _marcar(self, agora):
+        if self.ultimo is not None and agora > self.ultimo:
+            instantaneo = 1.0 / (agora - self.ultimo)
+            self.fps = instantaneo if self.fps == 0 else 0.9 * self.fps + 0.1 * instantaneo
+        self.ultimo = agora
+
+    def resumo(self, timestamp=None):
+        """Dicionário serializável em JSON com taxas e quantis por janela"""
+        agora = time.monotonic() if timestamp is None else timestamp
+        resultado = {}
+        with self.lock:
+            if self.inicio is None:
+                return resultado
+            agregados = [(janela, janela.agregar(agora)) for janela in self.janelas]
+
+        for janela, (contadores, histograma, inicio) in agregados:
+            frames, detections, com_deteccao, latencia, frames_latencia = (float(v) for v in contadores)
+            segundos = max(agora - max(inicio, self.inicio), 1e-6)
+            dados = {
+                'seconds': round(segundos, 1),
+                'frames': int(frames),
+                'detections': int(detections),
+                'fps': frames / segundos,
+                'detections_per_frame': detections / frames if frames else 0.0,
+                'detections_per_minute': detections / segundos * 60,
+                'frames_with_detections': com_deteccao / frames if frames else 0.0,
+                'latency_ms_mean': latencia / frames_latencia if frames_latencia else None,
+            }
+            for nome, esboco in self.esbocos.items():
+                offset = self.offsets[nome]
+                valores = esboco.quantis(histograma[offset:offset + esboco.bins], self.quantis)
+                dados[nome] = {f"p{q * 100:g}": v for q, v in zip(self.quantis, valores)}
+            resultado[janela.nome] = dados
+        return resultado
+
+    def exportar(self, caminho):
+        """Grava o resumo atual em JSON"""
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'windows': self.resumo()},
+                      f, indent=2, ensure_ascii=False)
+        return caminho
+
+    def resetar(self):
+        with self.lock:
+            for janela in self.janelas:
+                janela.resetar()
+            self.inicio = self.ultimo = None
+            self.fps = 0.0
+            self.latencia_ms = None
+            self.medicoes = 0
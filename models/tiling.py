@@ -0,0 +1,167 @@
+"""
+🧩 Tiling - MODEL
+Divisão do frame em tiles/recortes sobrepostos e fusão das detecções (estilo SAHI)
+"""
+
+import cv2
+import numpy as np
+
+from models.box_ops import box_iou_matrix
+from models.mask_codec import CompactMask
+from models.mask_geometry import calcular_geometria
+
+
+def gerar_tiles(frame_shape, rows=2, cols=3, overlap=0.2):
+    """Regiões (x1, y1, x2, y2) de uma grade rows x cols com sobreposição fracionária"""
+    frame_h, frame_w = frame_shape[:2]
+    rows = max(int(rows), 1)
+    cols = max(int(cols), 1)
+    overlap = min(max(float(overlap), 0.0), 0.9)
+
+    # Tamanho do tile tal que a grade cubra o frame com a sobreposição pedida
+    tile_w = int(np.ceil(frame_w / (cols - overlap * (cols - 1))))
+    tile_h = int(np.ceil(frame_h / (rows - overlap * (rows - 1))))
+    tile_w = min(tile_w, frame_w)
+    tile_h = min(tile_h, frame_h)
+
+    xs = np.linspace(0, frame_w - tile_w, cols).round().astype(int) if cols > 1 else [0]
+    ys = np.linspace(0, frame_h - tile_h, rows).round().astype(int) if rows > 1 else [0]
+    return [(int(x), int(y), int(x) + tile_w, int(y) + tile_h) for y in ys for x in xs]
+
+
+def regioes_candidatas(boxes, frame_shape, padding=0.2, min_size=96):
+    """
+    Recortes (x1, y1, x2, y2) com margem em volta das propostas (fração da box,
+    com lado mínimo min_size). Recortes que se sobrepõem são unidos.
+    """
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    if len(boxes) == 0:
+        return []
+
+    frame_h, frame_w = frame_shape[:2]
+    w = boxes[:, 2] - boxes[:, 0]
+    h = boxes[:, 3] - boxes[:, 1]
+    pad_x = np.maximum(w * padding, (min_size - w) / 2).clip(min=0)
+    pad_y = np.maximum(h * padding, (min_size - h) / 2).clip(min=0)
+    regioes = np.stack([boxes[:, 0] - pad_x, boxes[:, 1] - pad_y,
+                        boxes[:, 2] + pad_x, boxes[:, 3] + pad_y], axis=1)
+    regioes = np.clip(regioes, 0, [frame_w, frame_h, frame_w, frame_h])
+
+    # União das regiões sobrepostas até estabilizar (poucas propostas por frame)
+    unidas = [r for r in regioes]
+    mudou = True
+    while mudou and len(unidas) > 1:
+        mudou = False
+        resultado = []
+        for regiao in unidas:
+            for i, outra in enumerate(resultado):
+                if regiao[0] < outra[2] and outra[0] < regiao[2] and regiao[1] < outra[3] and outra[1] < regiao[3]:
+                    resultado[i] = np.concatenate([np.minimum(regiao[:2], outra[:2]), np.maximum(regiao[2:], outra[2:])])
+                    mudou = True
+                    break
+            else:
+                resultado.append(regiao)
+        unidas = resultado
+
+    return [(int(x1), int(y1), int(np.ceil(x2)), int(np.ceil(y2)))
+            for x1, y1, x2, y2 in unidas if x2 - x1 >= 1 and y2 - y1 >= 1]
+
+
+def deslocar_deteccao(detection, dx, dy):
+    """Move uma detecção de coordenadas do tile para coordenadas do frame"""
+    if dx == 0 and dy == 0:
+        return detection
+
+    x1, y1, x2, y2 = detection['bbox']
+    detection['bbox'] = [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+    cx, cy = detection['center']
+    detection['center'] = (cx + dx, cy + dy)
+
+    if 'centroid' in detection:
+        cx, cy = detection['centroid']
+        detection['centroid'] = (cx + dx, cy + dy)
+    if detection.get('polygon'):
+        detection['polygon'] = [[x + dx, y + dy] for x, y in detection['polygon']]
+    if 'mask' in detection:
+        mask = detection['mask']
+        mx1, my1, mx2, my2 = mask.bbox
+        detection['mask'] = CompactMask((mx1 + dx, my1 + dy, mx2 + dx, my2 + dy), mask.shape, mask.bits)
+    return detection
+
+
+def mesclar_deteccoes(detections, iou_threshold=0.4, metric='ios', calcular_poligonos=True):
+    """
+    Funde duplicatas entre tiles com NMM guloso (como no SAHI): em ordem de
+    confiança, cada detecção absorve as da mesma classe que se sobrepõem a ela
+    acima do limiar, e o grupo vira a união das caixas e das máscaras.
+    Com 'ios' (interseção sobre a menor), o pedaço cortado na borda de um tile
+    completa a peça em vez de substituí-la quando tem confiança maior.
+    """
+    if len(detections) <= 1:
+        return detections
+
+    boxes = np.array([d['bbox'] for d in detections], dtype=np.float32)
+    scores = np.array([d['confidence'] for d in detections], dtype=np.float32)
+    classes = np.array([d['class_id'] for d in detections])
+    vizinhos = (box_iou_matrix(boxes, boxes, metric) > iou_threshold) & (classes[:, None] == classes[None, :])
+
+    livres = np.ones(len(detections), dtype=bool)
+    mescladas = []
+    for i in np.argsort(-scores, kind='stable'):
+        if not livres[i]:
+            continue
+        grupo = np.flatnonzero(vizinhos[i] & livres)
+        livres[grupo] = False
+        if len(grupo) <= 1:
+            mescladas.append(detections[i])
+            continue
+        membros = [detections[i]] + [detections[j] for j in grupo if j != i]
+        mescladas.append(_fundir_grupo(membros, calcular_poligonos))
+    return mescladas
+
+
+def _fundir_grupo(membros, calcular_poligonos=True):
+    """União de um grupo de detecções (o primeiro membro, de maior confiança, dá classe e score)"""
+    bboxes = np.array([d['bbox'] for d in membros], dtype=np.int64)
+    x1, y1 = (int(v) for v in bboxes[:, :2].min(axis=0))
+    x2, y2 = (int(v) for v in bboxes[:, 2:].max(axis=0))
+
+    fundida = dict(membros[0])
+    fundida['bbox'] = [x1, y1, x2, y2]
+    fundida['center'] = (int((x1 + x2) / 2), int((y1 + y2) / 2))
+    fundida['area'] = float((x2 - x1) * (y2 - y1))
+
+    mascaras = [d['mask'] for d in membros if d.get('mask') is not None]
+    if not mascaras or x2 <= x1 or y2 <= y1:
+        return fundida
+
+    # OR das máscaras em resolução cheia dentro da caixa unida
+    uniao = np.zeros((y2 - y1, x2 - x1), dtype=bool)
+    for mask in mascaras:
+        mx1, my1, mx2, my2 = mask.bbox
+        cx1, cy1 = max(mx1, x1), max(my1, y1)
+        cx2, cy2 = min(mx2, x2), min(my2, y2)
+        if cx2 <= cx1 or cy2 <= cy1 or mask.shape[0] == 0 or mask.shape[1] == 0:
+            continue
+        crop = mask.to_crop(mask.bbox_size)
+        uniao[cy1 - y1:cy2 - y1, cx1 - x1:cx2 - x1] |= crop[cy1 - my1:cy2 - my1, cx1 - mx1:cx2 - mx1]
+
+    # Armazenar na mesma resolução relativa da máscara do líder (mask_scale)
+    lider = mascaras[0]
+    escala = lider.shape[1] / lider.bbox_size[0] if lider.bbox_size[0] > 0 else 1.0
+    armazenada = uniao
+    if abs(escala - 1.0) > 1e-3:
+        tamanho = (max(int(round((x2 - x1) * escala)), 1), max(int(round((y2 - y1) * escala)), 1))
+        armazenada = cv2.resize(uniao.view(np.uint8), tamanho, interpolation=cv2.INTER_NEAREST).astype(bool)
+    fundida['mask'] = CompactMask.from_crop(armazenada, (x1, y1, x2, y2))
+
+    # Geometria da máscara unida (recorte em pixels do frame, deslocado para a caixa)
+    if 'mask_area' in fundida:
+        geometria = calcular_geometria(uniao[None], uniao.shape, calcular_poligonos=calcular_poligonos)
+        fundida['mask_area'] = float(geometria['area'][0])
+        cx, cy = geometria['centroid'][0]
+        fundida['centroid'] = (float(cx + x1), float(cy + y1))
+        fundida['orientation'] = float(geometria['orientation'][0])
+        if geometria['polygon']:
+            fundida['polygon'] = [[x + x1, y + y1] for x, y in geometria['polygon'][0]]
+    return fundida
@@ -7,12 +7,26 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 import cv2
-import time
+import logging
+
+from models.log_manager import get_logger, get_ring_buffer
+
+logger = get_logger('ui')
 
 class MainInterface:
     def __init__(self, controller):
         self.controller = controller
         self.root = tk.Tk()
+        
+        # Agrupamento de eventos de slider e de mensagens de log
+        self.throttle_values = {}
+        self.throttle_after = {}
+        self.log_after = {}
+        
+        # Posição já exibida do buffer circular de log
+        self.log_seq = 0
+        self.log_lines = 0
+        
         self.setup_window()
         self.setup_layout()
         self.setup_video_area()
@@ -66,6 +80,10 @@ class MainInterface:
         self.video_canvas = tk.Canvas(self.video_frame, bg='black', width=640, height=480)
         self.video_canvas.pack(expand=True, fill=tk.BOTH)
         
+        # Tamanho do canvas acompanhado por evento (lido pelas threads de vídeo)
+        self.canvas_size = (640, 480)
+        self.video_canvas.bind('<Configure>', self.on_canvas_resize)
+        
         # Label de status
         self.status_label = ttk.Label(self.video_frame, text="📹 Câmera desconectada", font=('Arial', 10))
         self.status_label.pack(pady=(5, 0))
@@ -142,7 +160,7 @@ class MainInterface:
         self.camera_status_label.pack(anchor=tk.W)
         
         # Dica de performance
-        perf_tip = ttk.Label(status_frame, text="💡 FPS baixo? Tente reduzir a resolução ou ajustar threshold", 
+        perf_tip = ttk.Label(status_frame, text="💡 FPS baixo? Ative a qualidade automática na aba Estatísticas ou reduza a resolução", 
                             font=('Arial', 8), foreground='blue', wraplength=300)
         perf_tip.pack(anchor=tk.W, pady=(2, 0))
         
@@ -154,6 +172,12 @@ class MainInterface:
                   command=self.controller.save_config).pack(fill=tk.X, pady=(0, 5))
         ttk.Button(actions_frame, text="🔄 Resetar Configurações", 
                   command=self.controller.reset_config).pack(fill=tk.X, pady=(0, 5))
+        ttk.Button(actions_frame, text="📸 Salvar Snapshot", 
+                  command=self.controller.save_snapshot).pack(fill=tk.X, pady=(0, 5))
+        ttk.Button(actions_frame, text="🎬 Gravar Evento", 
+                  command=self.controller.trigger_recording).pack(fill=tk.X, pady=(0, 5))
+        ttk.Button(actions_frame, text="🔥 Exportar Heatmap", 
+                  command=self.controller.export_heatmap).pack(fill=tk.X, pady=(0, 5))
         ttk.Button(actions_frame, text="📖 Ajuda", 
                   command=self.show_help).pack(fill=tk.X)
         
@@ -224,15 +248,24 @@ class MainInterface:
                        variable=self.show_boxes_var,
                        command=self.on_display_change).pack(anchor=tk.W)
         
+        # Mantém a escolha do usuário; desabilitado enquanto a qualidade automática a sobrepõe
         self.show_masks_var = tk.BooleanVar(value=True)
-        ttk.Checkbutton(display_frame, text="Mostrar Máscaras", 
-                       variable=self.show_masks_var,
-                       command=self.on_display_change).pack(anchor=tk.W)
+        self.show_masks_check = ttk.Checkbutton(display_frame, text="Mostrar Máscaras", 
+                                                variable=self.show_masks_var,
+                                                command=self.on_display_change)
+        self.show_masks_check.pack(anchor=tk.W)
         
         self.show_confidence_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(display_frame, text="Mostrar Confiança", 
                        variable=self.show_confidence_var,
                        command=self.on_display_change).pack(anchor=tk.W)
+        
+        self.show_heatmap_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(display_frame, text="Mostrar Heatmap de Ocupação", 
+                       variable=self.show_heatmap_var,
+                       command=self.on_display_change).pack(anchor=tk.W)
+        ttk.Button(display_frame, text="🔥 Zerar Heatmap", 
+                  command=self.controller.reset_heatmap).pack(fill=tk.X, pady=(5, 0))
     
     def setup_camera_tab(self):
         """Aba de configurações de câmera"""
@@ -380,6 +413,43 @@ class MainInterface:
         self.avg_detections_label = ttk.Label(perf_frame, text="Detecções/Frame: --")
         self.avg_detections_label.pack(anchor=tk.W)
         
+        self.avg_area_label = ttk.Label(perf_frame, text="Área Média: --")
+        self.avg_area_label.pack(anchor=tk.W)
+        
+        self.cache_hit_label = ttk.Label(perf_frame, text="Cache de Frames: --")
+        self.cache_hit_label.pack(anchor=tk.W)
+        
+        self.heatmap_label = ttk.Label(perf_frame, text="Permanência Máx.: --")
+        self.heatmap_label.pack(anchor=tk.W)
+        
+        # Governador de qualidade
+        self.governor_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(perf_frame, text="Qualidade automática (manter FPS alvo)", 
+                       variable=self.governor_var,
+                       command=self.on_governor_change).pack(anchor=tk.W, pady=(5, 0))
+        
+        self.governor_label = ttk.Label(perf_frame, text="Qualidade: --", wraplength=300)
+        self.governor_label.pack(anchor=tk.W)
+        
+        self.governor_change_label = ttk.Label(perf_frame, text="", font=('Arial', 8), foreground='gray', wraplength=300)
+        self.governor_change_label.pack(anchor=tk.W)
+        
+        # Janelas deslizantes
+        windows_frame = ttk.LabelFrame(self.stats_tab, text="📈 Janelas (1 min / 15 min / turno)", padding=10)
+        windows_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.window_labels = {}
+        for nome, titulo in (('1min', "1 min"), ('15min', "15 min"), ('shift', "Turno")):
+            label = ttk.Label(windows_frame, text=f"{titulo}: --")
+            label.pack(anchor=tk.W)
+            self.window_labels[nome] = (titulo, label)
+        
+        self.quantiles_label = ttk.Label(windows_frame, text="Quantis (15 min): --", wraplength=300)
+        self.quantiles_label.pack(anchor=tk.W, pady=(5, 0))
+        
+        ttk.Button(windows_frame, text="📈 Exportar Estatísticas", 
+                  command=self.controller.export_stats).pack(fill=tk.X, pady=(5, 0))
+        
         # Modelo
         model_frame = ttk.LabelFrame(self.stats_tab, text="🤖 Modelo", padding=10)
         model_frame.pack(fill=tk.X, pady=(0, 10))
@@ -389,11 +459,24 @@ class MainInterface:
         
         ttk.Button(model_frame, text="🔄 Recarregar Modelo", 
                   command=self.controller.reload_model).pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(model_frame, text="⚙️ Calibrar Desempenho", 
+                  command=self.controller.run_calibration).pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(model_frame, text="🗜️ Quantizar Modelo (INT8)", 
+                  command=self.controller.run_quantization).pack(fill=tk.X, pady=(5, 0))
         
         # Logs
         log_frame = ttk.LabelFrame(self.stats_tab, text="📝 Logs", padding=10)
         log_frame.pack(fill=tk.BOTH, expand=True)
         
+        level_frame = ttk.Frame(log_frame)
+        level_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(level_frame, text="Nível:").pack(side=tk.LEFT)
+        self.log_level_var = tk.StringVar(value="INFO")
+        level_combo = ttk.Combobox(level_frame, textvariable=self.log_level_var, width=10,
+                                   values=["DEBUG", "INFO", "WARNING", "ERROR"], state='readonly')
+        level_combo.pack(side=tk.LEFT, padx=(5, 0))
+        level_combo.bind('<<ComboboxSelected>>', self.on_log_level_change)
+        
         self.log_text = tk.Text(log_frame, height=8, width=40, font=('Consolas', 9))
         scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.log_text.yview)
         self.log_text.configure(yscrollcommand=scrollbar.set)
@@ -406,22 +489,44 @@ class MainInterface:
         """Atualiza threshold de confiança"""
         conf_value = float(value)
         self.confidence_label.config(text=f"{conf_value:.2f}")
-        self.controller.update_confidence(conf_value)
+        self._throttle('confidence', self.controller.update_confidence, conf_value)
     
     def on_iou_change(self, value):
         """Atualiza threshold IoU"""
         iou_value = float(value)
         self.iou_label.config(text=f"{iou_value:.2f}")
-        self.controller.update_iou(iou_value)
+        self._throttle('iou', self.controller.update_iou, iou_value)
     
     def on_display_change(self):
         """Atualiza opções de visualização"""
         self.controller.update_display_options({
             'show_boxes': self.show_boxes_var.get(),
             'show_masks': self.show_masks_var.get(),
-            'show_confidence': self.show_confidence_var.get()
+            'show_confidence': self.show_confidence_var.get(),
+            'show_heatmap': self.show_heatmap_var.get()
         })
     
+    def on_governor_change(self):
+        """Liga/desliga a qualidade automática"""
+        self.controller.toggle_governor(self.governor_var.get())
+    
+    def _throttle(self, nome, callback, value):
+        """
+        Agrupa eventos de slider: durante o arraste, o callback roda no máximo
+        uma vez por ui.slider_throttle_ms, sempre com o último valor.
+        """
+        pendente = nome in self.throttle_values
+        self.throttle_values[nome] = value
+        if pendente:
+            return
+        
+        def _aplicar():
+            self.throttle_after.pop(nome, None)
+            callback(self.throttle_values.pop(nome))
+        
+        delay = self.controller.config_manager.get('ui.slider_throttle_ms', 100)
+        self.throttle_after[nome] = self.root.after(int(delay), _aplicar)
+    
     def change_camera(self):
         """Troca câmera"""
         device_id = int(self.device_var.get())
@@ -440,19 +545,19 @@ class MainInterface:
         """Atualiza brilho"""
         brightness_value = float(value)
         self.brightness_label.config(text=f"{brightness_value:.0f}")
-        self.controller.update_brightness(brightness_value)
+        self._throttle('brightness', self.controller.update_brightness, brightness_value)
     
     def on_contrast_change(self, value):
         """Atualiza contraste"""
         contrast_value = float(value)
         self.contrast_label.config(text=f"{contrast_value:.2f}")
-        self.controller.update_contrast(contrast_value)
+        self._throttle('contrast', self.controller.update_contrast, contrast_value)
     
     def on_sharpness_change(self, value):
         """Atualiza nitidez"""
         sharpness_value = float(value)
         self.sharpness_label.config(text=f"{sharpness_value:.1f}")
-        self.controller.update_sharpness(sharpness_value)
+        self._throttle('sharpness', self.controller.update_sharpness, sharpness_value)
     
     def reset_image_settings(self):
         """Reseta configurações de imagem para padrão"""
@@ -498,38 +603,60 @@ class MainInterface:
 • Configurações são salvas automaticamente"""
         messagebox.showinfo("Ajuda - YOLO Detection Studio", help_text)
     
+    def on_canvas_resize(self, event):
+        """Registra o novo tamanho do canvas de vídeo"""
+        self.canvas_size = (event.width, event.height)
+    
+    def get_display_size(self, frame_shape):
+        """Tamanho (w, h) em que um frame com esse shape será exibido no canvas"""
+        canvas_width, canvas_height = self.canvas_size
+        if canvas_width <= 1 or canvas_height <= 1:
+            return None
+        
+        # Limite opcional da resolução de exibição
+        max_width = self.controller.config_manager.get('pipeline.display_width', 0)
+        if max_width:
+            canvas_height = int(canvas_height * min(max_width / canvas_width, 1.0))
+            canvas_width = min(canvas_width, max_width)
+        
+        # Manter proporção
+        h, w = frame_shape[:2]
+        aspect_ratio = w / h
+        
+        if canvas_width / canvas_height > aspect_ratio:
+            new_height = canvas_height
+            new_width = int(canvas_height * aspect_ratio)
+        else:
+            new_width = canvas_width
+            new_height = int(canvas_width / aspect_ratio)
+        
+        return max(new_width, 1), max(new_height, 1)
+    
     def update_video_display(self, frame):
         """Atualiza display de vídeo"""
         if frame is None:
             return
         
         try:
-            # Converter BGR para RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            display_size = self.get_display_size(frame.shape)
             
-            # Redimensionar para canvas
-            canvas_width = self.video_canvas.winfo_width()
-            canvas_height = self.video_canvas.winfo_height()
-            
-            if canvas_width > 1 and canvas_height > 1:
-                # Manter proporção
-                h, w = frame_rgb.shape[:2]
-                aspect_ratio = w / h
+            if display_size is not None:
+                new_width, new_height = display_size
                 
-                if canvas_width / canvas_height > aspect_ratio:
-                    new_height = canvas_height
-                    new_width = int(canvas_height * aspect_ratio)
-                else:
-                    new_width = canvas_width
-                    new_height = int(canvas_width / aspect_ratio)
+                # Redimensionar antes de converter a cor (menos pixels processados);
+                # frames já anotados na resolução de exibição não são tocados
+                if (new_width, new_height) != (frame.shape[1], frame.shape[0]):
+                    frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_AREA)
                 
-                frame_resized = cv2.resize(frame_rgb, (new_width, new_height))
+                # Converter BGR para RGB
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 
                 # Converter para ImageTk
-                image = Image.fromarray(frame_resized)
+                image = Image.fromarray(frame_rgb)
                 self.current_photo = ImageTk.PhotoImage(image)
                 
                 # Centralizar no canvas
+                canvas_width, canvas_height = self.canvas_size
                 x = (canvas_width - new_width) // 2
                 y = (canvas_height - new_height) // 2
                 
@@ -537,23 +664,61 @@ class MainInterface:
                 self.video_canvas.create_image(x, y, anchor=tk.NW, image=self.current_photo)
         
         except Exception as e:
-            print(f"❌ Erro ao atualizar vídeo: {e}")
+            logger.error(f"❌ Erro ao atualizar vídeo: {e}")
     
     def update_status(self, status_data):
         """Atualiza informações de status"""
         if 'fps' in status_data:
             fps = status_data['fps']
             self.fps_label.config(text=f"FPS: {fps:.1f}")
-            self.avg_fps_label.config(text=f"FPS Médio: {fps:.1f}")
         
         if 'detections' in status_data:
             det_count = status_data['detections']
             self.detections_label.config(text=f"Detecções: {det_count}")
-            self.avg_detections_label.config(text=f"Detecções/Frame: {det_count:.1f}")
+        
+        if status_data.get('windows'):
+            self._atualizar_janelas(status_data['windows'])
+        
+        if status_data.get('governor'):
+            governor = status_data['governor']
+            if governor['enabled']:
+                latencia = "--" if governor['latency_ms'] is None else f"{governor['latency_ms']:.0f}"
+                self.governor_label.config(text=f"Qualidade: nível {governor['level']}/{governor['levels']} "
+                                                f"({governor['description']}), {latencia} ms / alvo {governor['target_ms']:.0f} ms")
+            else:
+                self.governor_label.config(text="Qualidade: manual")
+            self.governor_change_label.config(text=governor['last_change'] or "")
+            
+            mascaras = governor['overrides'].get('display.show_masks')
+            if mascaras is None:
+                self.show_masks_check.config(state='normal', text="Mostrar Máscaras")
+            else:
+                self.show_masks_check.config(
+                    state='disabled',
+                    text=f"Mostrar Máscaras ({'ligadas' if mascaras else 'desligadas'} pela qualidade automática)"
+                )
+        
+        if 'area' in status_data:
+            self.avg_area_label.config(text=f"Área Média: {status_data['area']:.0f} px")
+        
+        if 'cache_hit_rate' in status_data:
+            if status_data['cache_hit_rate'] is None:
+                self.cache_hit_label.config(text="Cache de Frames: desligado")
+            else:
+                self.cache_hit_label.config(text=f"Cache de Frames: {status_data['cache_hit_rate']:.0%} acertos")
+        
+        if status_data.get('heatmap') and status_data['heatmap']['peak_position'] is not None:
+            heatmap = status_data['heatmap']
+            x, y = heatmap['peak_position']
+            self.heatmap_label.config(text=f"Permanência Máx.: {heatmap['peak_seconds']:.0f} s em ({x}, {y}), "
+                                           f"{heatmap['occupied_fraction']:.0%} da área ocupada")
         
         if 'camera_status' in status_data:
             cam_status = status_data['camera_status']
-            self.camera_status_label.config(text=f"Câmera: {cam_status}")
+            fator = status_data.get('decode_factor', 1)
+            # Frames reduzidos na decodificação MJPEG: coordenadas na escala 1/fator
+            reducao = f" (MJPEG 1/{fator}: frames e coordenadas reduzidos)" if fator > 1 else ""
+            self.camera_status_label.config(text=f"Câmera: {cam_status}{reducao}")
             if cam_status == "Conectada":
                 self.status_label.config(text="📹 Câmera conectada")
                 self.detection_button.config(state='normal')
@@ -561,6 +726,31 @@ class MainInterface:
                 self.status_label.config(text="📹 Câmera desconectada")
                 self.detection_button.config(state='disabled')
     
+    def _atualizar_janelas(self, janelas):
+        """Médias reais por janela (1 min nos rótulos de performance) e quantis de 15 min"""
+        minuto = janelas.get('1min')
+        if minuto:
+            self.avg_fps_label.config(text=f"FPS Médio: {minuto['fps']:.1f}")
+            self.avg_detections_label.config(text=f"Detecções/Frame: {minuto['detections_per_frame']:.1f}")
+        
+        for nome, (titulo, label) in self.window_labels.items():
+            dados = janelas.get(nome)
+            if dados:
+                label.config(text=f"{titulo}: {dados['fps']:.1f} FPS, {dados['detections_per_frame']:.1f} det/frame, "
+                                  f"{dados['detections_per_minute']:.0f} det/min")
+        
+        dados = janelas.get('15min')
+        if dados:
+            fmt = self._formatar_quantis
+            chaves = "/".join(dados['latency_ms'])
+            self.quantiles_label.config(text=(
+                f"Quantis (15 min, {chaves}): confiança {fmt(dados['confidence'], '.2f')}, "
+                f"área {fmt(dados['area'], '.0f')} px, latência {fmt(dados['latency_ms'], '.1f')} ms"))
+    
+    @staticmethod
+    def _formatar_quantis(valores, formato):
+        return "/".join("--" if v is None else format(v, formato) for v in valores.values())
+    
     def update_buttons(self, camera_running, detection_running):
         """Atualiza estado dos botões"""
         if camera_running:
@@ -586,8 +776,10 @@ class MainInterface:
         
         # Display
         self.show_boxes_var.set(config_manager.get('display.show_boxes', True))
-        self.show_masks_var.set(config_manager.get('display.show_masks', True))
+        self.show_masks_var.set(config_manager.get_base('display.show_masks', True))
         self.show_confidence_var.set(config_manager.get('display.show_confidence', True))
+        self.show_heatmap_var.set(config_manager.get('display.show_heatmap', False))
+        self.governor_var.set(config_manager.get('governor.enabled', False))
         
         # Câmera
         self.device_var.set(str(config_manager.get('camera.device_id', 0)))
@@ -611,18 +803,52 @@ class MainInterface:
         model_path = config_manager.get('model.path', 'N/A')
         self.model_path_label.config(text=f"Modelo: {model_path}")
     
-    def log_message(self, message):
-        """Adiciona mensagem ao log"""
-        timestamp = time.strftime('%H:%M:%S')
-        log_entry = f"[{timestamp}] {message}\n"
-        
-        self.log_text.insert(tk.END, log_entry)
-        self.log_text.see(tk.END)
-        
-        # Limitar tamanho do log
-        lines = int(self.log_text.index('end-1c').split('.')[0])
-        if lines > 100:
-            self.log_text.delete('1.0', '20.0')
+    def log_message(self, message, level=logging.INFO):
+        """Adiciona mensagem ao log (thread-safe; o widget é atualizado em lote)"""
+        logger.log(level, message)
+    
+    def _atualizar_log(self):
+        """Copia as novas entradas do buffer circular para o widget, em lote"""
+        ring_buffer = get_ring_buffer()
+        if ring_buffer is not None:
+            level = getattr(logging, self.log_level_var.get(), logging.INFO)
+            entries, self.log_seq = ring_buffer.obter_desde(self.log_seq, level)
+            if entries:
+                self.log_text.insert(tk.END, ''.join(f"{line}\n" for _, _, line in entries))
+                self.log_lines += len(entries)
+                
+                # Limitar tamanho do widget (contagem mantida localmente)
+                max_lines = self.controller.config_manager.get('logging.ui_max_lines', 500)
+                if self.log_lines > max_lines:
+                    excesso = self.log_lines - max_lines
+                    self.log_text.delete('1.0', f'{excesso + 1}.0')
+                    self.log_lines = max_lines
+                self.log_text.see(tk.END)
+        
+        interval = self.controller.config_manager.get('logging.ui_refresh_ms', 200)
+        self.root.after(int(interval), self._atualizar_log)
+    
+    def on_log_level_change(self, event=None):
+        """Reconstrói o widget a partir do buffer com o novo filtro de nível"""
+        self.log_text.delete('1.0', tk.END)
+        self.log_seq = 0
+        self.log_lines = 0
+    
+    def log_coalescido(self, chave, message):
+        """
+        Registra a mensagem só quando a chave ficar estável por
+        ui.log_debounce_ms (um arraste de slider gera uma única linha).
+        """
+        pendente = self.log_after.pop(chave, None)
+        if pendente is not None:
+            self.root.after_cancel(pendente)
+        delay = self.controller.config_manager.get('ui.log_debounce_ms', 500)
+        
+        def _registrar():
+            self.log_after.pop(chave, None)
+            self.log_message(message)
+        
+        self.log_after[chave] = self.root.after(int(delay), _registrar)
     
     def on_closing(self):
         """Tratamento de fechamento da janela"""
@@ -632,4 +858,5 @@ class MainInterface:
     
     def run(self):
         """Executa a interface"""
+        self._atualizar_log()
         self.root.mainloop()
\ No newline at end of file